@@ -0,0 +1,8 @@
+Feature: Find the items that break an OPC package
+  In order to find which package items cause a load error without trying each by hand
+  As an Open XML developer
+  I need to bisect a broken package against a working one with a check command
+
+  Scenario: bisect a broken package against a working one
+      When I issue a command to bisect a broken package against a working one
+      Then the item that breaks the package appears on stdout
@@ -31,3 +31,18 @@ Feature: Browse an OPC package item
     | pkg_type |
     |   zip    |
     |   dir    |
+
+
+  Scenario Outline: Browse the nodes of a package part selected by XPath
+      When I issue a command to browse the nodes an XPath selects in a <pkg_type> package
+      Then the selected XML nodes appear on stdout
+
+  Examples: Package Types
+    | pkg_type |
+    |   zip    |
+    |   dir    |
+
+
+  Scenario: Browse the first lines of a package part
+      When I issue a command to browse the first 4 lines of an XML part
+      Then the first 4 lines of the formatted package part XML appear on stdout
@@ -6,3 +6,15 @@ Feature: diff two OPC packages
   Scenario: diff two packages against each other
       When I issue a command to diff two packages
       Then the package diff appears on stdout
+
+  Scenario: list the names of items that differ between two packages
+      When I issue a command to list the names of items that differ between two packages
+      Then the names of the changed items appear on stdout
+
+  Scenario: summarize the differences between two packages
+      When I issue a command to summarize the differences between two packages
+      Then the package diff summary appears on stdout
+
+  Scenario: quietly check whether two packages differ
+      When I issue a command to quietly check whether two packages differ
+      Then the command exits with status 1 and prints nothing
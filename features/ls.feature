@@ -0,0 +1,8 @@
+Feature: List the items in an OPC package
+  In order to see what a package contains without extracting it
+  As an Open XML developer
+  I need to list the items in a package from its zip central directory
+
+  Scenario: list the items in a package
+      When I issue a command to list the items in a package
+      Then the package listing appears on stdout
@@ -19,10 +19,12 @@ from helpers import (
     scratch_path,
 )
 
+SUBCMD_BISECT = "bisect"
 SUBCMD_BROWSE = "browse"
 SUBCMD_DIFF = "diff"
 SUBCMD_DIFF_ITEM = "diff-item"
 SUBCMD_EXTRACT = "extract"
+SUBCMD_LS = "ls"
 SUBCMD_REPACKAGE = "repackage"
 SUBCMD_SUBSTITUTE = "substitute"
 URI_CONTENT_TYPES = "[Content_Types].xml"
@@ -55,11 +57,37 @@ def step_remove_target_directory(context: Context):
 # when =====================================================
 
 
+@when("I issue a command to bisect a broken package against a working one")
+def step_issue_command_to_bisect_pkgs(context: Context):
+    # -- the check fails any package whose slide master has the edit made in changed.pptx --
+    check = (
+        "python -c \"import sys, zipfile; sys.exit(b'Foobar' in"
+        " zipfile.ZipFile(sys.argv[1]).read('%s'))\"" % URI_SLIDE_MASTER
+    )
+    context.cmd = OpcCommand(
+        SUBCMD_BISECT, base_pkg_path, changed_pkg_path, "--check", check
+    ).execute()
+
+
 @when("I issue a command to browse an XML part in a {pkg_type} package")
 def step_issue_command_to_browse_pkg_part(context: Context, pkg_type: str):
     context.cmd = OpcCommand(SUBCMD_BROWSE, pkg_paths[pkg_type], URI_CORE_PROPS).execute()
 
 
+@when("I issue a command to browse the first {count:d} lines of an XML part")
+def step_issue_command_to_browse_head_of_pkg_part(context: Context, count: int):
+    context.cmd = OpcCommand(
+        SUBCMD_BROWSE, base_pkg_path, URI_CORE_PROPS, "--head", str(count)
+    ).execute()
+
+
+@when("I issue a command to browse the nodes an XPath selects in a {pkg_type} package")
+def step_issue_command_to_browse_xpath_nodes(context: Context, pkg_type: str):
+    context.cmd = OpcCommand(
+        SUBCMD_BROWSE, pkg_paths[pkg_type], URI_SLIDE_MASTER, "--xpath", "//p:sldLayoutId"
+    ).execute()
+
+
 @when("I issue a command to browse the content types of a {pkg_type} package")
 def step_issue_command_to_browse_content_types(context: Context, pkg_type: str):
     context.cmd = OpcCommand(SUBCMD_BROWSE, pkg_paths[pkg_type], URI_CONTENT_TYPES).execute()
@@ -96,6 +124,26 @@ def step_command_diff_two_packages(context: Context):
     context.cmd = OpcCommand(SUBCMD_DIFF, base_pkg_path, changed_pkg_path).execute()
 
 
+@when("I issue a command to list the items in a package")
+def step_command_ls_package(context: Context):
+    context.cmd = OpcCommand(SUBCMD_LS, base_pkg_path).execute()
+
+
+@when("I issue a command to list the names of items that differ between two packages")
+def step_command_diff_two_packages_name_only(context: Context):
+    context.cmd = OpcCommand(SUBCMD_DIFF, "--name-only", base_pkg_path, changed_pkg_path).execute()
+
+
+@when("I issue a command to quietly check whether two packages differ")
+def step_command_diff_two_packages_quiet(context: Context):
+    context.cmd = OpcCommand(SUBCMD_DIFF, "--quiet", base_pkg_path, changed_pkg_path).execute()
+
+
+@when("I issue a command to summarize the differences between two packages")
+def step_command_diff_two_packages_stat(context: Context):
+    context.cmd = OpcCommand(SUBCMD_DIFF, "--stat", base_pkg_path, changed_pkg_path).execute()
+
+
 @when("I issue a command to extract a package")
 def step_command_extract_package(context: Context):
     context.cmd = OpcCommand(SUBCMD_EXTRACT, base_pkg_path, extract_dir).execute()
@@ -127,6 +175,19 @@ def step_then_matching_zip_pkg_appears_at_specified_path(context: Context):
     assertPackagesMatch(expanded_dir, scratch_pkg_path)
 
 
+@then("the item that breaks the package appears on stdout")
+def step_then_culprit_item_appears_on_stdout(context: Context):
+    context.cmd.assert_stderr_empty()
+    context.cmd.assert_stdout_matches("bisect.txt")
+
+
+@then("the command exits with status 1 and prints nothing")
+def step_then_command_exits_with_status_1_silently(context: Context):
+    context.cmd.assert_stderr_empty()
+    context.cmd.assert_stdout_empty()
+    assert context.cmd.proc.returncode == 1
+
+
 @then("the content types diff appears on stdout")
 def step_then_content_types_diff_appears_on_stdout(context: Context):
     context.cmd.assert_stderr_empty()
@@ -145,6 +206,18 @@ def step_then_pkg_part_xml_appears_on_stdout(context: Context):
     context.cmd.assert_stdout_matches("browse.core_props.txt")
 
 
+@then("the first {count:d} lines of the formatted package part XML appear on stdout")
+def step_then_head_of_pkg_part_xml_appears_on_stdout(context: Context, count: int):
+    context.cmd.assert_stderr_empty()
+    context.cmd.assert_stdout_matches("browse.core_props.head_%d.txt" % count)
+
+
+@then("the selected XML nodes appear on stdout")
+def step_then_selected_xml_nodes_appear_on_stdout(context: Context):
+    context.cmd.assert_stderr_empty()
+    context.cmd.assert_stdout_matches("browse.xpath.txt")
+
+
 @then("the formatted package rels XML appears on stdout")
 def step_then_pkg_rels_xml_appears_on_stdout(context: Context):
     context.cmd.assert_stderr_empty()
@@ -157,6 +230,24 @@ def step_then_pkg_diff_appears_on_stdout(context: Context):
     context.cmd.assert_stdout_matches("diff.txt")
 
 
+@then("the package listing appears on stdout")
+def step_then_pkg_listing_appears_on_stdout(context: Context):
+    context.cmd.assert_stderr_empty()
+    context.cmd.assert_stdout_matches("ls.txt")
+
+
+@then("the names of the changed items appear on stdout")
+def step_then_changed_item_names_appear_on_stdout(context: Context):
+    context.cmd.assert_stderr_empty()
+    context.cmd.assert_stdout_matches("diff.name-only.txt")
+
+
+@then("the package diff summary appears on stdout")
+def step_then_pkg_diff_summary_appears_on_stdout(context: Context):
+    context.cmd.assert_stderr_empty()
+    context.cmd.assert_stdout_matches("diff.stat.txt")
+
+
 @then("the package items appear in the target directory")
 def step_then_pkg_appears_in_target_dir(context: Context):
     context.cmd.assert_stderr_empty()
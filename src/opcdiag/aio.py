@@ -0,0 +1,125 @@
+"""Asyncio interface to opc-diag, for use in an application that runs an event loop.
+
+Reading a package and forming a diff spend most of their time inflating zip members and parsing
+XML, so each coroutine here hands that work to an executor and awaits the result rather than
+blocking the loop. Results are returned as model and presenter objects; nothing is written to
+stdout.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Executor
+from typing import Callable, TypeVar
+
+from opcdiag.model import C14nOptions, Package, is_binary_uri
+from opcdiag.phys_pkg import Manifest
+from opcdiag.presenter import DiffPresenter, PackageDiff
+
+_CONTENT_TYPES_URI = "[Content_Types].xml"
+
+_T = TypeVar("_T")
+
+
+async def diff_item(
+    package_1_path: str,
+    package_2_path: str,
+    uri_tail: str,
+    c14n: C14nOptions | None = None,
+    executor: Executor | None = None,
+) -> str:
+    """Diff of the item identified by *uri_tail* in the packages at the two paths.
+
+    The diff is the empty string when the item does not differ meaningfully. *c14n* and
+    *executor* are as for :func:`diff_packages`. Only the items having *uri_tail* are read from
+    either package.
+    """
+
+    def has_uri_tail(uri: str) -> bool:
+        return uri.endswith(uri_tail)
+
+    package_1, package_2 = await asyncio.gather(
+        read_package(package_1_path, has_uri_tail, c14n, executor),
+        read_package(package_2_path, has_uri_tail, c14n, executor),
+    )
+    return await _run(executor, DiffPresenter.named_item_diff, package_1, package_2, uri_tail)
+
+
+async def diff_packages(
+    package_1_path: str,
+    package_2_path: str,
+    uri_filter: Callable[[str], bool] | None = None,
+    c14n: C14nOptions | None = None,
+    executor: Executor | None = None,
+) -> PackageDiff:
+    """|PackageDiff| of the meaningful differences between the packages at the two paths.
+
+    Items are chosen, read and compared as for :meth:`OpcController.diff_pkg`. The two packages
+    are read at the same time. Blocking work runs on *executor*, or on the default executor of
+    the running loop when *executor* is |None|.
+    """
+    manifest_1, manifest_2 = await asyncio.gather(
+        _run(executor, Package.read_manifest, package_1_path, uri_filter),
+        _run(executor, Package.read_manifest, package_2_path, uri_filter),
+    )
+    item_changes = DiffPresenter.item_changes(manifest_1, manifest_2)
+    xml_uris = {uri for status, uri in item_changes if status == "M" and not is_binary_uri(uri)}
+    package_1, package_2 = await asyncio.gather(
+        read_package(package_1_path, xml_uris.__contains__, c14n, executor),
+        read_package(package_2_path, xml_uris.__contains__, c14n, executor),
+    )
+    return await _run(
+        executor, _package_diff, manifest_1, manifest_2, package_1, package_2, item_changes
+    )
+
+
+async def read_package(
+    path: str,
+    uri_filter: Callable[[str], bool] | None = None,
+    c14n: C14nOptions | None = None,
+    executor: Executor | None = None,
+) -> Package:
+    """|Package| read from *path* on *executor*, or on the loop's default executor.
+
+    *uri_filter* is as for :meth:`Package.read`. When *c14n* is provided, the XML parts of the
+    package are canonicalized with those options before it is returned.
+    """
+    return await _run(executor, _read_package, path, uri_filter, c14n)
+
+
+def _package_diff(
+    manifest_1: Manifest,
+    manifest_2: Manifest,
+    package_1: Package,
+    package_2: Package,
+    item_changes: list[tuple[str, str]],
+) -> PackageDiff:
+    """|PackageDiff| formed from the manifests and the changed items of two packages."""
+    content_types_diff = (
+        DiffPresenter.named_item_diff(package_1, package_2, _CONTENT_TYPES_URI)
+        if ("M", _CONTENT_TYPES_URI) in item_changes
+        else ""
+    )
+    return PackageDiff(
+        item_changes,
+        DiffPresenter.added_removed(manifest_1, manifest_2),
+        content_types_diff,
+        DiffPresenter.rels_diffs(package_1, package_2),
+        DiffPresenter.xml_part_diffs(package_1, package_2),
+        DiffPresenter.binary_diffs(manifest_1, manifest_2),
+    )
+
+
+def _read_package(
+    path: str, uri_filter: Callable[[str], bool] | None, c14n: C14nOptions | None
+) -> Package:
+    """|Package| at *path*, its XML canonicalized when *c14n* is provided."""
+    package = Package.read(path, uri_filter)
+    if c14n is not None:
+        package.canonicalize_xml(c14n)
+    return package
+
+
+async def _run(executor: Executor | None, func: Callable[..., _T], *args: object) -> _T:
+    """Result of calling *func* with *args* on *executor*, awaited from the running loop."""
+    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
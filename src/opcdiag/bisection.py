@@ -0,0 +1,46 @@
+"""Search for the smallest set of package items that makes a broken package work.
+
+The search works on a list of item URIs and a *passes* callable that reports whether a candidate
+built by substituting a given subset of them is good. It only assumes that substituting more
+items never turns a good candidate bad.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import Executor
+from typing import Callable, Sequence
+
+
+def find_culprits(
+    uris: Sequence[str], passes: Callable[[list[str]], bool], executor: Executor
+) -> list[str]:
+    """Smallest subset of *uris* for which *passes* returns True, in sorted order.
+
+    *passes* must return True for all of *uris* and False for an empty list; the caller checks
+    both. Each round splits the remaining items in half and checks the two halves at the same
+    time on *executor*, so a single culprit is found in about log2(n) rounds. When neither half
+    passes alone, the culprits are spread across both and each half is searched with the other
+    held substituted.
+    """
+    return sorted(_isolate(list(uris), [], passes, executor))
+
+
+def _isolate(
+    uris: list[str], fixed: list[str], passes: Callable[[list[str]], bool], executor: Executor
+) -> list[str]:
+    """Smallest subset of *uris* that passes when substituted along with *fixed*.
+
+    *fixed* plus all of *uris* passes and *fixed* alone does not.
+    """
+    if len(uris) == 1:
+        return uris
+    half = len(uris) // 2
+    left, right = uris[:half], uris[half:]
+    left_passes, right_passes = executor.map(passes, (fixed + left, fixed + right))
+    if left_passes:
+        return _isolate(left, fixed, passes, executor)
+    if right_passes:
+        return _isolate(right, fixed, passes, executor)
+    # -- culprits in both halves; those in the right are found with the left ones in place --
+    left_culprits = _isolate(left, fixed + right, passes, executor)
+    return left_culprits + _isolate(right, fixed + left_culprits, passes, executor)
@@ -6,10 +6,19 @@ from __future__ import annotations
 
 import abc
 import argparse
+import contextlib
 import os
+import shlex
+import shutil
 import sys
+import zipfile
+from typing import Generator
+
+from lxml import etree
 
 from opcdiag.controller import OpcController
+from opcdiag.diff_cache import DiffCache
+from opcdiag.model import C14nOptions, UriFilter
 
 
 class CommandController:
@@ -88,6 +97,60 @@ class Command(abc.ABC):
     def validate(self, args: argparse.Namespace) -> None: ...
 
 
+class BisectCommand(Command):
+    """Implements the `bisect` sub-command."""
+
+    @staticmethod
+    def add_command_parser_to(subparsers: argparse._SubParsersAction[argparse.ArgumentParser]):
+        parser = subparsers.add_parser(
+            "bisect", help="Find the parts that make a package fail a check"
+        )
+        parser.add_argument("good_pkg_path", metavar="GOOD", help="package that passes the check")
+        parser.add_argument("bad_pkg_path", metavar="BAD", help="package that fails the check")
+        parser.add_argument(
+            "--check",
+            metavar="CMD",
+            required=True,
+            help="Command that checks a package, e.g. 'python validate.py'; it is run with the"
+            " path of each candidate package appended and passes when it exits with status 0",
+        )
+        parser.add_argument(
+            "-j",
+            "--jobs",
+            metavar="N",
+            type=int,
+            choices=(1, 2),
+            default=2,
+            help="Check candidate packages N at a time, 1 or 2 (default 2); each step of the"
+            " search has two candidates, so more would sit idle",
+        )
+        return parser
+
+    def execute(self, args: argparse.Namespace, app_controller: OpcController):
+        check_cmd = shlex.split(args.check)
+        if not app_controller.bisect(args.good_pkg_path, args.bad_pkg_path, check_cmd, args.jobs):
+            sys.exit(1)
+
+    def validate(self, args: argparse.Namespace):
+        paths_that_should_exist = (
+            (args.good_pkg_path, "GOOD"),
+            (args.bad_pkg_path, "BAD"),
+        )
+        try:
+            for path, metavar in paths_that_should_exist:
+                msg = "%s '%s' is not a zip package" % (metavar, path)
+                assert zipfile.is_zipfile(path), msg
+            try:
+                check_cmd = shlex.split(args.check)
+            except ValueError as e:
+                raise AssertionError("invalid check command '%s': %s" % (args.check, e))
+            assert check_cmd, "check command is empty"
+            msg = "check command '%s' is not found or not executable" % check_cmd[0]
+            assert shutil.which(check_cmd[0]) is not None, msg
+        except AssertionError as e:
+            self._parser.error(str(e))
+
+
 class BrowseCommand(Command):
     """Implements the `browse` sub-command."""
 
@@ -102,10 +165,37 @@ class BrowseCommand(Command):
             metavar="FILENAME",
             help="Filename portion of the pack URI for the part to browse",
         )
+        parser.add_argument(
+            "--xpath",
+            metavar="EXPR",
+            help="List only the nodes XPath EXPR selects, e.g. '//w:tbl'. Prefixes are those"
+            " declared on the root element, with '_' for a default namespace",
+        )
+        range_group = parser.add_mutually_exclusive_group()
+        range_group.add_argument(
+            "--head", metavar="N", type=_positive_int, help="List only the first N lines"
+        )
+        range_group.add_argument(
+            "--lines",
+            metavar="A:B",
+            type=_range,
+            help="List only lines A through B, counting from 1; either A or B can be omitted",
+        )
+        range_group.add_argument(
+            "--bytes",
+            metavar="A:B",
+            type=_range,
+            help="List only bytes A through B of the UTF-8 output, counting from 1",
+        )
         return parser
 
     def execute(self, args: argparse.Namespace, app_controller: OpcController):
-        app_controller.browse(args.pkg_path, args.filename)
+        line_range = (1, args.head) if args.head is not None else args.lines
+        try:
+            app_controller.browse(args.pkg_path, args.filename, args.xpath, line_range, args.bytes)
+        except etree.XPathError as e:
+            # -- prefixes are only known once the root element of the item is read --
+            self._parser.error("invalid XPath expression '%s': %s" % (args.xpath, e))
 
     def validate(self, args: argparse.Namespace):
         try:
@@ -113,6 +203,11 @@ class BrowseCommand(Command):
             assert os.path.exists(args.pkg_path), msg
         except AssertionError as e:
             self._parser.error(str(e))
+        if args.xpath is not None:
+            try:
+                etree.XPath(args.xpath)
+            except etree.XPathSyntaxError as e:
+                self._parser.error("invalid XPath expression '%s': %s" % (args.xpath, e))
 
 
 class DiffCommand(Command):
@@ -125,10 +220,41 @@ class DiffCommand(Command):
         )
         parser.add_argument("pkg_1_path", metavar="PKG_1_PATH", help="first package to compare")
         parser.add_argument("pkg_2_path", metavar="PKG_2_PATH", help="second package to compare")
+        summary_group = parser.add_mutually_exclusive_group()
+        summary_group.add_argument(
+            "--name-only",
+            action="store_true",
+            help="List only the status and name of each added, deleted, or changed item",
+        )
+        summary_group.add_argument(
+            "--stat",
+            action="store_true",
+            help="List inserted and deleted line counts for each changed item",
+        )
+        summary_group.add_argument(
+            "-q",
+            "--quiet",
+            action="store_true",
+            help="Print nothing; exit with status 1 at the first difference, 0 if none",
+        )
+        _add_uri_filter_arguments(parser)
+        _add_c14n_arguments(parser)
+        _add_diff_cache_arguments(parser)
         return parser
 
     def execute(self, args: argparse.Namespace, app_controller: OpcController):
-        app_controller.diff_pkg(args.pkg_1_path, args.pkg_2_path)
+        uri_filter = _uri_filter(args)
+        c14n = _c14n_options(args)
+        if args.quiet:
+            if app_controller.diff_pkg_quiet(args.pkg_1_path, args.pkg_2_path, uri_filter, c14n):
+                sys.exit(1)
+        elif args.name_only:
+            app_controller.diff_pkg_names(args.pkg_1_path, args.pkg_2_path, uri_filter)
+        elif args.stat:
+            app_controller.diff_pkg_stat(args.pkg_1_path, args.pkg_2_path, uri_filter, c14n)
+        else:
+            with _diff_cache(args) as cache:
+                app_controller.diff_pkg(args.pkg_1_path, args.pkg_2_path, uri_filter, c14n, cache)
 
     def validate(self, args: argparse.Namespace):
         paths_that_should_exist = (
@@ -139,6 +265,10 @@ class DiffCommand(Command):
             for path, metavar in paths_that_should_exist:
                 msg = "%s '%s' does not exist" % (metavar, path)
                 assert os.path.exists(path), msg
+            # -- only full diffs are cached; a summary has no item diffs to reuse --
+            msg = "--diff-cache cannot be used with --name-only, --stat, or --quiet"
+            summary = args.name_only or args.stat or args.quiet
+            assert args.diff_cache is None or not summary, msg
         except AssertionError as e:
             self._parser.error(str(e))
 
@@ -159,10 +289,15 @@ class DiffItemCommand(Command):
             metavar="FILENAME",
             help="Filename portion of pack URI for item to browse",
         )
+        _add_c14n_arguments(parser)
+        _add_diff_cache_arguments(parser)
         return parser
 
     def execute(self, args: argparse.Namespace, app_controller: OpcController):
-        app_controller.diff_item(args.pkg_1_path, args.pkg_2_path, args.filename)
+        with _diff_cache(args) as cache:
+            app_controller.diff_item(
+                args.pkg_1_path, args.pkg_2_path, args.filename, _c14n_options(args), cache
+            )
 
     def validate(self, args: argparse.Namespace):
         paths_that_should_exist = (
@@ -192,6 +327,14 @@ class ExtractCommand(Command):
             metavar="DIRPATH",
             help="Path to directory into which to extract package items",
         )
+        parser.add_argument(
+            "--raw",
+            action="store_true",
+            help="Extract XML items as stored rather than pretty-printed, streaming every item"
+            " straight to disk",
+        )
+        _add_uri_filter_arguments(parser)
+        _add_watch_arguments(parser, "DIRPATH")
         return parser
 
     def validate(self, args: argparse.Namespace):
@@ -202,7 +345,44 @@ class ExtractCommand(Command):
             self._parser.error(str(e))
 
     def execute(self, args: argparse.Namespace, app_controller: OpcController):
-        app_controller.extract_package(args.pkg_path, args.dirpath)
+        app_controller.extract_package(
+            args.pkg_path, args.dirpath, _uri_filter(args), args.raw, args.watch, args.interval
+        )
+
+
+class LsCommand(Command):
+    """Implements the `ls` sub-command."""
+
+    @staticmethod
+    def add_command_parser_to(subparsers: argparse._SubParsersAction[argparse.ArgumentParser]):
+        parser = subparsers.add_parser(
+            "ls", help="List the items in a package from its zip central directory"
+        )
+        parser.add_argument("pkg_path", metavar="PKG_PATH", help="Path to OPC package file")
+        parser.add_argument(
+            "--sort",
+            choices=("uri", "size", "compressed_size", "crc", "date_time"),
+            default="uri",
+            help="Field to sort the listing on (default: uri)",
+        )
+        parser.add_argument(
+            "-r", "--reverse", action="store_true", help="Reverse the order of the listing"
+        )
+        parser.add_argument("--json", action="store_true", help="Write the listing as JSON")
+        _add_uri_filter_arguments(parser)
+        return parser
+
+    def execute(self, args: argparse.Namespace, app_controller: OpcController):
+        app_controller.list_items(
+            args.pkg_path, args.sort, args.reverse, args.json, _uri_filter(args)
+        )
+
+    def validate(self, args: argparse.Namespace):
+        try:
+            msg = "PKG_PATH '%s' does not exist" % args.pkg_path
+            assert os.path.exists(args.pkg_path), msg
+        except AssertionError as e:
+            self._parser.error(str(e))
 
 
 class RepackageCommand(Command):
@@ -224,6 +404,8 @@ class RepackageCommand(Command):
             metavar="NEW_PACKAGE",
             help="Path at which to save new package file",
         )
+        _add_uri_filter_arguments(parser)
+        _add_watch_arguments(parser, "NEW_PACKAGE")
         return parser
 
     def validate(self, args: argparse.Namespace):
@@ -234,7 +416,9 @@ class RepackageCommand(Command):
             self._parser.error(str(e))
 
     def execute(self, args: argparse.Namespace, app_controller: OpcController):
-        app_controller.repackage(args.dirpath, args.new_package)
+        app_controller.repackage(
+            args.dirpath, args.new_package, _uri_filter(args), args.watch, args.interval
+        )
 
 
 class SubstituteCommand(Command):
@@ -249,7 +433,9 @@ class SubstituteCommand(Command):
         parser.add_argument(
             "filename",
             metavar="FILENAME",
-            help="Filename portion of partname for part to substitute",
+            nargs="?",
+            help="Filename portion of partname for part to substitute; may be omitted when"
+            " --item or --items-from names the parts",
         )
         parser.add_argument(
             "src_pkg_path",
@@ -266,26 +452,199 @@ class SubstituteCommand(Command):
             metavar="RESULT_PKG_PATH",
             help="path at which to store resulting package file",
         )
+        parser.add_argument(
+            "--item",
+            action="append",
+            default=[],
+            metavar="SPEC",
+            help="Also substitute the part(s) SPEC names, a partname tail or a glob pattern like"
+            " 'ppt/slideLayouts/*'; may be repeated",
+        )
+        parser.add_argument(
+            "--items-from",
+            metavar="FILE",
+            help="Also substitute the part(s) named by each line of FILE, as for --item; blank"
+            " lines and lines starting with '#' are ignored",
+        )
         return parser
 
     def validate(self, args: argparse.Namespace):
-        paths_that_should_exist = (
+        paths_that_should_exist = [
             (args.src_pkg_path, "SRC_PKG_PATH"),
             (args.tgt_pkg_path, "TGT_PKG_PATH"),
-        )
+        ]
+        if args.items_from is not None:
+            paths_that_should_exist.append((args.items_from, "--items-from FILE"))
         try:
             for path, metavar in paths_that_should_exist:
                 msg = "%s '%s' does not exist" % (metavar, path)
                 assert os.path.exists(path), msg
+            msg = "name a part to substitute with FILENAME, --item, or --items-from"
+            assert args.filename or args.item or args.items_from, msg
         except AssertionError as e:
             self._parser.error(str(e))
 
     def execute(self, args: argparse.Namespace, app_controller: OpcController):
         app_controller.substitute(
-            args.filename, args.src_pkg_path, args.tgt_pkg_path, args.result_pkg_path
+            _item_specs(args), args.src_pkg_path, args.tgt_pkg_path, args.result_pkg_path
         )
 
 
+def _add_c14n_arguments(parser: argparse.ArgumentParser):
+    """Add the options that canonicalize XML parts before they are compared to *parser*."""
+    parser.add_argument(
+        "--c14n",
+        action="store_true",
+        help="Canonicalize XML parts with C14N 2.0 before comparing them, so differences like"
+        " attribute order and comments are ignored",
+    )
+    parser.add_argument(
+        "--rewrite-prefixes",
+        action="store_true",
+        help="Implies --c14n; rename namespace prefixes to n0, n1, ... so a change of prefix"
+        " alone is not a difference",
+    )
+    parser.add_argument(
+        "--strip-text",
+        action="store_true",
+        help="Implies --c14n; strip leading and trailing whitespace from text",
+    )
+
+
+def _add_diff_cache_arguments(parser: argparse.ArgumentParser):
+    """Add the options that keep item diffs in an on-disk cache to *parser*."""
+    parser.add_argument(
+        "--diff-cache",
+        metavar="PATH",
+        help="Keep the diff of each pair of item versions in a cache file at PATH, created if"
+        " need be, and reuse it whenever the same two versions are diffed again",
+    )
+    parser.add_argument(
+        "--diff-cache-size",
+        metavar="MB",
+        type=_positive_int,
+        default=64,
+        help="Evict the least recently used diffs when the cache holds more than MB megabytes;"
+        " default 64",
+    )
+
+
+def _add_uri_filter_arguments(parser: argparse.ArgumentParser):
+    """Add the `--include` and `--exclude` item-selection options to *parser*."""
+    parser.add_argument(
+        "--include",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="Only process items whose URI matches GLOB, e.g. 'word/*.xml'; a leading '!'"
+        " excludes instead. May be repeated",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="GLOB",
+        help="Skip items whose URI matches GLOB, e.g. '**/media/*'. May be repeated",
+    )
+
+
+def _add_watch_arguments(parser: argparse.ArgumentParser, what: str):
+    """Add the options that keep *what* up to date with its source package to *parser*."""
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep watching the source package for changes and update %s, redoing only the"
+        " changed items, until interrupted with Ctrl-C" % what,
+    )
+    parser.add_argument(
+        "--interval",
+        metavar="SECONDS",
+        type=_positive_float,
+        default=1.0,
+        help="Seconds between checks for changes with --watch; default 1",
+    )
+
+
+def _c14n_options(args: argparse.Namespace) -> C14nOptions | None:
+    """The |C14nOptions| chosen by the `--c14n` options in *args*.
+
+    |None| when none of them was given, so XML is compared as-is.
+    """
+    if not (args.c14n or args.rewrite_prefixes or args.strip_text):
+        return None
+    return C14nOptions(args.rewrite_prefixes, args.strip_text)
+
+
+@contextlib.contextmanager
+def _diff_cache(args: argparse.Namespace) -> Generator[DiffCache | None, None, None]:
+    """The |DiffCache| named by the `--diff-cache` options in *args*, closed on exit.
+
+    |None| when no cache file was given, so each diff is formed afresh.
+    """
+    if args.diff_cache is None:
+        yield None
+        return
+    max_bytes = args.diff_cache_size * 1024 * 1024
+    with contextlib.closing(DiffCache(args.diff_cache, max_bytes)) as cache:
+        yield cache
+
+
+def _item_specs(args: argparse.Namespace) -> list[str]:
+    """The item specs named by the FILENAME, `--item`, and `--items-from` arguments in *args*."""
+    item_specs = [args.filename] if args.filename else []
+    item_specs.extend(args.item)
+    if args.items_from is not None:
+        with open(args.items_from) as f:
+            lines = [line.strip() for line in f]
+        item_specs.extend(line for line in lines if line and not line.startswith("#"))
+    return item_specs
+
+
+def _positive_int(text: str) -> int:
+    """Argument type for a count of 1 or more."""
+    if not text.isdigit() or int(text) < 1:
+        raise argparse.ArgumentTypeError("expected a positive integer, got '%s'" % text)
+    return int(text)
+
+
+def _positive_float(text: str) -> float:
+    """Argument type for a number greater than 0."""
+    try:
+        value = float(text)
+    except ValueError:
+        value = 0.0
+    if not value > 0.0:
+        raise argparse.ArgumentTypeError("expected a positive number, got '%s'" % text)
+    return value
+
+
+def _range(text: str) -> tuple[int, int | None]:
+    """Argument type for an `A:B` range, returned as a `(first, last)` pair.
+
+    Positions count from 1 and the range includes both ends. `A` defaults to 1 and an omitted `B`
+    gives a *last* of |None|, meaning through the end. A single number selects just that one.
+    """
+    first, sep, last = text.partition(":")
+    try:
+        first_num = _positive_int(first) if first or not sep else 1
+        last_num = _positive_int(last) if last else None if sep else first_num
+    except argparse.ArgumentTypeError:
+        raise argparse.ArgumentTypeError("expected a range like 'A:B', got '%s'" % text) from None
+    if last_num is not None and last_num < first_num:
+        raise argparse.ArgumentTypeError("range '%s' ends before it starts" % text)
+    return first_num, last_num
+
+
+def _uri_filter(args: argparse.Namespace) -> UriFilter | None:
+    """A |UriFilter| built from the `--include` and `--exclude` options in *args*.
+
+    |None| when neither option was given, so every item is processed.
+    """
+    if not (args.include or args.exclude):
+        return None
+    return UriFilter(args.include, args.exclude)
+
+
 def main(argv: list[str] | None = None):
     command_controller = CommandController.new()
     command_controller.execute(argv)
@@ -2,9 +2,20 @@
 
 from __future__ import annotations
 
-from opcdiag.model import Package
+import itertools
+import os
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from operator import attrgetter
+from typing import Callable, Sequence
+
+from opcdiag.bisection import find_culprits
+from opcdiag.diff_cache import DiffCache
+from opcdiag.model import C14nOptions, Package, is_binary_uri, item_spec_filter
 from opcdiag.presenter import DiffPresenter, ItemPresenter
 from opcdiag.view import OpcView
+from opcdiag.watch import poll_changes, snapshot
 
 _CONTENT_TYPES_URI = "[Content_Types].xml"
 
@@ -16,68 +27,393 @@ class OpcController:
     them, and using the appropriate view object to format the results to be displayed.
     """
 
-    def browse(self, pkg_path: str, uri_tail: str):
-        """Display pretty-printed XML of part with *uri_tail* in package at `pkg_path`."""
-        pkg = Package.read(pkg_path)
-        pkg_item = pkg.find_item_by_uri_tail(uri_tail)
-        item_presenter = ItemPresenter(pkg_item)
-        OpcView.pkg_item(item_presenter)
+    def bisect(
+        self,
+        good_pkg_path: str,
+        bad_pkg_path: str,
+        check_cmd: Sequence[str],
+        jobs: int | None = None,
+    ) -> bool:
+        """
+        Display the smallest set of items that, substituted from the good
+        package at *good_pkg_path* into the bad package at *bad_pkg_path*,
+        make it pass *check_cmd*. The check is run with the path of each
+        candidate package appended and passes when it exits with status 0.
+        Up to *jobs* candidates are built and checked at a time; each step of
+        the search checks two, so more than 2 gains nothing.
+
+        Only the items that differ between the two packages are considered.
+        Candidates are spliced from the compressed members of the two zip
+        packages, so no item is recompressed. Return False, after displaying
+        the reason, when there is nothing to search: the packages do not
+        differ, the bad package already passes, or substituting every
+        differing item does not make it pass.
+        """
+        manifest_good = Package.read_manifest(good_pkg_path)
+        manifest_bad = Package.read_manifest(bad_pkg_path)
+        uris = [uri for _, uri in DiffPresenter.item_changes(manifest_bad, manifest_good)]
+        if not uris:
+            OpcView.bisect_failed("the packages do not differ")
+            return False
+        suffix = os.path.splitext(bad_pkg_path)[1]
+        candidate_numbers = itertools.count(1)
+        with tempfile.TemporaryDirectory() as tmp_dirpath, ThreadPoolExecutor(jobs) as executor:
+
+            def passes(subst_uris: list[str]) -> bool:
+                candidate_path = os.path.join(
+                    tmp_dirpath, "candidate-%d%s" % (next(candidate_numbers), suffix)
+                )
+                Package.splice(bad_pkg_path, good_pkg_path, subst_uris, candidate_path)
+                try:
+                    return _check_passes(check_cmd, candidate_path)
+                finally:
+                    os.remove(candidate_path)
+
+            bad_passes, all_pass = executor.map(passes, ([], uris))
+            if bad_passes:
+                OpcView.bisect_failed("the bad package passes the check")
+                return False
+            if not all_pass:
+                OpcView.bisect_failed("the check fails with every differing item substituted")
+                return False
+            culprits = find_culprits(uris, passes, executor)
+        OpcView.culprits(culprits, len(uris), next(candidate_numbers) - 1)
+        return True
+
+    def browse(
+        self,
+        pkg_path: str,
+        uri_tail: str,
+        xpath: str | None = None,
+        line_range: tuple[int, int | None] | None = None,
+        byte_range: tuple[int, int | None] | None = None,
+    ):
+        """Display pretty-printed XML of part with *uri_tail* in package at `pkg_path`.
+
+        When *xpath* is provided, only the nodes that XPath expression selects are displayed.
+        Output is limited to *line_range* or *byte_range* when one is given. The package is
+        opened with :meth:`Package.open`, so only the item displayed is loaded from it.
+        """
+        pkg = Package.open(pkg_path, lambda uri: uri.endswith(uri_tail))
+        with pkg:
+            pkg_item = pkg.find_item_by_uri_tail(uri_tail)
+            if xpath is not None:
+                OpcView.nodes(pkg_item.select(xpath), line_range, byte_range)
+                return
+            item_presenter = ItemPresenter(pkg_item)
+            OpcView.pkg_item(item_presenter, line_range, byte_range)
 
-    def diff_item(self, package_1_path: str, package_2_path: str, uri_tail: str):
+    def diff_item(
+        self,
+        package_1_path: str,
+        package_2_path: str,
+        uri_tail: str,
+        c14n: C14nOptions | None = None,
+        cache: DiffCache | None = None,
+    ):
         """
         Display the meaningful differences between the item identified by
         *uri_tail* in the package at *package_1_path* and its counterpart in
         the package at *package_2_path*. Each path can be either a standard
         zip package (e.g. a .pptx file) or a directory containing an extracted
-        package.
+        package. When *c14n* is provided, XML parts are canonicalized with
+        those options before they are compared. When *cache* is provided, a
+        diff already formed for the same two versions of the item is reused.
+        Each package is opened with :meth:`Package.open`, so only the item
+        compared, or the items having *uri_tail* when *c14n* is provided, is
+        loaded from it.
         """
-        package_1 = Package.read(package_1_path)
-        package_2 = Package.read(package_2_path)
-        diff = DiffPresenter.named_item_diff(package_1, package_2, uri_tail)
+        package_1, package_2 = _read_packages(
+            package_1_path, package_2_path, lambda uri: uri.endswith(uri_tail), c14n, lazy=True
+        )
+        with package_1, package_2:
+            diff = DiffPresenter.named_item_diff(package_1, package_2, uri_tail, cache)
         OpcView.item_diff(diff)
 
-    def diff_pkg(self, package_1_path: str, package_2_path: str):
+    def diff_pkg(
+        self,
+        package_1_path: str,
+        package_2_path: str,
+        uri_filter: Callable[[str], bool] | None = None,
+        c14n: C14nOptions | None = None,
+        cache: DiffCache | None = None,
+    ):
         """
         Display the meaningful differences between the packages at
         *package_1_path* and *package_2_path*. Each path can be either a
         standard zip package (e.g. .pptx file) or a directory containing an
-        extracted package.
+        extracted package. When *uri_filter* is provided, only items it
+        selects are loaded and compared. When *c14n* is provided, XML parts
+        are canonicalized with those options before they are compared.
+        *cache* is as for :meth:`diff_item`.
+
+        The two manifests are compared first, so items present in only one
+        package are reported without loading either, and only XML items whose
+        size or CRC differ are then loaded and diffed. Binary items are
+        compared by manifest alone and are never loaded.
+        """
+        manifest_1 = Package.read_manifest(package_1_path, uri_filter)
+        manifest_2 = Package.read_manifest(package_2_path, uri_filter)
+        added_removed = DiffPresenter.added_removed(manifest_1, manifest_2)
+        item_changes = DiffPresenter.item_changes(manifest_1, manifest_2)
+        xml_uris = {uri for status, uri in item_changes if status == "M" and not is_binary_uri(uri)}
+        package_1, package_2 = _read_packages(
+            package_1_path, package_2_path, xml_uris.__contains__, c14n
+        )
+        content_types_diff = (
+            DiffPresenter.named_item_diff(package_1, package_2, _CONTENT_TYPES_URI, cache)
+            if _CONTENT_TYPES_URI in xml_uris
+            else ""
+        )
+        rels_diffs = DiffPresenter.rels_diffs(package_1, package_2, cache)
+        xml_part_diffs = DiffPresenter.xml_part_diffs(package_1, package_2, cache)
+        binary_diffs = DiffPresenter.binary_diffs(manifest_1, manifest_2)
+        OpcView.package_diff(
+            content_types_diff, rels_diffs, xml_part_diffs, binary_diffs, added_removed
+        )
+
+    def diff_pkg_names(
+        self,
+        package_1_path: str,
+        package_2_path: str,
+        uri_filter: Callable[[str], bool] | None = None,
+    ):
+        """
+        Display the status and URI of each item that is added, deleted, or
+        modified between the packages at *package_1_path* and
+        *package_2_path*. Only the package manifests are read; for a zip
+        package no item is decompressed.
         """
-        package_1 = Package.read(package_1_path)
-        package_2 = Package.read(package_2_path)
-        content_types_diff = DiffPresenter.named_item_diff(package_1, package_2, _CONTENT_TYPES_URI)
-        rels_diffs = DiffPresenter.rels_diffs(package_1, package_2)
-        xml_part_diffs = DiffPresenter.xml_part_diffs(package_1, package_2)
-        OpcView.package_diff(content_types_diff, rels_diffs, xml_part_diffs)
+        manifest_1 = Package.read_manifest(package_1_path, uri_filter)
+        manifest_2 = Package.read_manifest(package_2_path, uri_filter)
+        item_changes = DiffPresenter.item_changes(manifest_1, manifest_2)
+        OpcView.item_changes(item_changes)
 
-    def extract_package(self, package_path: str, extract_dirpath: str):
+    def diff_pkg_quiet(
+        self,
+        package_1_path: str,
+        package_2_path: str,
+        uri_filter: Callable[[str], bool] | None = None,
+        c14n: C14nOptions | None = None,
+    ) -> bool:
+        """
+        Return True if the packages at *package_1_path* and *package_2_path*
+        differ meaningfully, without displaying anything. The package
+        manifests are compared first, and an added, removed or changed
+        binary item settles the answer without reading any member. Only XML
+        items whose size or CRC differ are then loaded and normalized,
+        stopping at the first item found to differ. *c14n* is as for
+        :meth:`diff_pkg`.
+        """
+        manifest_1 = Package.read_manifest(package_1_path, uri_filter)
+        manifest_2 = Package.read_manifest(package_2_path, uri_filter)
+        item_changes = DiffPresenter.item_changes(manifest_1, manifest_2)
+        if any(status != "M" or is_binary_uri(uri) for status, uri in item_changes):
+            return True
+        changed_uris = [uri for _, uri in item_changes]
+        if not changed_uris:
+            return False
+        package_1, package_2 = _read_packages(
+            package_1_path, package_2_path, set(changed_uris).__contains__, c14n
+        )
+        return DiffPresenter.items_differ(package_1, package_2, changed_uris)
+
+    def diff_pkg_stat(
+        self,
+        package_1_path: str,
+        package_2_path: str,
+        uri_filter: Callable[[str], bool] | None = None,
+        c14n: C14nOptions | None = None,
+    ):
+        """
+        Display a summary of the differences between the packages at
+        *package_1_path* and *package_2_path*, with inserted and deleted line
+        counts for each changed item. Only items whose size or CRC differ are
+        loaded and normalized, and no diff text is formed. *c14n* is as for
+        :meth:`diff_pkg`.
+        """
+        manifest_1 = Package.read_manifest(package_1_path, uri_filter)
+        manifest_2 = Package.read_manifest(package_2_path, uri_filter)
+        item_changes = DiffPresenter.item_changes(manifest_1, manifest_2)
+        changed_uris = {uri for _, uri in item_changes}
+        package_1, package_2 = _read_packages(
+            package_1_path, package_2_path, changed_uris.__contains__, c14n
+        )
+        diff_stats = DiffPresenter.diff_stats(package_1, package_2, item_changes)
+        OpcView.diff_stat(diff_stats)
+
+    def extract_package(
+        self,
+        package_path: str,
+        extract_dirpath: str,
+        uri_filter: Callable[[str], bool] | None = None,
+        raw: bool = False,
+        watch: bool = False,
+        interval: float = 1.0,
+    ):
         """
         Extract the contents of the package at *package_path* to individual
-        files in a directory at *extract_dirpath*.
+        files in a directory at *extract_dirpath*. When *uri_filter* is
+        provided, only items it selects are decompressed and extracted. XML
+        items are pretty-printed unless *raw* is True; other items are
+        streamed to disk as-is.
+
+        When *watch* is True, the package is then polled every *interval*
+        seconds until interrupted, and each time it changes only the items
+        whose size or CRC changed are extracted again. Each version of the
+        package is read from a :func:`snapshot` of it, as the package can be
+        rewritten while it is read.
+        """
+        if not watch:
+            Package.extract(package_path, extract_dirpath, uri_filter, raw)
+            return
+        with snapshot(package_path) as snapshot_path:
+            manifest = Package.read_manifest(snapshot_path, uri_filter)
+            Package.extract(snapshot_path, extract_dirpath, uri_filter, raw)
+        OpcView.watching(package_path)
+        try:
+            for _ in poll_changes(package_path, interval):
+                with snapshot(package_path) as snapshot_path:
+                    new_manifest = Package.read_manifest(snapshot_path, uri_filter)
+                    item_changes = DiffPresenter.item_changes(manifest, new_manifest)
+                    manifest = new_manifest
+                    if not item_changes:
+                        continue
+                    Package.extract(snapshot_path, extract_dirpath, uri_filter, raw, item_changes)
+                OpcView.updated(extract_dirpath, len(item_changes))
+        except KeyboardInterrupt:
+            return
+
+    def list_items(
+        self,
+        package_path: str,
+        sort_key: str = "uri",
+        reverse: bool = False,
+        as_json: bool = False,
+        uri_filter: Callable[[str], bool] | None = None,
+    ):
+        """
+        Display a listing of the items in the package at *package_path*,
+        sorted on the |ItemEntry| field named by *sort_key*, as JSON when
+        *as_json* is True. For a zip package only the central directory is
+        read; no item is decompressed.
         """
-        package = Package.read(package_path)
-        package.prettify_xml()
-        package.save_to_dir(extract_dirpath)
+        entries = Package.read_entries(package_path, uri_filter)
+        entries.sort(key=attrgetter(sort_key), reverse=reverse)
+        if as_json:
+            OpcView.item_entries_json(entries)
+        else:
+            OpcView.item_entries(entries)
 
-    def repackage(self, package_path: str, new_package_path: str):
+    def repackage(
+        self,
+        package_path: str,
+        new_package_path: str,
+        uri_filter: Callable[[str], bool] | None = None,
+        watch: bool = False,
+        interval: float = 1.0,
+    ):
         """
         Write the contents of the package found at *package_path* to a new
-        zip package at *new_package_path*.
+        zip package at *new_package_path*. When *uri_filter* is provided,
+        only items it selects are read and written. Items are copied in
+        chunks, so the whole package is never held in memory.
+
+        When *watch* is True, the package directory is then polled every
+        *interval* seconds until interrupted, and each time its files change
+        the new package is updated, recompressing only the changed items.
         """
-        package = Package.read(package_path)
-        package.save(new_package_path)
+        Package.repackage(package_path, new_package_path, uri_filter)
+        if not watch:
+            return
+        OpcView.watching(package_path)
+        try:
+            for changed_uris in poll_changes(package_path, interval):
+                if uri_filter is not None:
+                    changed_uris = set(filter(uri_filter, changed_uris))
+                if not changed_uris:
+                    continue
+                Package.repackage(package_path, new_package_path, uri_filter, changed_uris)
+                OpcView.updated(new_package_path, len(changed_uris))
+        except KeyboardInterrupt:
+            return
 
-    def substitute(self, uri_tail: str, src_pkg_path: str, tgt_pkg_path: str, new_pkg_path: str):
+    def substitute(
+        self,
+        item_specs: Sequence[str],
+        src_pkg_path: str,
+        tgt_pkg_path: str,
+        new_pkg_path: str,
+    ):
         """
-        Substitute the package item identified by *uri_tail* from the package
+        Substitute each package item named by *item_specs* from the package
         at *src_pkg_path* into the package at *tgt_pkg_path* and save the
         resulting package at *new_pkg_path*. This can be handy for
         identifying which package item(s) in the source package are causing a
         "repair needed" error when loading the target package in MS Office.
+
+        Each item spec is a URI tail or a glob pattern; see
+        :meth:`Package.find_items`. All items are substituted into the one
+        target package, which is saved once, and only the items the specs
+        could name are loaded from the source package. The two packages are
+        read at the same time.
         """
-        package_1 = Package.read(src_pkg_path)
-        package_2 = Package.read(tgt_pkg_path)
-        pkg_item = package_1.find_item_by_uri_tail(uri_tail)
-        package_2.substitute_item(pkg_item)
+        with ThreadPoolExecutor(2) as executor:
+            future_1 = executor.submit(Package.read, src_pkg_path, item_spec_filter(item_specs))
+            future_2 = executor.submit(Package.read, tgt_pkg_path)
+        package_1, package_2 = future_1.result(), future_2.result()
+        # -- an item named by more than one spec is substituted (and reported) only once --
+        pkg_items = {
+            pkg_item.uri: pkg_item
+            for item_spec in item_specs
+            for pkg_item in package_1.find_items(item_spec)
+        }.values()
+        for pkg_item in pkg_items:
+            package_2.substitute_item(pkg_item)
         package_2.save(new_pkg_path)
-        OpcView.substitute(pkg_item.uri, src_pkg_path, tgt_pkg_path, new_pkg_path)
+        for pkg_item in pkg_items:
+            OpcView.substitute(pkg_item.uri, src_pkg_path, tgt_pkg_path, new_pkg_path)
+
+
+def _check_passes(check_cmd: Sequence[str], pkg_path: str) -> bool:
+    """True when *check_cmd*, run on the package at *pkg_path*, exits with status 0."""
+    completed = subprocess.run(
+        [*check_cmd, pkg_path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    return completed.returncode == 0
+
+
+def _read_packages(
+    package_1_path: str,
+    package_2_path: str,
+    uri_filter: Callable[[str], bool] | None,
+    c14n: C14nOptions | None,
+    lazy: bool = False,
+) -> tuple[Package, Package]:
+    """Read the two packages to be compared, canonicalizing their XML when *c14n* is provided.
+
+    Each package is read, and then canonicalized, on a thread of its own, so one package can be
+    canonicalized while the other is still loading. File reads and inflating release the GIL, as
+    does lxml for much of parsing, so the two overlap rather than take turns. When *lazy* is True
+    the packages are opened with :meth:`Package.open` instead, and the caller closes them. When
+    either package cannot be read, the other is closed before the error is raised.
+    """
+
+    def read(package_path: str) -> Package:
+        package = (Package.open if lazy else Package.read)(package_path, uri_filter)
+        if c14n is not None:
+            try:
+                package.canonicalize_xml(c14n)
+            except BaseException:
+                package.close()
+                raise
+        return package
+
+    with ThreadPoolExecutor(2) as executor:
+        futures = [executor.submit(read, path) for path in (package_1_path, package_2_path)]
+    if any(future.exception() is not None for future in futures):
+        for future in futures:
+            if future.exception() is None:
+                future.result().close()
+    package_1, package_2 = (future.result() for future in futures)
+    return package_1, package_2
@@ -0,0 +1,100 @@
+"""On-disk cache of item diffs, so a pair of item versions seen before is not diffed again."""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+
+# -- change this when the form of a cached diff changes, so older entries are never used --
+_KEY_VERSION = "1"
+
+_DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS diffs (
+    key TEXT PRIMARY KEY,
+    diff TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS diffs_used ON diffs (used);
+"""
+
+# -- next value of the counter recording the order in which entries were last used --
+_NEXT_USE = "(SELECT COALESCE(MAX(used), 0) + 1 FROM diffs)"
+
+
+class DiffCache:
+    """Diffs between pairs of item versions, stored in an SQLite database file at *path*.
+
+    Each diff is stored under a key formed from the content of the two items and the way they
+    were diffed; see :meth:`key`. When the diffs stored exceed *max_bytes* in total, the least
+    recently used are evicted until they fit. One cache file can be shared by any number of
+    processes, and a |DiffCache| object by any number of threads.
+    """
+
+    def __init__(self, path: str, max_bytes: int = _DEFAULT_MAX_BYTES):
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._conn.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc: object):
+        self.close()
+
+    def close(self):
+        """Close the cache file; the cache can no longer be used."""
+        self._conn.close()
+
+    def get(self, key: str) -> str | None:
+        """The diff stored under *key*, or |None| when there is none.
+
+        The entry found becomes the most recently used.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT diff FROM diffs WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE diffs SET used = %s WHERE key = ?" % _NEXT_USE, (key,))
+        return row[0]
+
+    @staticmethod
+    def key(blob_1: bytes, blob_2: bytes, kind: str, options: str = "") -> str:
+        """Cache key for a diff of *blob_1* against *blob_2*.
+
+        *kind* names how the blobs are turned into text, like the name of the presenter class,
+        and *options* is any other setting that changes the diff formed.
+        """
+        digest = hashlib.sha256()
+        for part in (_KEY_VERSION.encode(), kind.encode(), options.encode()):
+            digest.update(part + b"\0")
+        digest.update(hashlib.sha256(blob_1).digest())
+        digest.update(hashlib.sha256(blob_2).digest())
+        return digest.hexdigest()
+
+    def put(self, key: str, diff: str):
+        """Store *diff* under *key*, evicting the least recently used entries to make room.
+
+        A diff larger than the whole cache is not stored.
+        """
+        size = len(diff.encode("utf-8"))
+        if size > self._max_bytes:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO diffs VALUES (?, ?, ?, %s)" % _NEXT_USE, (key, diff, size)
+            )
+            self._conn.execute(
+                "DELETE FROM diffs WHERE key IN ("
+                " SELECT key FROM ("
+                "  SELECT key, SUM(size) OVER (ORDER BY used DESC) AS total FROM diffs"
+                " ) WHERE total > ?"
+                ")",
+                (self._max_bytes,),
+            )
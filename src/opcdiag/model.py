@@ -4,25 +4,148 @@
 
 from __future__ import annotations
 
+import io
 import os
-from typing import Mapping, Protocol
+import re
+from typing import IO, Callable, Collection, Iterable, Iterator, Mapping, NamedTuple, Protocol, cast
 
 from lxml import etree
 
-from opcdiag.phys_pkg import BlobCollection, PhysPkg
+from opcdiag.phys_pkg import BlobCollection, ItemEntry, Manifest, PhysPkg, PkgReader, ReadStats
 
 _CONTENT_TYPES_URI = "[Content_Types].xml"
 
+# -- a declaration C14N prefix-rewriting makes for "no namespace", which must be undone --
+_EMPTY_NS_DECL = re.compile(r' xmlns:n\d+=""')
+
+# -- XML items larger than this many bytes are pretty-printed by streaming, without a tree.
+# -- Streaming takes about 1.6 times as long as the tree, but a tree takes some 40 bytes
+# -- of memory per byte of XML, so it is kept for parts too big to parse into a tree with
+# -- memory to spare --
+_STREAMING_THRESHOLD = 64 * 1024 * 1024
+
+# -- elements at this depth (the root is at depth 1) are pretty-printed whole when streaming --
+_SUBTREE_DEPTH = 3
+
+_XML_NS = "http://www.w3.org/XML/1998/namespace"
+
+# -- prefix a default namespace is bound to in an XPath expression, as in `xmlstarlet` --
+_XPATH_DEFAULT_PREFIX = "_"
+
+# -- an XPath location path made only of child and descendant steps naming an element --
+_SIMPLE_XPATH = re.compile(r"(?://?(?:[A-Za-z_][\w.-]*:)?[A-Za-z_][\w.-]*)+")
+
+# -- the character escapes lxml applies when serializing text --
+_TEXT_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", "\r": "&#13;"})
+
 # ================================================================================================
 # DOMAIN MODEL
 # ================================================================================================
 
 
+def is_binary_uri(uri: str) -> bool:
+    """True if the item at *uri* does not contain XML.
+
+    That is, it is neither the content-types item, a rels item, nor an XML part. Like the
+    corresponding |PkgItem| properties, this depends only on the URI, so it can be decided before
+    the item is loaded.
+    """
+    return not (uri == _CONTENT_TYPES_URI or uri.endswith(".rels") or uri.endswith(".xml"))
+
+
+def item_spec_filter(item_specs: Iterable[str]) -> Callable[[str], bool]:
+    """A URI filter selecting each item that any of *item_specs* could name.
+
+    An item spec is a glob pattern, as for |UriFilter|, when it contains `*` or `?`, and otherwise
+    the tail of a pack URI. The filter lets a package be read with only the items that
+    :meth:`Package.find_items` might return for those specs, so no other item is decompressed.
+    """
+    item_specs = list(item_specs)
+    uri_tails = tuple(spec for spec in item_specs if not _is_uri_pattern(spec))
+    patterns = [spec for spec in item_specs if _is_uri_pattern(spec)]
+    uri_filter = UriFilter(patterns) if patterns else None
+    return lambda uri: uri.endswith(uri_tails) or (uri_filter is not None and uri_filter(uri))
+
+
+def iter_pretty_xml(source: IO[bytes]) -> Iterator[str]:
+    """Generate an indented, human-readable copy of the XML document in *source*, in pieces.
+
+    The output is the same as that of :meth:`PkgItem.prettify_xml`, but the document is read with
+    `iterparse()` and written as it goes. The top levels of the document are written one node at
+    a time; each element below them, like a `<row>` or `<w:p>`, is written whole once complete.
+    Every element is discarded once written, so memory use is bounded by the size of the largest
+    such element rather than that of the document, and the start of the output is available long
+    before the end of the document is read.
+
+    That costs time: each node gets an event handled in Python, so this takes about 1.6 times
+    as long as pretty-printing a parsed tree, in a small fraction of the memory.
+    """
+    writer = _PrettyXmlWriter()
+    events = ("start-ns", "start", "end", "comment", "pi")
+    depth = 0
+    # -- nearly all events are those of elements inside a subtree, so the tests are ordered to
+    # -- dismiss those first, with as little work as possible
+    for event, node in etree.iterparse(source, events=events, huge_tree=True):
+        if event == "start":
+            depth += 1
+            if depth < _SUBTREE_DEPTH:
+                writer.start(cast(etree._Element, node))
+        elif event == "end":
+            if depth == _SUBTREE_DEPTH:
+                writer.subtree(cast(etree._Element, node))
+                if writer.is_full:
+                    yield writer.take()
+            elif depth < _SUBTREE_DEPTH:
+                writer.end(cast(etree._Element, node))
+            depth -= 1
+        elif depth >= _SUBTREE_DEPTH:
+            continue
+        elif event == "start-ns":
+            writer.declare(*cast("tuple[str, str]", node))
+        else:
+            writer.leaf(cast(etree._Element, node))
+    writer.close()
+    yield writer.take()
+
+
+def start_tag_parts(element: etree._Element) -> tuple[str, list[str], list[str]]:
+    """The tag, namespace declarations and attributes of the start-tag of *element*.
+
+    The tag and each attribute name are prefixed as in the source document, `xml:` included. A
+    declaration is given for each namespace in scope on *element*, so these suit a root element.
+    Declarations and attributes are `name="value"` strings in document order, the value escaped.
+    """
+    nsdecls = [_nsdecl(prefix, uri) for prefix, uri in element.nsmap.items()]
+    return _tag(element), nsdecls, _attr_strs(element)
+
+
+def write_pretty_xml(source: IO[bytes], dest: IO[bytes]):
+    """Write an indented, human-readable copy of the XML document in *source* to *dest*.
+
+    The document is streamed through :func:`iter_pretty_xml`, so it is never held as a tree.
+    """
+    for text in iter_pretty_xml(source):
+        dest.write(text.encode("utf-8"))
+
+
+class C14nOptions(NamedTuple):
+    """Options for canonicalizing the XML of a package with C14N 2.0.
+
+    *rewrite_prefixes* renames every namespace prefix to `n0`, `n1`, and so on, in order of first
+    use, so a change of prefix alone is not a difference. *strip_text* strips leading and trailing
+    whitespace from text content.
+    """
+
+    rewrite_prefixes: bool = False
+    strip_text: bool = False
+
+
 class PkgItemT(Protocol):
     @property
     def blob(self) -> bytes: ...
     @blob.setter
     def blob(self, value: bytes) -> None: ...
+    def canonicalize_xml(self, options: C14nOptions) -> None: ...
     @property
     def element(self) -> etree._Element: ...
     @property
@@ -31,34 +154,215 @@ class PkgItemT(Protocol):
     def is_rels_item(self) -> bool: ...
     @property
     def is_xml_part(self) -> bool: ...
+    def iter_pretty_xml(self) -> Iterator[str]: ...
     @property
     def path(self) -> str: ...
     def prettify_xml(self) -> None: ...
     @property
+    def pretty_xml(self) -> bytes: ...
+    @property
+    def root_element(self) -> etree._Element: ...
+    def select(self, xpath: str) -> Iterator[str]: ...
+    @property
     def uri(self) -> str: ...
 
 
 # ================================================================================================
 
 
+class UriFilter:
+    """Predicate that selects package items by pack URI using include and exclude glob patterns.
+
+    A URI is selected when it matches any include pattern, or there are none, and matches no
+    exclude pattern. An include pattern prefixed with `!`, like `!**/media/*`, is treated as an
+    exclude pattern. `*` and `?` do not match across a `/` while `**` matches any number of
+    whole segments. A leading `/` on a pattern is ignored, so `/word/*.xml` works too.
+    """
+
+    def __init__(self, include: Iterable[str] = (), exclude: Iterable[str] = ()):
+        include = list(include)
+        self._include = self._compile([ptn for ptn in include if not ptn.startswith("!")])
+        self._exclude = self._compile(
+            [ptn[1:] for ptn in include if ptn.startswith("!")] + list(exclude)
+        )
+
+    def __call__(self, uri: str) -> bool:
+        """True if the item having *uri* is selected by this filter."""
+        if self._include is not None and self._include.fullmatch(uri) is None:
+            return False
+        return self._exclude is None or self._exclude.fullmatch(uri) is None
+
+    @staticmethod
+    def _compile(patterns: list[str]) -> re.Pattern[str] | None:
+        """A single compiled regex matching any of glob *patterns*, or |None| if there are none."""
+        if not patterns:
+            return None
+        return re.compile("|".join("(?:%s)" % UriFilter._translate(ptn) for ptn in patterns))
+
+    @staticmethod
+    def _translate(pattern: str) -> str:
+        """Return regular-expression source equivalent to glob *pattern*."""
+        wildcards = {"**/": "(?:.*/)?", "**": ".*", "*": "[^/]*", "?": "[^/]"}
+        tokens = re.split(r"(\*\*/|\*\*|\*|\?)", pattern.lstrip("/"))
+        return "".join(wildcards.get(token) or re.escape(token) for token in tokens)
+
+
 class Package:
-    """Root of package graph and main model API class."""
+    """Root of package graph and main model API class.
+
+    A package from :meth:`open` holds its file open until :meth:`close` is called, and is a
+    context manager that closes it on exit. A package from :meth:`read` holds nothing open.
+    """
 
-    def __init__(self, pkg_items: Mapping[str, PkgItemT]):
+    def __init__(self, pkg_items: Mapping[str, PkgItemT], reader: PkgReader | None = None):
         super(Package, self).__init__()
         self._pkg_items = pkg_items
+        self._reader = reader
+        self._sorted_uris: list[str] | None = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc: object):
+        self.close()
+
+    @staticmethod
+    def open(path: str, uri_filter: Callable[[str], bool] | None = None) -> Package:
+        """Return a |Package| that loads each of its items from *path* when it is first needed.
+
+        The package file is opened once and held open until the package is closed, so it can be
+        queried any number of times without being reopened, and an item that is never used is
+        never decompressed. *path* and *uri_filter* are as for :meth:`read`.
+        """
+        reader = PkgReader.open(path, uri_filter)
+        return Package({uri: _LazyPkgItem(reader, uri) for uri in reader.uris}, reader)
 
     @staticmethod
-    def read(path: str) -> Package:
+    def read(path: str, uri_filter: Callable[[str], bool] | None = None) -> Package:
         """Factory method to construct a new |Package| instance from package at *path*.
 
         The package can be either a zip archive (e.g. .docx file) or a directory containing an
-        extracted package.
+        extracted package. When *uri_filter* is provided, the package contains only those items
+        for which it returns True.
         """
-        phys_pkg = PhysPkg.read(path)
+        phys_pkg = PhysPkg.read(path, uri_filter)
         pkg_items = {uri: PkgItem(phys_pkg.root_uri, uri, blob) for uri, blob in phys_pkg}
         return Package(pkg_items)
 
+    @staticmethod
+    def repackage(
+        path: str,
+        new_path: str,
+        uri_filter: Callable[[str], bool] | None = None,
+        changed_uris: Collection[str] | None = None,
+    ):
+        """Write the items of the package at *path* to a new zip package at *new_path*.
+
+        Items are copied as-is, a chunk at a time, without being loaded as |PkgItem| objects, so
+        memory use does not grow with the size of the package. *path* and *uri_filter* are as for
+        :meth:`read`. When *changed_uris* is provided and a zip from an earlier repackage is at
+        *new_path*, it is updated instead: only the items in *changed_uris* are recompressed.
+        """
+        if changed_uris is None or not os.path.isfile(new_path):
+            PhysPkg.copy_to_zip(path, new_path, uri_filter)
+            return
+        PhysPkg.update_zip(path, new_path, changed_uris, uri_filter)
+
+    @staticmethod
+    def read_manifest(path: str, uri_filter: Callable[[str], bool] | None = None) -> Manifest:
+        """Return the |Manifest| of the package at *path* without loading any of its items.
+
+        Each item's size and CRC come from the zip central directory when *path* is a zip
+        archive, so no member is decompressed. When *uri_filter* is provided, the manifest
+        includes only those items for which it returns True.
+        """
+        return PhysPkg.read_manifest(path, uri_filter)
+
+    @staticmethod
+    def read_entries(path: str, uri_filter: Callable[[str], bool] | None = None) -> list[ItemEntry]:
+        """Return an |ItemEntry| for each item of the package at *path*, without loading any.
+
+        For a zip archive only the central directory is read. When *uri_filter* is provided,
+        only those items for which it returns True are listed.
+        """
+        return PhysPkg.read_entries(path, uri_filter)
+
+    @staticmethod
+    def splice(base_path: str, donor_path: str, uris: Iterable[str], new_path: str):
+        """Write a new zip package at *new_path* with the *uris* items of *donor_path* swapped in.
+
+        The result is the package at *base_path* with each item named in *uris* replaced by its
+        counterpart in the package at *donor_path*, or dropped when the donor has none. Both
+        packages must be zip archives; members are copied still compressed.
+        """
+        PhysPkg.splice_zips(base_path, donor_path, uris, new_path)
+
+    def canonicalize_xml(self, options: C14nOptions):
+        """Replace the XML of each XML part in this package with its C14N 2.0 canonical form.
+
+        Canonical XML is free of differences that do not change its meaning, like the order of
+        attributes, so a diff of canonical parts shows only meaningful changes. The content-types
+        and rels items are left as-is; their presenters normalize them already.
+        """
+        for pkg_item in self._pkg_items.values():
+            pkg_item.canonicalize_xml(options)
+
+    def close(self):
+        """Close the package file held open by a package from :meth:`open`.
+
+        Items already loaded remain available; loading any other item afterward raises
+        |ValueError|. Does nothing for a package from :meth:`read`.
+        """
+        if self._reader is not None:
+            self._reader.close()
+
+    @staticmethod
+    def extract(
+        path: str,
+        dirpath: str,
+        uri_filter: Callable[[str], bool] | None = None,
+        raw: bool = False,
+        item_changes: Iterable[tuple[str, str]] | None = None,
+    ):
+        """Extract the items of the package at *path* to files in a directory at *dirpath*.
+
+        Each XML item is pretty-printed unless *raw* is True, streamed from the package through
+        :func:`write_pretty_xml` into its file one item at a time. Every other item, and every
+        item when *raw* is True, is copied from the package to its file a chunk at a time. No item
+        is loaded whole. Any directory at *dirpath* is deleted first. *path* and *uri_filter* are as
+        for :meth:`read`.
+
+        When *item_changes* is provided, the directory holds an earlier extract and is updated
+        instead, from (status, uri) 2-tuples like those of :meth:`DiffPresenter.item_changes`:
+        the file of each deleted item is removed and only added and modified items are extracted.
+        """
+        changed_uris: set[str] | None = None
+        if item_changes is not None:
+            item_changes = list(item_changes)
+            PhysPkg.remove_from_dir(dirpath, [uri for st, uri in item_changes if st == "D"])
+            changed_uris = {uri for status, uri in item_changes if status != "D"}
+
+        def is_selected(uri: str) -> bool:
+            return (uri_filter is None or uri_filter(uri)) and (
+                changed_uris is None or uri in changed_uris
+            )
+
+        PhysPkg.copy_to_dir(
+            path,
+            dirpath,
+            lambda uri: is_selected(uri) and (raw or is_binary_uri(uri)),
+            clear=changed_uris is None,
+        )
+        if raw:
+            return
+        PhysPkg.copy_to_dir(
+            path,
+            dirpath,
+            lambda uri: is_selected(uri) and not is_binary_uri(uri),
+            clear=False,
+            write_item=write_pretty_xml,
+        )
+
     def find_item_by_uri_tail(self, uri_tail: str) -> PkgItemT:
         """
         Return the first item in this package having a uri that ends with
@@ -69,6 +373,21 @@ class Package:
                 return self._pkg_items[uri]
         raise KeyError("No item with name '%s'" % uri_tail)
 
+    def find_items(self, item_spec: str) -> list[PkgItemT]:
+        """The items of this package named by *item_spec*, in URI order.
+
+        A spec containing `*` or `?` is a glob pattern, as for |UriFilter|, and names every item
+        whose URI it matches. Any other spec is a URI tail and names the one item
+        :meth:`find_item_by_uri_tail` finds. Raises |KeyError| if *item_spec* names no item.
+        """
+        if not _is_uri_pattern(item_spec):
+            return [self.find_item_by_uri_tail(item_spec)]
+        uri_filter = UriFilter([item_spec])
+        pkg_items = [self._pkg_items[uri] for uri in self._uris if uri_filter(uri)]
+        if not pkg_items:
+            raise KeyError("No item matching '%s'" % item_spec)
+        return pkg_items
+
     def prettify_xml(self):
         """Reformat package XML content to human-readable format.
 
@@ -100,6 +419,14 @@ class Package:
         """
         PhysPkg.write_to_dir(self._blobs, dirpath)
 
+    @property
+    def stats(self) -> ReadStats:
+        """|ReadStats| of the items this package has loaded from its file since it was opened.
+
+        All zero for a package from :meth:`read`, which loads its items before it is constructed.
+        """
+        return ReadStats(0, 0) if self._reader is None else self._reader.stats
+
     def substitute_item(self, src_pkg_item: PkgItemT):
         """Replace corresponding pkg-item in this package with `src_pkg_item`.
 
@@ -132,16 +459,23 @@ class Package:
         return blobs
 
     @property
-    def _uris(self):
+    def _uris(self) -> list[str]:
         """
-        Return sorted list of item URIs in this package.
+        Return sorted list of item URIs in this package. The list is formed
+        on first use; the items in a package do not change once it is
+        constructed.
         """
-        return sorted(self._pkg_items.keys())
+        if self._sorted_uris is None:
+            self._sorted_uris = sorted(self._pkg_items.keys())
+        return self._sorted_uris
 
 
 class PkgItem:
     """Individual item (file, roughly) within an OPC package."""
 
+    # -- a package can have a great many items, so none carries an instance dict --
+    __slots__ = ("_blob", "_root_uri", "_uri")
+
     def __init__(self, root_uri: str, uri: str, blob: bytes):
         self._blob = blob
         self._root_uri = root_uri
@@ -159,6 +493,28 @@ class PkgItem:
     def blob(self, value: bytes):
         self._blob = value
 
+    def canonicalize_xml(self, options: C14nOptions) -> None:
+        """Replace the XML in this item with its C14N 2.0 canonical form, as set by *options*.
+
+        Comments are dropped. The XML is canonicalized by lxml's streaming C14N 2.0 writer, so no
+        tree of it is built, unless prefixes are rewritten in a document having names in no
+        namespace; see :func:`_unprefix_no_namespace_names`. Does nothing if this package item is
+        not an XML part.
+        """
+        if not self.is_xml_part:
+            return
+        out = io.StringIO()
+        etree.canonicalize(
+            from_file=io.BytesIO(self._blob),
+            out=out,
+            rewrite_prefixes=options.rewrite_prefixes,
+            strip_text=options.strip_text,
+        )
+        xml = out.getvalue()
+        if options.rewrite_prefixes:
+            xml = _unprefix_no_namespace_names(xml)
+        self._blob = xml.encode("utf-8")
+
     @property
     def element(self) -> etree._Element:
         """Return an lxml.etree Element obtained by parsing the XML in this item's blob."""
@@ -183,6 +539,17 @@ class PkgItem:
         """True if the URI of this item ends with '.xml', except if it is the content types item."""
         return self._uri.endswith(".xml") and not self.is_content_types
 
+    def iter_pretty_xml(self) -> Iterator[str]:
+        """Generate the text of :attr:`pretty_xml` in pieces, as it is produced.
+
+        An item larger than 64 MiB is streamed, so its first piece is available long before its
+        XML is all read and memory use stays bounded, at the cost of taking longer overall; see
+        :func:`iter_pretty_xml`.
+        """
+        if len(self._blob) <= _STREAMING_THRESHOLD:
+            return iter((self.pretty_xml.decode("utf-8"),))
+        return iter_pretty_xml(io.BytesIO(self._blob))
+
     @property
     def path(self) -> str:
         """Path of this item as though it were extracted into a directory at its package path."""
@@ -195,11 +562,367 @@ class PkgItem:
         Does nothing if this package item does not contain XML.
         """
         if self.is_content_types or self.is_xml_part or self.is_rels_item:
-            self._blob = etree.tostring(
+            self._blob = self.pretty_xml
+
+    @property
+    def pretty_xml(self) -> bytes:
+        """Indented, human-readable form of the XML in this package item, as UTF-8 bytes.
+
+        An item larger than 64 MiB is streamed through :func:`write_pretty_xml` rather than parsed
+        into a tree, with the same result, but the result is still held whole.
+        """
+        if len(self._blob) <= _STREAMING_THRESHOLD:
+            return etree.tostring(
                 self.element, encoding="UTF-8", standalone=True, pretty_print=True
             )
+        pretty_xml = io.BytesIO()
+        write_pretty_xml(io.BytesIO(self._blob), pretty_xml)
+        return pretty_xml.getvalue()
+
+    @property
+    def root_element(self) -> etree._Element:
+        """The root element of the XML in this item, without parsing the rest of the document."""
+        _, root = next(etree.iterparse(io.BytesIO(self._blob), events=("start",)))
+        return root
+
+    def select(self, xpath: str) -> Iterator[str]:
+        """Generate the indented XML or the text of each node selected by XPath *xpath*.
+
+        The namespace prefixes declared on the root element can be used in *xpath*, with a
+        default namespace bound to the prefix `_`, as in `//_:row`. A simple location path, made
+        only of `/` and `//` steps naming elements, like `/w:document/w:body//w:tbl`, is matched
+        while the XML is read by `iterparse()`, so the document is never held as a whole tree.
+        Any other expression is evaluated on the parsed document. Either way, an `XPathError`,
+        like that for an undefined prefix, is raised by this call rather than by the generator.
+        """
+        if _SIMPLE_XPATH.fullmatch(xpath):
+            namespaces = _xpath_namespaces(self.root_element.nsmap)
+            pattern, tag = _compile_simple_path(xpath, namespaces)
+            elements = _iter_path_matches(io.BytesIO(self._blob), pattern, tag)
+            return (_fragment_xml(element) for element in elements)
+        root = etree.fromstring(self._blob)
+        result = root.xpath(xpath, namespaces=_xpath_namespaces(root.nsmap))
+        results = cast("list[object]", result if isinstance(result, list) else [result])
+        return (_xpath_result_text(node) for node in results)
 
     @property
     def uri(self) -> str:
         """The pack URI of this package item, e.g. `'/word/document.xml'`."""
         return self._uri  # pragma: no cover
+
+
+class _LazyPkgItem(PkgItem):
+    """|PkgItem| whose blob is read through an open |PkgReader| the first time it is used."""
+
+    __slots__ = ("_reader",)
+
+    def __init__(self, reader: PkgReader, uri: str):
+        # -- the `_blob` slot is left empty until the blob is first used; see __getattr__() --
+        self._reader = reader
+        self._root_uri = reader.root_uri
+        self._uri = uri
+
+    def __getattr__(self, name: str) -> bytes:
+        """Read the blob into its slot when `_blob` is used before it is filled."""
+        if name != "_blob":
+            raise AttributeError(name)
+        self._blob = self._reader.read(self._uri)
+        return self._blob
+
+
+class _PrettyXmlWriter:
+    """Serializes the node events of an XML document as indented XML, buffering the output.
+
+    Indentation follows the same rules as `etree.indent()`: the whitespace-only text or tail of a
+    node in element content is replaced, while other text is left as-is. An element is held back
+    until its first child or its end is seen, so the writer knows whether it is a leaf.
+    """
+
+    def __init__(self):
+        self._chunks: list[str] = ["<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"]
+        self._nsdecls: list[str] = []
+        self._pending: tuple[etree._Element, list[str]] | None = None
+        self._last: etree._Element | None = None
+        self._depth = 0
+
+    def close(self):
+        """Write the final newline."""
+        self._chunks.append("\n")
+
+    def declare(self, prefix: str, uri: str):
+        """Record a namespace declaration for the element about to start."""
+        self._nsdecls.append(_nsdecl(prefix, uri))
+
+    def end(self, element: etree._Element):
+        """Write the end of *element*, or all of it when it turned out to have no children."""
+        if self._pending is not None and self._pending[0] is element:
+            start_tag = _start_tag(*self._pending)
+            self._pending = None
+            if element.text:
+                text = element.text.translate(_TEXT_ESCAPES)
+                self._chunks.append("<%s>%s</%s>" % (start_tag, text, _tag(element)))
+            else:
+                self._chunks.append("<%s/>" % start_tag)
+        else:
+            self._depth -= 1
+            self._write_tail()
+            self._chunks.append("</%s>" % _tag(element))
+        self._last = element
+
+    @property
+    def is_full(self) -> bool:
+        """True when enough output is buffered that it should be taken."""
+        return len(self._chunks) > 4096
+
+    def leaf(self, node: etree._Element):
+        """Write *node*, a comment or processing instruction.
+
+        Like serializing the root element, one outside the root element is left out.
+        """
+        if not (self._depth or self._pending is not None):
+            return
+        self._write_preceding()
+        self._chunks.append(etree.tostring(node, encoding="unicode", with_tail=False))
+        self._last = node
+
+    def start(self, element: etree._Element):
+        """Note the start of *element*, writing whatever precedes it."""
+        if self._depth or self._pending is not None:
+            self._write_preceding()
+        self._pending = (element, self._nsdecls)
+        self._nsdecls = []
+
+    def subtree(self, element: etree._Element):
+        """Write *element* and all its descendants, then discard the descendants."""
+        self.start(element)
+        element, nsdecls = cast("tuple[etree._Element, list[str]]", self._pending)
+        self._pending = None
+        self._chunks.append(_subtree_xml(element, nsdecls, self._depth))
+        element.clear(keep_tail=True)
+        self._last = element
+
+    def take(self) -> str:
+        """Remove and return the output buffered so far."""
+        text = "".join(self._chunks)
+        self._chunks = []
+        return text
+
+    @staticmethod
+    def _is_blank(text: str | None) -> bool:
+        """True if *text* is |None| or contains only XML whitespace."""
+        return not text or not text.strip(" \t\n\r")
+
+    def _write_preceding(self):
+        """Write what precedes a new child node: the open parent's start-tag or a sibling's tail.
+
+        The whitespace is indentation at the depth of the new child unless it holds other text.
+        """
+        if self._pending is not None:
+            element, nsdecls = self._pending
+            self._pending = None
+            self._chunks.append("<%s>" % _start_tag(element, nsdecls))
+            self._depth += 1
+            text = element.text
+            if self._is_blank(text):
+                self._chunks.append("\n%s" % ("  " * self._depth))
+            else:
+                self._chunks.append(cast(str, text).translate(_TEXT_ESCAPES))
+        else:
+            self._write_tail()
+
+    def _write_tail(self):
+        """Write the tail of the last node written, indented to the current depth when blank.
+
+        The node is then removed from its parent, so finished content does not accumulate.
+        """
+        last = cast(etree._Element, self._last)
+        if self._is_blank(last.tail):
+            self._chunks.append("\n%s" % ("  " * self._depth))
+        else:
+            self._chunks.append(cast(str, last.tail).translate(_TEXT_ESCAPES))
+        parent = last.getparent()
+        if parent is not None:
+            parent.remove(last)
+
+
+def _attr_strs(element: etree._Element) -> list[str]:
+    """List of `name="value"` strings for the attributes of *element*, in document order."""
+    return [
+        '%s="%s"' % (_attr_name(element, name), _escape_attr(value))
+        for name, value in element.attrib.items()
+    ]
+
+
+def _attr_name(element: etree._Element, clark_name: str) -> str:
+    """Prefixed form of attribute name *clark_name* in the scope of *element*."""
+    if not clark_name.startswith("{"):
+        return clark_name
+    nsuri, localname = clark_name[1:].split("}", 1)
+    if nsuri == _XML_NS:
+        return "xml:%s" % localname
+    prefix = next(pfx for pfx, uri in element.nsmap.items() if pfx and uri == nsuri)
+    return "%s:%s" % (prefix, localname)
+
+
+def _escape_attr(value: str) -> str:
+    """*value* with the same character escapes lxml applies when serializing an attribute value.
+
+    A chain of `str.replace()` calls is several times faster than `str.translate()` with a table
+    of multi-character replacements.
+    """
+    return (
+        value.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace(">", "&gt;")
+        .replace('"', "&quot;")
+        .replace("\n", "&#10;")
+        .replace("\r", "&#13;")
+        .replace("\t", "&#9;")
+    )
+
+
+def _fragment_xml(element: etree._Element) -> str:
+    """Indented XML for *element* and its descendants, as though it were the root element.
+
+    Only the namespace declarations made on *element* itself appear on its start-tag, not all
+    those in scope from its ancestors, so a fragment reads as it does in the whole document.
+    """
+    parent = element.getparent()
+    inherited = {} if parent is None else parent.nsmap
+    nsdecls = [
+        _nsdecl(prefix, uri)
+        for prefix, uri in element.nsmap.items()
+        if prefix not in inherited or inherited[prefix] != uri
+    ]
+    return _subtree_xml(element, nsdecls, 0)
+
+
+def _is_uri_pattern(item_spec: str) -> bool:
+    """True if *item_spec* is a glob pattern rather than the tail of a pack URI."""
+    return "*" in item_spec or "?" in item_spec
+
+
+def _iter_path_matches(
+    source: IO[bytes], pattern: re.Pattern[str], tag: str
+) -> Iterator[etree._Element]:
+    """Generate each element of the XML document in *source* selected by a simple path.
+
+    *pattern* and *tag* are those :func:`_compile_simple_path` returns for the path. Elements are
+    generated complete and in document order, including one nested in another match. Each element
+    outside a match is discarded once ended, so memory use is bounded by the size of the largest
+    match rather than that of the document.
+    """
+    paths = [""]  # -- newline-separated tags of each open element and its ancestors --
+    matched: list[bool] = []
+    open_matches = 0
+    for event, element in etree.iterparse(source, events=("start", "end"), huge_tree=True):
+        if event == "start":
+            paths.append("%s\n%s" % (paths[-1], element.tag))
+            matched.append(pattern.fullmatch(paths[-1]) is not None)
+            open_matches += matched[-1]
+            continue
+        path = paths.pop()
+        if matched.pop():
+            open_matches -= 1
+            if not open_matches:
+                yield element
+                for descendant in element.iterdescendants(tag):
+                    ancestors = list(descendant.iterancestors())
+                    ancestors = ancestors[: ancestors.index(element)]
+                    subpath = "".join("\n%s" % a.tag for a in reversed(ancestors))
+                    if pattern.fullmatch("%s%s\n%s" % (path, subpath, tag)):
+                        yield descendant
+        if open_matches:
+            continue
+        element.clear(keep_tail=True)
+        while element.getprevious() is not None:
+            del cast(etree._Element, element.getparent())[0]
+
+
+def _compile_simple_path(xpath: str, namespaces: dict[str, str]) -> tuple[re.Pattern[str], str]:
+    """Return a regex matching the newline-separated tag path of elements selected by *xpath*.
+
+    The tag of the elements selected, from the last step of *xpath*, is returned with it.
+    """
+    parts: list[str] = []
+    tag = ""
+    for axis, name in re.findall(r"(//?)([^/]+)", xpath):
+        prefix, _, localname = name.rpartition(":")
+        if prefix and prefix not in namespaces:
+            raise etree.XPathEvalError("Undefined namespace prefix '%s'" % prefix)
+        tag = "{%s}%s" % (namespaces[prefix], localname) if prefix else localname
+        parts.append("%s%s" % ("\n" if axis == "/" else "(?:\n[^\n]*)*\n", re.escape(tag)))
+    return re.compile("".join(parts)), tag
+
+
+def _nsdecl(prefix: str | None, uri: str) -> str:
+    """Namespace declaration attribute binding *prefix* to *uri*, like `xmlns:w="..."`."""
+    name = "xmlns:%s" % prefix if prefix else "xmlns"
+    return '%s="%s"' % (name, _escape_attr(uri))
+
+
+def _start_tag(element: etree._Element, nsdecls: list[str]) -> str:
+    """Content of the start-tag of *element*, without the enclosing `<` and `>`."""
+    if not (nsdecls or element.attrib):
+        return _tag(element)
+    return " ".join([_tag(element)] + nsdecls + _attr_strs(element))
+
+
+def _subtree_xml(element: etree._Element, nsdecls: list[str], level: int) -> str:
+    """Indented XML for *element* and its descendants, starting at indentation *level*.
+
+    *nsdecls* are the namespace declarations to place on its start-tag.
+    """
+    etree.indent(element, level=level)
+    # -- replace the start-tag lxml forms, which redeclares the namespaces in scope --
+    xml = etree.tostring(element, encoding="unicode", with_tail=False)
+    end = xml.index(">")
+    close = "/>" if xml[end - 1] == "/" else ">%s" % xml[end + 1 :]
+    return "<%s%s" % (_start_tag(element, nsdecls), close)
+
+
+def _unprefix_no_namespace_names(xml: str) -> str:
+    """Remove the prefix C14N prefix-rewriting wrongly binds to "no namespace" in *xml*.
+
+    lxml's C14N 2.0 writer, like that of `xml.etree`, declares a prefix like `n1` for the empty
+    namespace URI when rewriting prefixes, as `xmlns:n1=""`, which is not well-formed XML. Such
+    a document is parsed with recovery, which drops the declarations and leaves each name having
+    that prefix as a plain name containing a colon. Those names are stripped of the prefix on
+    the tree, which is then canonicalized again as-is, so text and attribute values are never
+    touched.
+    """
+    if _EMPTY_NS_DECL.search(xml) is None:
+        return xml
+    root = etree.fromstring(xml, etree.XMLParser(recover=True, huge_tree=True))
+    for element in root.iter(etree.Element):
+        tag = cast(str, element.tag)
+        if ":" in tag and not tag.startswith("{"):
+            element.tag = tag.partition(":")[2]
+    return etree.canonicalize(root)
+
+
+def _xpath_namespaces(nsmap: Mapping[str | None, str]) -> dict[str, str]:
+    """Prefix-to-URI mapping for an XPath expression, from an element's *nsmap*."""
+    return {prefix or _XPATH_DEFAULT_PREFIX: uri for prefix, uri in nsmap.items()}
+
+
+def _xpath_result_text(result: object) -> str:
+    """Text form of *result*, a node or value produced by evaluating an XPath expression.
+
+    An element is written as indented XML and a number like XPath's `string()` would.
+    """
+    if isinstance(result, etree._Element):
+        if isinstance(result.tag, str):
+            return _fragment_xml(result)
+        return etree.tostring(result, encoding="unicode", with_tail=False)
+    if isinstance(result, bool):
+        return "true" if result else "false"
+    if isinstance(result, float) and result.is_integer():
+        return "%d" % result
+    return str(result)
+
+
+def _tag(element: etree._Element) -> str:
+    """Prefixed tag name of *element*, as it appears in the source document."""
+    localname = cast(str, element.tag).rpartition("}")[2]
+    return "%s:%s" % (element.prefix, localname) if element.prefix else localname
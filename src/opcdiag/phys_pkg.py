@@ -1,11 +1,42 @@
 """Interface to a physical OPC package, either a zip archive or directory."""
 
+# pyright: reportPrivateUsage=false
+
 from __future__ import annotations
 
+import abc
+import bisect
+import contextlib
+import functools
+import mmap
 import os
 import shutil
-from typing import Iterator
-from zipfile import ZIP_DEFLATED, ZipFile
+import struct
+import threading
+import time
+import zlib
+from array import array
+from typing import (
+    IO,
+    Callable,
+    Collection,
+    ContextManager,
+    Generator,
+    Iterable,
+    Iterator,
+    Mapping,
+    NamedTuple,
+    cast,
+)
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile, ZipInfo
+
+_CHUNK_SIZE = 1024 * 1024
+
+# -- general-purpose flag bit set when sizes and CRC follow the data instead of the header --
+_DATA_DESCRIPTOR_FLAG = 0x08
+# -- a local file header is 30 bytes, ending in the filename and extra field lengths --
+_LOCAL_HEADER = struct.Struct("<4s22xHH")
+_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
 
 
 class BlobCollection(dict[str, bytes]):
@@ -16,6 +47,101 @@ class BlobCollection(dict[str, bytes]):
     """
 
 
+class FileStat(NamedTuple):
+    """Size and modification time of a file, enough to tell when it has been changed."""
+
+    size: int
+    mtime_ns: int
+
+
+class ItemInfo(NamedTuple):
+    """Uncompressed size and CRC-32 of a single package item."""
+
+    size: int
+    crc: int
+
+
+class ItemEntry(NamedTuple):
+    """Listing of a single package item, as recorded in a zip central directory."""
+
+    uri: str
+    size: int
+    compressed_size: int
+    method: int
+    crc: int
+    date_time: tuple[int, int, int, int, int, int]
+
+
+class Manifest(Mapping[str, ItemInfo]):
+    """Maps the URI of each item in a package to its |ItemInfo|.
+
+    For a zip package this is read from the central directory, without decompressing any member.
+    Items are held as a sorted list of URIs with parallel arrays of sizes and CRCs rather than as a
+    dict of tuples, so a package of very many small items costs little more than its URIs. Items
+    are iterated in URI order and looked up by bisection.
+    """
+
+    def __init__(
+        self,
+        items: Mapping[str, ItemInfo] | Iterable[tuple[str, ItemInfo]] = (),
+        root_uri: str = "",
+    ):
+        super(Manifest, self).__init__()
+        # -- a later duplicate of a URI replaces an earlier one, as it would in a dict --
+        item_infos = sorted(dict(items).items())
+        self._uris = [uri for uri, _ in item_infos]
+        self._sizes = array("q", (size for _, (size, _) in item_infos))
+        self._crcs = array("L", (crc for _, (_, crc) in item_infos))
+        self.root_uri = root_uri
+
+    def __contains__(self, uri: object) -> bool:
+        return isinstance(uri, str) and self._index(uri) is not None
+
+    def __getitem__(self, uri: str) -> ItemInfo:
+        idx = self._index(uri)
+        if idx is None:
+            raise KeyError(uri)
+        return ItemInfo(self._sizes[idx], self._crcs[idx])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._uris)
+
+    def __len__(self) -> int:
+        return len(self._uris)
+
+    def __repr__(self) -> str:
+        return "Manifest(%r, root_uri=%r)" % (dict(self.items()), self.root_uri)
+
+    def path(self, uri: str) -> str:
+        """Path of item at *uri* as though it were extracted into a directory at *root_uri*."""
+        return os.path.join(self.root_uri, os.path.normpath(uri))
+
+    def _index(self, uri: str) -> int | None:
+        """Index of *uri* in the parallel arrays, or |None| when this manifest has no such item."""
+        idx = bisect.bisect_left(self._uris, uri)
+        return idx if idx < len(self._uris) and self._uris[idx] == uri else None
+
+
+class ReadStats(NamedTuple):
+    """Counts of the work done by a |PkgReader| since it was opened.
+
+    *items_read* counts each item read, which for a zip package is a member decompressed.
+    *bytes_read* is the number of bytes read from storage to produce them, so for a zip package
+    it counts compressed bytes.
+    """
+
+    items_read: int
+    bytes_read: int
+
+
+class _ItemStream(NamedTuple):
+    """Size of a package item and a callable that opens a binary stream of its contents."""
+
+    uri: str
+    size: int
+    open: Callable[[], IO[bytes]]
+
+
 class PhysPkg:
     """Provides read and write services for packages on the filesystem.
 
@@ -32,21 +158,186 @@ class PhysPkg:
         """Generate a (uri, blob) 2-tuple for each of the items in the package."""
         return iter(self._blobs.items())
 
+    @staticmethod
+    def copy_to_zip(
+        path: str, pkg_zip_path: str, /, uri_filter: Callable[[str], bool] | None = None
+    ):
+        """Copy the items of the OPC package at *path* to a new zip archive at *pkg_zip_path*.
+
+        *path* can be either a regular zip package or a directory containing an expanded package.
+        Each item is copied in fixed-size chunks, so no more than one chunk of it is in memory at
+        a time, whatever the size of the package. When *uri_filter* is provided, only items for
+        which it returns True are copied.
+        """
+        with PhysPkg._open_item_streams(path, uri_filter) as item_streams:
+            PhysPkg._write_streams_to_zip(item_streams, pkg_zip_path)
+
+    @staticmethod
+    def copy_to_dir(
+        path: str,
+        dirpath: str,
+        /,
+        uri_filter: Callable[[str], bool] | None = None,
+        clear: bool = True,
+        write_item: Callable[[IO[bytes], IO[bytes]], object] | None = None,
+    ):
+        """Copy the items of the OPC package at *path* to files in a directory at *dirpath*.
+
+        Items are copied in fixed-size chunks, as for :meth:`copy_to_zip`. Any directory at
+        *dirpath* is deleted before being recreated, as for :meth:`write_to_dir`, unless *clear*
+        is False. When *write_item* is provided, it is called with the stream of each item and
+        its open file, one item at a time, to write the file instead of copying it.
+        """
+        with PhysPkg._open_item_streams(path, uri_filter) as item_streams:
+            if clear:
+                PhysPkg._clear_or_make_dir(dirpath)
+            for uri, _, open_item in item_streams:
+                with open_item() as src, open(PhysPkg._item_filepath(dirpath, uri), "wb") as dest:
+                    if write_item is None:
+                        shutil.copyfileobj(src, dest, _CHUNK_SIZE)
+                    else:
+                        write_item(src, dest)
+
     @classmethod
-    def read(cls, path: str, /):
+    def read(cls, path: str, /, uri_filter: Callable[[str], bool] | None = None):
         """Return a |PhysPkg| instance loaded with contents of OPC package at *path*.
 
         *path* can be either a regular zip package or a directory containing an expanded package.
+        When *uri_filter* is provided, only items for which it returns True are loaded; the
+        others are never decompressed or read from disk.
         """
         if os.path.isdir(path):
-            return DirPhysPkg.read(path)
+            return DirPhysPkg.read(path, uri_filter)
         else:
-            return ZipPhysPkg.read(path)
+            return ZipPhysPkg.read(path, uri_filter)
+
+    @staticmethod
+    def read_manifest(path: str, /, uri_filter: Callable[[str], bool] | None = None) -> Manifest:
+        """Return a |Manifest| of the items in the OPC package at *path*.
+
+        *path* can be either a regular zip package or a directory containing an expanded package.
+        When *uri_filter* is provided, only items for which it returns True are included.
+        """
+        if os.path.isdir(path):
+            return DirPhysPkg.read_manifest(path, uri_filter)
+        else:
+            return ZipPhysPkg.read_manifest(path, uri_filter)
+
+    @staticmethod
+    def read_entries(
+        path: str, /, uri_filter: Callable[[str], bool] | None = None
+    ) -> list[ItemEntry]:
+        """Return an |ItemEntry| for each item in the OPC package at *path*, in stored order.
+
+        *path* can be either a regular zip package or a directory containing an expanded package.
+        When *uri_filter* is provided, only items for which it returns True are included.
+        """
+        if os.path.isdir(path):
+            return DirPhysPkg.read_entries(path, uri_filter)
+        else:
+            return ZipPhysPkg.read_entries(path, uri_filter)
+
+    @staticmethod
+    def remove_from_dir(dirpath: str, uris: Iterable[str]):
+        """Delete the file under *dirpath* for each item in *uris*, when there is one.
+
+        A directory left empty by the removal is deleted too, up to but not including *dirpath*.
+        """
+        for uri in uris:
+            filepath = os.path.join(dirpath, os.path.normpath(uri))
+            if not os.path.isfile(filepath):
+                continue
+            os.remove(filepath)
+            parent_dirpath = os.path.dirname(filepath)
+            while parent_dirpath != dirpath and not os.listdir(parent_dirpath):
+                os.rmdir(parent_dirpath)
+                parent_dirpath = os.path.dirname(parent_dirpath)
 
     @property
     def root_uri(self) -> str:
         return self._root_uri  # pragma: no cover
 
+    @staticmethod
+    def splice_zips(
+        base_zip_path: str, donor_zip_path: str, uris: Iterable[str], pkg_zip_path: str
+    ):
+        """Write a new zip package at *pkg_zip_path* that is *base_zip_path* with *uris* swapped.
+
+        Each item named in *uris* is taken from the package at *donor_zip_path* in place of its
+        counterpart in the base package; one the donor lacks is left out and one only the donor
+        has is added at the end. Every member is copied in its compressed form, a chunk at a
+        time, so nothing is inflated or deflated again however many packages are built.
+        """
+        uris = set(uris)
+        with _MappedZipFile(base_zip_path) as base, _MappedZipFile(donor_zip_path) as donor:
+            donor_infos = {
+                info.filename: info for info in donor.infolist() if info.filename in uris
+            }
+            with ZipFile(pkg_zip_path, "w") as zipf:
+                for info in base.infolist():
+                    if info.filename not in uris:
+                        PhysPkg._copy_member_raw(base, info, zipf)
+                    elif info.filename in donor_infos:
+                        PhysPkg._copy_member_raw(donor, donor_infos.pop(info.filename), zipf)
+                for info in donor_infos.values():
+                    PhysPkg._copy_member_raw(donor, info, zipf)
+
+    @staticmethod
+    def stat_files(path: str) -> dict[str, FileStat]:
+        """A |FileStat| for each file of the package at *path*, keyed by its item URI.
+
+        A zip package is a single file, keyed by its filename. A file that disappears while the
+        directory is being visited is left out, and a *path* that does not exist gives an empty
+        dict. Nothing is read but the directory entries.
+        """
+        if not os.path.isdir(path):
+            filepaths = {os.path.basename(path): path}
+        else:
+            pfx_len = len(path) + 1
+            filepaths = {
+                filepath[pfx_len:].replace("\\", "/"): filepath
+                for filepath in DirPhysPkg._filepaths_in_dir(path)
+            }
+        file_stats: dict[str, FileStat] = {}
+        for uri, filepath in filepaths.items():
+            try:
+                stat_result = os.stat(filepath)
+            except FileNotFoundError:
+                continue
+            file_stats[uri] = FileStat(stat_result.st_size, stat_result.st_mtime_ns)
+        return file_stats
+
+    @staticmethod
+    def update_zip(
+        path: str,
+        pkg_zip_path: str,
+        /,
+        changed_uris: Collection[str],
+        uri_filter: Callable[[str], bool] | None = None,
+    ):
+        """Bring the zip package at *pkg_zip_path*, copied from *path* before, up to date.
+
+        Only the items in *changed_uris*, and any item the zip lacks, are compressed again; every
+        other item is copied from the existing zip still compressed, so the cost of an update
+        grows with what changed rather than with the size of the package. An item no longer at
+        *path* is left out. The new zip replaces the old one only once it is complete.
+
+        The old zip is read as a plain file rather than through a memory map, as this runs in a
+        `--watch` loop that keeps going while other programs may rewrite the zip.
+        """
+        tmp_zip_path = "%s.tmp" % pkg_zip_path
+        date_time = time.localtime(time.time())[:6]
+        with ZipFile(pkg_zip_path) as old_zipf, ZipFile(tmp_zip_path, "w") as zipf:
+            old_infos = {info.filename: info for info in old_zipf.infolist()}
+            with PhysPkg._open_item_streams(path, uri_filter) as item_streams:
+                for item_stream in sorted(item_streams, key=lambda item: item[0]):
+                    info = old_infos.get(item_stream.uri)
+                    if info is None or item_stream.uri in changed_uris:
+                        PhysPkg._write_stream_to_zip(item_stream, zipf, date_time)
+                    else:
+                        PhysPkg._copy_member_raw(old_zipf, info, zipf)
+        os.replace(tmp_zip_path, pkg_zip_path)
+
     @staticmethod
     def write_to_dir(blobs: BlobCollection, dirpath: str):
         """Write the contents of the |BlobCollection| instance *blobs* to a directory at *dirpath*.
@@ -85,20 +376,107 @@ class PhysPkg:
         os.makedirs(dirpath)
 
     @staticmethod
-    def _write_blob_to_dir(dirpath: str, uri: str, blob: bytes):
-        """Write *blob* to a file under *dirpath*.
+    def _copy_member_raw(src_zipf: ZipFile, info: ZipInfo, zipf: ZipFile):
+        """Append the member *info* of *src_zipf* to *zipf*, still compressed.
+
+        `ZipFile` has no way to read or write a member without inflating or deflating it, so the
+        compressed data is copied between the underlying files directly, and the member is then
+        registered for the central directory the way `ZipFile.open()` does it.
+        """
+        src, dest = src_zipf.fp, zipf.fp
+        assert src is not None
+        assert dest is not None
+        src.seek(info.header_offset)
+        signature, filename_len, extra_len = _LOCAL_HEADER.unpack(src.read(_LOCAL_HEADER.size))
+        if signature != _LOCAL_HEADER_SIGNATURE:
+            raise ValueError("bad local file header for zip member '%s'" % info.filename)
+        src.seek(filename_len + extra_len, os.SEEK_CUR)
+
+        zinfo = ZipInfo(info.filename, info.date_time)
+        zinfo.compress_type = info.compress_type
+        zinfo.external_attr = info.external_attr
+        # -- sizes and CRC are known, so they go in the header and no data descriptor follows --
+        zinfo.flag_bits = info.flag_bits & ~_DATA_DESCRIPTOR_FLAG
+        zinfo.CRC = info.CRC
+        zinfo.compress_size = info.compress_size
+        zinfo.file_size = info.file_size
+
+        zinfo.header_offset = dest.tell()
+        dest.write(zinfo.FileHeader())
+        remaining = info.compress_size
+        while remaining:
+            chunk = src.read(min(remaining, _CHUNK_SIZE))
+            if not chunk:
+                raise ValueError("zip member '%s' is truncated" % info.filename)
+            dest.write(chunk)
+            remaining -= len(chunk)
+        zipf.filelist.append(zinfo)
+        zipf.NameToInfo[zinfo.filename] = zinfo
+        zipf.start_dir = dest.tell()
+
+    @staticmethod
+    def _item_filepath(dirpath: str, uri: str) -> str:
+        """Path of the file under *dirpath* for the item at *uri*, its parent directory created.
 
         The segments of *uri* that precede the filename are created, as required, as intermediate
         directories.
         """
         # -- In general, uri will contain forward slashes as segment separators.
         # -- This next line converts them to backslashes on Windows.
-        item_relpath = os.path.normpath(uri)
-        fullpath = os.path.join(dirpath, item_relpath)
-        dirpath, _ = os.path.split(fullpath)
-        if not os.path.exists(dirpath):
-            os.makedirs(dirpath)
-        with open(fullpath, "wb") as f:
+        fullpath = os.path.join(dirpath, os.path.normpath(uri))
+        parent_dirpath = os.path.dirname(fullpath)
+        if not os.path.exists(parent_dirpath):
+            os.makedirs(parent_dirpath)
+        return fullpath
+
+    @staticmethod
+    def _open_item_streams(
+        path: str, /, uri_filter: Callable[[str], bool] | None
+    ) -> ContextManager[list[_ItemStream]]:
+        """Context manager giving an |_ItemStream| for each item of the package at *path*.
+
+        For a zip package the archive stays open until the context exits, so each stream can be
+        opened within it.
+        """
+        if os.path.isdir(path):
+            return DirPhysPkg._open_item_streams(path, uri_filter)
+        else:
+            return ZipPhysPkg._open_item_streams(path, uri_filter)
+
+    @staticmethod
+    def _write_streams_to_zip(item_streams: Iterable[_ItemStream], pkg_zip_path: str):
+        """Write each of *item_streams* to a new zip archive at *pkg_zip_path*, in URI order.
+
+        Contents are copied in chunks. Because each member's size is known before it
+        is written, a member too large for a standard zip entry is given a Zip64 one.
+        """
+        date_time = time.localtime(time.time())[:6]
+        with ZipFile(pkg_zip_path, "w", ZIP_DEFLATED) as zipf:
+            for item_stream in sorted(item_streams, key=lambda item: item[0]):
+                PhysPkg._write_stream_to_zip(item_stream, zipf, date_time)
+
+    @staticmethod
+    def _write_stream_to_zip(
+        item_stream: _ItemStream, zipf: ZipFile, date_time: tuple[int, int, int, int, int, int]
+    ):
+        """Compress the contents of *item_stream* into a new member of *zipf*, a chunk at a time."""
+        uri, size, open_item = item_stream
+        # -- same member attributes `ZipFile.writestr()` gives, so output is unchanged --
+        zinfo = ZipInfo(uri, date_time)
+        zinfo.compress_type = ZIP_DEFLATED
+        zinfo.external_attr = 0o600 << 16
+        zinfo.file_size = size
+        with open_item() as src, zipf.open(zinfo, "w") as dest:
+            shutil.copyfileobj(src, dest, _CHUNK_SIZE)
+
+    @staticmethod
+    def _write_blob_to_dir(dirpath: str, uri: str, blob: bytes):
+        """Write *blob* to a file under *dirpath*.
+
+        The segments of *uri* that precede the filename are created, as required, as intermediate
+        directories.
+        """
+        with open(PhysPkg._item_filepath(dirpath, uri), "wb") as f:
             f.write(blob)
 
 
@@ -112,18 +490,72 @@ class DirPhysPkg(PhysPkg):
         super(DirPhysPkg, self).__init__(blobs, root_uri)
 
     @classmethod
-    def read(cls, pkg_dir: str):
+    def read(cls, pkg_dir: str, /, uri_filter: Callable[[str], bool] | None = None):
         """Return a |BlobCollection| instance loaded from *pkg_dir*."""
         blobs = BlobCollection()
         pfx_len = len(pkg_dir) + 1
         for filepath in cls._filepaths_in_dir(pkg_dir):
             uri = filepath[pfx_len:].replace("\\", "/")
+            if uri_filter is not None and not uri_filter(uri):
+                continue
             with open(filepath, "rb") as f:
                 blob = f.read()
             blobs[uri] = blob
         root_uri = pkg_dir
         return cls(blobs, root_uri)
 
+    @staticmethod
+    def read_manifest(pkg_dir: str, /, uri_filter: Callable[[str], bool] | None = None) -> Manifest:
+        """Return a |Manifest| of the files under *pkg_dir*.
+
+        A directory has no central directory to consult, so the CRC of each file is computed by
+        reading it in fixed-size chunks.
+        """
+        item_infos: list[tuple[str, ItemInfo]] = []
+        pfx_len = len(pkg_dir) + 1
+        for filepath in DirPhysPkg._filepaths_in_dir(pkg_dir):
+            uri = filepath[pfx_len:].replace("\\", "/")
+            if uri_filter is not None and not uri_filter(uri):
+                continue
+            size, crc = 0, 0
+            with open(filepath, "rb") as f:
+                for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+                    size += len(chunk)
+                    crc = zlib.crc32(chunk, crc)
+            item_infos.append((uri, ItemInfo(size, crc)))
+        return Manifest(item_infos, root_uri=pkg_dir)
+
+    @staticmethod
+    def read_entries(
+        pkg_dir: str, /, uri_filter: Callable[[str], bool] | None = None
+    ) -> list[ItemEntry]:
+        """Return an |ItemEntry| for each file under *pkg_dir*, sorted by URI.
+
+        Each file is reported as stored (uncompressed), timestamped with its modification time.
+        """
+        entries: list[ItemEntry] = []
+        for uri, (size, crc) in DirPhysPkg.read_manifest(pkg_dir, uri_filter).items():
+            mtime = os.path.getmtime(os.path.join(pkg_dir, os.path.normpath(uri)))
+            date_time = time.localtime(mtime)[:6]
+            entries.append(ItemEntry(uri, size, size, ZIP_STORED, crc, date_time))
+        return entries
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _open_item_streams(
+        pkg_dir: str, /, uri_filter: Callable[[str], bool] | None
+    ) -> Generator[list[_ItemStream], None, None]:
+        """An |_ItemStream| for each file under *pkg_dir*, sorted by URI."""
+        item_streams: list[_ItemStream] = []
+        pfx_len = len(pkg_dir) + 1
+        for filepath in DirPhysPkg._filepaths_in_dir(pkg_dir):
+            uri = filepath[pfx_len:].replace("\\", "/")
+            if uri_filter is not None and not uri_filter(uri):
+                continue
+            open_file = functools.partial(open, filepath, "rb")
+            item_streams.append(_ItemStream(uri, os.path.getsize(filepath), open_file))
+        yield item_streams
+
     @staticmethod
     def _filepaths_in_dir(dirpath: str) -> list[str]:
         """A sorted list of relative paths, one for each of the files under *dirpath*.
@@ -145,12 +577,221 @@ class ZipPhysPkg(PhysPkg):
         super(ZipPhysPkg, self).__init__(blobs, root_uri)
 
     @classmethod
-    def read(cls, pkg_zip_path: str):
+    def read(cls, pkg_zip_path: str, /, uri_filter: Callable[[str], bool] | None = None):
         """Return a |BlobCollection| instance loaded from *pkg_zip_path*."""
         blobs = BlobCollection()
-        zipf = ZipFile(pkg_zip_path, "r")
+        zipf = _MappedZipFile(pkg_zip_path)
         for name in zipf.namelist():
+            if uri_filter is not None and not uri_filter(name):
+                continue
             blobs[name] = zipf.read(name)
         zipf.close()
         root_uri = os.path.splitext(pkg_zip_path)[0]
         return cls(blobs, root_uri)
+
+    @staticmethod
+    def read_manifest(
+        pkg_zip_path: str, /, uri_filter: Callable[[str], bool] | None = None
+    ) -> Manifest:
+        """Return a |Manifest| read from the central directory of the zip at *pkg_zip_path*."""
+        with _MappedZipFile(pkg_zip_path) as zipf:
+            return Manifest(
+                (
+                    (info.filename, ItemInfo(info.file_size, info.CRC))
+                    for info in zipf.infolist()
+                    if uri_filter is None or uri_filter(info.filename)
+                ),
+                root_uri=os.path.splitext(pkg_zip_path)[0],
+            )
+
+    @staticmethod
+    def read_entries(
+        pkg_zip_path: str, /, uri_filter: Callable[[str], bool] | None = None
+    ) -> list[ItemEntry]:
+        """Return an |ItemEntry| for each member in the central directory of *pkg_zip_path*.
+
+        No member is decompressed; only the central directory at the end of the file is read.
+        """
+        with _MappedZipFile(pkg_zip_path) as zipf:
+            return [
+                ItemEntry(
+                    info.filename,
+                    info.file_size,
+                    info.compress_size,
+                    info.compress_type,
+                    info.CRC,
+                    info.date_time,
+                )
+                for info in zipf.infolist()
+                if uri_filter is None or uri_filter(info.filename)
+            ]
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _open_item_streams(
+        pkg_zip_path: str, /, uri_filter: Callable[[str], bool] | None
+    ) -> Generator[list[_ItemStream], None, None]:
+        """An |_ItemStream| for each member of *pkg_zip_path*, which is open until exit."""
+        with _MappedZipFile(pkg_zip_path) as zipf:
+            yield [
+                _ItemStream(info.filename, info.file_size, functools.partial(zipf.open, info))
+                for info in zipf.infolist()
+                if uri_filter is None or uri_filter(info.filename)
+            ]
+
+
+class PkgReader(abc.ABC):
+    """An open OPC package, from which items are read one at a time, on demand.
+
+    Unlike |PhysPkg|, which loads a package in one go and keeps nothing open, a |PkgReader| holds
+    its package open until :meth:`close` is called, so an item can be read at any point during
+    its lifetime without reopening the file. It is a context manager that closes itself on exit,
+    and it counts the work it does; see :attr:`stats`.
+    """
+
+    def __init__(self, root_uri: str):
+        super(PkgReader, self).__init__()
+        self._root_uri = root_uri
+        self._lock = threading.Lock()
+        self._items_read = 0
+        self._bytes_read = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc: object):
+        self.close()
+
+    @staticmethod
+    def open(path: str, uri_filter: Callable[[str], bool] | None = None) -> PkgReader:
+        """Return a |PkgReader| for the OPC package at *path*, a zip archive or a directory.
+
+        When *uri_filter* is provided, the reader holds only the items for which it returns True;
+        the index entries of the others are dropped when it is opened.
+        """
+        if os.path.isdir(path):
+            return DirPkgReader(path, uri_filter)
+        else:
+            return ZipPkgReader(path, uri_filter)
+
+    def close(self):
+        """Release any handle this reader holds open. Safe to call more than once."""
+
+    def read(self, uri: str) -> bytes:
+        """The blob of the item at *uri*. Raises |KeyError| when there is no such item."""
+        blob, stored_size = self._read(uri)
+        with self._lock:
+            self._items_read += 1
+            self._bytes_read += stored_size
+        return blob
+
+    @property
+    def root_uri(self) -> str:
+        """Path of the package, as though it were extracted into a directory."""
+        return self._root_uri
+
+    @property
+    def stats(self) -> ReadStats:
+        """|ReadStats| of the items read since this reader was opened."""
+        with self._lock:
+            return ReadStats(self._items_read, self._bytes_read)
+
+    @property
+    @abc.abstractmethod
+    def uris(self) -> list[str]:
+        """URI of each item in this package, in stored order."""
+
+    @abc.abstractmethod
+    def _read(self, uri: str) -> tuple[bytes, int]:
+        """The blob of the item at *uri* and the number of bytes read from storage to produce it."""
+
+
+class DirPkgReader(PkgReader):
+    """|PkgReader| for a package expanded into a directory; each item is a file there."""
+
+    def __init__(self, pkg_dir: str, uri_filter: Callable[[str], bool] | None = None):
+        super(DirPkgReader, self).__init__(pkg_dir)
+        pfx_len = len(pkg_dir) + 1
+        uris = (
+            filepath[pfx_len:].replace("\\", "/")
+            for filepath in DirPhysPkg._filepaths_in_dir(pkg_dir)
+        )
+        self._uris = [uri for uri in uris if uri_filter is None or uri_filter(uri)]
+        self._uri_set = frozenset(self._uris)
+
+    @property
+    def uris(self) -> list[str]:
+        return list(self._uris)
+
+    def _read(self, uri: str) -> tuple[bytes, int]:
+        if uri not in self._uri_set:
+            raise KeyError("There is no item named '%s' in the package" % uri)
+        with open(os.path.join(self._root_uri, os.path.normpath(uri)), "rb") as f:
+            blob = f.read()
+        return blob, len(blob)
+
+
+class ZipPkgReader(PkgReader):
+    """|PkgReader| for a zip package, holding the archive open until it is closed.
+
+    A single memory map of the archive serves every thread; |ZipFile| serializes the copy of each
+    member's compressed bytes out of it, and each thread inflates the member it reads on its own.
+    """
+
+    def __init__(self, pkg_zip_path: str, uri_filter: Callable[[str], bool] | None = None):
+        super(ZipPkgReader, self).__init__(os.path.splitext(pkg_zip_path)[0])
+        self._zipf = _MappedZipFile(pkg_zip_path)
+        if uri_filter is not None:
+            # -- a |ZipInfo| per member adds up in a large archive; keep only those selected --
+            infos = [info for info in self._zipf.infolist() if uri_filter(info.filename)]
+            self._zipf.filelist = infos
+            self._zipf.NameToInfo = {info.filename: info for info in infos}
+
+    def close(self):
+        self._zipf.close()
+
+    @property
+    def uris(self) -> list[str]:
+        return self._zipf.namelist()
+
+    def _read(self, uri: str) -> tuple[bytes, int]:
+        info = self._zipf.getinfo(uri)
+        return self._zipf.read(info), info.compress_size
+
+
+class _MappedFile(mmap.mmap):
+    """Read-only memory map of a whole file, readable by |ZipFile| like the file itself."""
+
+    def seekable(self) -> bool:
+        return True
+
+
+class _MappedZipFile(ZipFile):
+    """A |ZipFile| for reading the zip at *pkg_zip_path*, served from a memory map of it.
+
+    The central directory and each member are read by copying them out of the mapped pages, so a
+    member read in many chunks, or one of many small members, costs no seek or read call on the
+    file. The map is released on :meth:`close`. A file that cannot be mapped, like an empty one,
+    is read from the file as usual.
+    """
+
+    def __init__(self, pkg_zip_path: str):
+        self._map: _MappedFile | None = None
+        try:
+            with open(pkg_zip_path, "rb") as f:
+                self._map = _MappedFile(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            super(_MappedZipFile, self).__init__(pkg_zip_path, "r")
+            return
+        try:
+            # -- `mmap.seek()` returns None before Python 3.13, which |ZipFile| never uses --
+            super(_MappedZipFile, self).__init__(cast(IO[bytes], self._map), "r")
+        except BaseException:
+            self._map.close()
+            raise
+        self.filename = pkg_zip_path
+
+    def close(self):
+        super(_MappedZipFile, self).close()
+        if self._map is not None:
+            self._map.close()
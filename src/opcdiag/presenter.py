@@ -1,22 +1,84 @@
 """Presenter classes for opc-diag model classes."""
 
+# pyright: reportPrivateUsage=false
+
 from __future__ import annotations
 
 import re
-from difflib import unified_diff
-from typing import TYPE_CHECKING, Sequence, cast
+from difflib import SequenceMatcher, unified_diff
+from typing import TYPE_CHECKING, Iterable, Iterator, Literal, NamedTuple, Sequence, cast
 
 from lxml import etree
 
+from opcdiag.model import is_binary_uri, start_tag_parts
+
 if TYPE_CHECKING:
+    from opcdiag.diff_cache import DiffCache
     from opcdiag.model import Package, PkgItemT
+    from opcdiag.phys_pkg import Manifest
+
+_XML_DECL = "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>"
+
+# -- texts longer than this many characters are diffed chunk by chunk; see _windowed_opcodes() --
+_DIFF_WINDOW_THRESHOLD = 4 * 1024 * 1024
+
+# -- a line that starts one of these repeating elements begins a new chunk of a large text --
+_CHUNK_START = re.compile(r" *<(?:row|si|p:sp)[ />]")
+
+# -- true for a root having content other than childless child elements and indentation --
+_NON_LEAF_NODES = etree.XPath(
+    "boolean(comment() | processing-instruction() | */node() | text()[normalize-space()])"
+)
 
+# -- the `Id` attribute of a serialized `<Relationship>` start-tag --
+_REL_ID = re.compile(r' Id="[^"]*"')
 
-def diff(text_1: str, text_2: str, filename_1: str, filename_2: str):
-    """Return a ``diff`` style unified diff listing between *text_1* and *text_2*."""
-    lines_1 = text_1.split("\n")
-    lines_2 = text_2.split("\n")
-    diff_lines = unified_diff(lines_1, lines_2, filename_1, filename_2)
+# -- start of a listing from `diff()` given empty filenames; see DiffPresenter._cached_diff() --
+_UNTITLED_HEADER = "---\n\n+++\n\n"
+
+_Opcode = tuple[Literal["replace", "delete", "insert", "equal"], int, int, int, int]
+
+
+def bytes_in_range(chunks: Iterable[str], first: int, last: int | None) -> Iterator[bytes]:
+    """Generate bytes *first* through *last* of the UTF-8 encoding of the text in *chunks*.
+
+    Bytes are numbered from 1, like `cut -b`, and a *last* of |None| means through the end. No
+    chunk past the one holding byte *last* is requested, so a lazily produced text is never
+    produced beyond the range.
+    """
+    offset = 0
+    for chunk in chunks:
+        data = chunk.encode("utf-8")
+        start, offset = offset, offset + len(data)
+        if offset < first:
+            continue
+        stop = len(data) if last is None else min(last - start, len(data))
+        if stop > first - 1 - start:
+            yield data[max(first - 1 - start, 0) : stop]
+        if last is not None and offset >= last:
+            return
+
+
+def diff(
+    text_1: str | Sequence[str],
+    text_2: str | Sequence[str],
+    filename_1: str,
+    filename_2: str,
+    window_threshold: int = _DIFF_WINDOW_THRESHOLD,
+):
+    """Return a ``diff`` style unified diff listing between *text_1* and *text_2*.
+
+    Each text can be given as a string or as the list of its lines, like |ItemPresenter.lines|,
+    which is used as-is. When either text is longer than *window_threshold* characters, the texts
+    are matched chunk by chunk, as described in :func:`_windowed_opcodes`, rather than line by
+    line.
+    """
+    lines_1 = _lines(text_1)
+    lines_2 = _lines(text_2)
+    if max(_text_length(lines_1), _text_length(lines_2)) > window_threshold:
+        diff_lines = _windowed_unified_diff(lines_1, lines_2, filename_1, filename_2)
+    else:
+        diff_lines = unified_diff(lines_1, lines_2, filename_1, filename_2)
     # this next bit is needed to work around Python 2.6 difflib bug that left
     # in a trailing space after the filename if no date was provided. The
     # filename lines look like: '--- filename \n' where regular lines look
@@ -29,121 +91,499 @@ def diff(text_1: str, text_2: str, filename_1: str, filename_2: str):
     return "\n".join(trimmed_lines)
 
 
-def prettify_nsdecls(xml: str):
-    """Wrap and indent attributes on the root element.
+def diff_stat(
+    text_1: str | Sequence[str],
+    text_2: str | Sequence[str],
+    window_threshold: int = _DIFF_WINDOW_THRESHOLD,
+) -> tuple[int, int]:
+    """Return (insertions, deletions) line counts for a diff between *text_1* and *text_2*.
+
+    The counts match those of the listing produced by :func:`diff`, but no diff text is formed.
+    """
+    lines_1 = _lines(text_1)
+    lines_2 = _lines(text_2)
+    if max(_text_length(lines_1), _text_length(lines_2)) > window_threshold:
+        opcodes = _windowed_opcodes(lines_1, lines_2)
+    else:
+        opcodes = SequenceMatcher(None, lines_1, lines_2).get_opcodes()
+    insertions, deletions = 0, 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag != "equal":
+            deletions += i2 - i1
+            insertions += j2 - j1
+    return insertions, deletions
+
+
+def lines_in_range(chunks: Iterable[str], first: int, last: int | None) -> Iterator[str]:
+    """Generate the text of lines *first* through *last* of the text in *chunks*.
+
+    Lines are numbered from 1, like `sed -n`, and a *last* of |None| means through the end. No
+    chunk past the one ending line *last* is requested, so a lazily produced text is never
+    produced beyond the range.
+    """
+    line = 1
+    for chunk in chunks:
+        newlines = chunk.count("\n")
+        if line + newlines < first:
+            line += newlines
+            continue
+        start = 0
+        while line < first:
+            start = chunk.index("\n", start) + 1
+            line += 1
+        remaining = chunk.count("\n", start)
+        if last is None or line + remaining <= last:
+            line += remaining
+            if start < len(chunk):
+                yield chunk[start:]
+            continue
+        end = start
+        while line <= last:
+            end = chunk.index("\n", end) + 1
+            line += 1
+        yield chunk[start:end]
+        return
+
+
+def _lines(text: str | Sequence[str]) -> Sequence[str]:
+    """The lines of *text*, which is either a string or already a sequence of lines."""
+    return text.split("\n") if isinstance(text, str) else text
+
+
+def _chunk_starts(lines: Sequence[str]) -> list[int]:
+    """Index of the first line of each chunk of *lines*, followed by `len(lines)`.
+
+    The first chunk starts at line 0 and each other one at a line matching `_CHUNK_START`.
+    """
+    starts = [i for i, line in enumerate(lines) if i and _CHUNK_START.match(line)]
+    return [0] + starts + [len(lines)]
+
+
+def _is_text_item(pkg_item: PkgItemT) -> bool:
+    """True if *pkg_item* is presented as normalized XML text rather than as a binary."""
+    return pkg_item.is_content_types or pkg_item.is_rels_item or pkg_item.is_xml_part
+
+
+def _body_lines(root: etree._Element) -> list[str]:
+    """Lines of the serialized children of *root*, each child a self-closing start-tag line.
+
+    Any content a child has is dropped, as are comments and processing instructions directly
+    under *root*. *root* is changed in place to hold just its child elements and serialized by
+    lxml in one call, so each line inherits the namespace declarations of *root* and tens of
+    thousands of children cost no Python work per child or attribute.
+    """
+    etree.indent(root)
+    # -- these are rare, so the tree is only walked in Python when one of them is present --
+    if _NON_LEAF_NODES(root):
+        root.text = None
+        for node in list(root):
+            if not isinstance(node.tag, str):
+                root.remove(node)
+                continue
+            node.text, node.tail = None, None
+            del node[:]
+        etree.indent(root)
+    return etree.tostring(root, encoding="unicode").split("\n")[1:-1]
+
+
+def _leaf_lines(root: etree._Element, body: list[str], localname: str) -> list[str]:
+    """The lines of *body*, the :func:`_body_lines` of *root*, of children having *localname*.
+
+    Suits the childless elements, like `<Relationship>`, that appear directly under the root of
+    a content-types or rels item, in a namespace declared on the root. Lines are in document
+    order.
+    """
+    prefixes = ["  <%s" % localname] + [
+        "  <%s:%s" % (prefix, localname) for prefix in root.nsmap if prefix
+    ]
+    starts = tuple("%s%s" % (prefix, end) for prefix in prefixes for end in (" ", "/", ">"))
+    return [line for line in body if line.startswith(starts)]
+
+
+def _root_lines(root: etree._Element, child_lines: list[str]) -> list[str]:
+    """Lines of an XML document with *root* as its root element and *child_lines* as its body.
+
+    The namespace declarations of *root* appear in its start tag, before its attributes.
+    """
+    tag, nsdecls, attrs = start_tag_parts(root)
+    start_tag = " ".join([tag] + nsdecls + attrs)
+    if not child_lines:
+        return [_XML_DECL, "<%s/>" % start_tag]
+    return [_XML_DECL, "<%s>" % start_tag] + child_lines + ["</%s>" % tag]
+
+
+def prettify_nsdecls(xml: str, root: etree._Element) -> str:
+    """Wrap and indent attributes on the root element of *xml*, the serialized form of *root*.
 
     This avoids namespace declarations running off the page in the text editor such that they can
     be more easily inspected. Attributes are sorted such that the default namespace, if present,
     appears first in the list, followed by other namespace declarations, and then remaining
     attributes, both in alphabetical order.
+
+    The new start-tag is composed from the namespace map and attributes of *root*. Only the
+    original start-tag is located in *xml*; the rest of the document is passed through as-is.
     """
+    tag, nsdecls, attrs = start_tag_parts(root)
+    if not nsdecls and not attrs:
+        return xml
 
-    def parse_attrs(rootline: str):
-        """
-        Return 3-tuple (head, attributes, tail) looking like
-        ('<p:sld', ['xmlns:p="html://..."', 'name="Office Theme>"'], '>').
-        """
-        attr_re = re.compile(r'([-a-zA-Z0-9_:.]+="[^"]*" *)')
-        substrs = [substr.strip() for substr in attr_re.split(rootline) if substr]
-        head = substrs[0]
-        attrs, tail = (substrs[1:-1], substrs[-1]) if len(substrs) > 1 else ([], "")
-        return (head, attrs, tail)
+    def_nsdecls = [nsdecl for nsdecl in nsdecls if nsdecl.startswith("xmlns=")]
+    pfx_nsdecls = [nsdecl for nsdecl in nsdecls if not nsdecl.startswith("xmlns=")]
 
-    def sequence_attrs(attributes: Sequence[str]):
-        """Sort attributes alphabetically within subgroups.
+    # -- the root start-tag immediately follows the XML declaration and, because `>` is always
+    # -- escaped in an attribute value, ends at the first `>` after that.
+    start = xml.index("<", len(_XML_DECL))
+    end = xml.index(">", start) + 1
+    tail = "/>" if xml[end - 2] == "/" else ">"
 
-        The subgroupings are default namespace declaration, other namespace declarations, and
-        other attributes.
-        """
-        def_nsdecls: list[str] = []
-        nsdecls: list[str] = []
-        attrs: list[str] = []
-        for attr in attributes:
-            if attr.startswith("xmlns="):
-                def_nsdecls.append(attr)
-            elif attr.startswith("xmlns:"):
-                nsdecls.append(attr)
+    head = "<%s" % tag
+    indent = "\n%s" % (4 * " ")
+    start_tag = indent.join(
+        [head] + sorted(def_nsdecls) + sorted(pfx_nsdecls) + sorted(attrs) + [tail]
+    )
+    return "".join((xml[:start], start_tag, xml[end:]))
+
+
+def _text_length(lines: Sequence[str]) -> int:
+    """Length in characters of the text *lines* form when joined by newlines."""
+    return sum(map(len, lines)) + len(lines) - 1
+
+
+def _unified_range(start: int, stop: int) -> str:
+    """The `start,length` form of the line range *start*:*stop* used in a unified hunk header."""
+    length = stop - start
+    if length == 1:
+        return "%d" % (start + 1)
+    return "%d,%d" % (start + 1 if length else start, length)
+
+
+def _windowed_opcodes(lines_1: Sequence[str], lines_2: Sequence[str]) -> list[_Opcode]:
+    """Opcodes, like those of `SequenceMatcher.get_opcodes()`, turning *lines_1* into *lines_2*.
+
+    Each text is split into chunks at the lines that start a `<row>`, `<si>`, or `<p:sp>`
+    element. The two chunk sequences are matched by hash, and only the lines of the chunks left
+    unmatched are compared line by line. Time and memory then depend mostly on the size of the
+    changes rather than that of the texts.
+    """
+    starts_1, starts_2 = _chunk_starts(lines_1), _chunk_starts(lines_2)
+    keys_1 = [hash(tuple(lines_1[i:j])) for i, j in zip(starts_1, starts_1[1:])]
+    keys_2 = [hash(tuple(lines_2[i:j])) for i, j in zip(starts_2, starts_2[1:])]
+    opcodes: list[_Opcode] = []
+    chunk_matcher = SequenceMatcher(None, keys_1, keys_2, autojunk=False)
+    for tag, i1, i2, j1, j2 in chunk_matcher.get_opcodes():
+        a1, a2, b1, b2 = starts_1[i1], starts_1[i2], starts_2[j1], starts_2[j2]
+        # -- a hash match is confirmed before the chunks are taken as equal --
+        if tag == "equal" and lines_1[a1:a2] == lines_2[b1:b2]:
+            codes: list[_Opcode] = [("equal", a1, a2, b1, b2)]
+        else:
+            line_matcher = SequenceMatcher(None, lines_1[a1:a2], lines_2[b1:b2])
+            codes = [
+                (code_tag, a1 + c1, a1 + c2, b1 + d1, b1 + d2)
+                for code_tag, c1, c2, d1, d2 in line_matcher.get_opcodes()
+            ]
+        for code in codes:
+            if code[0] == "equal" and opcodes and opcodes[-1][0] == "equal":
+                opcodes[-1] = ("equal", opcodes[-1][1], code[2], opcodes[-1][3], code[4])
             else:
-                attrs.append(attr)
-        return sorted(def_nsdecls) + sorted(nsdecls) + sorted(attrs)
+                opcodes.append(code)
+    return opcodes
 
-    def pretty_rootline(head: str, attrs: Sequence[str], tail: str):
-        """Return string containing prettified XML root line.
 
-        *head* appears on the first line, *attrs* indented on following lines, and *tail* indented
-        on the last line.
-        """
-        indent = 4 * " "
-        newrootline = head
-        for attr in attrs:
-            newrootline += "\n%s%s" % (indent, attr)
-        newrootline += "\n%s%s" % (indent, tail) if tail else ""
-        return newrootline
+def _windowed_unified_diff(
+    lines_1: Sequence[str], lines_2: Sequence[str], filename_1: str, filename_2: str
+) -> Iterator[str]:
+    """Generate the lines of a diff of *lines_1* and *lines_2* formed from windowed opcodes.
+
+    The lines are the same as those `difflib.unified_diff()` generates, with three lines of
+    context, but the opcodes come from :func:`_windowed_opcodes`.
+    """
+    groups = _OpcodeMatcher(_windowed_opcodes(lines_1, lines_2)).get_grouped_opcodes(3)
+    for n, group in enumerate(groups):
+        if n == 0:
+            yield "--- %s\n" % filename_1
+            yield "+++ %s\n" % filename_2
+        first, last = group[0], group[-1]
+        yield "@@ -%s +%s @@\n" % (
+            _unified_range(first[1], last[2]),
+            _unified_range(first[3], last[4]),
+        )
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                yield from (" %s" % line for line in lines_1[i1:i2])
+                continue
+            yield from ("-%s" % line for line in lines_1[i1:i2])
+            yield from ("+%s" % line for line in lines_2[j1:j2])
+
+
+class _OpcodeMatcher(SequenceMatcher[str]):
+    """A |SequenceMatcher| that groups a given list of *opcodes* into hunks."""
+
+    def __init__(self, opcodes: list[_Opcode]):
+        super(_OpcodeMatcher, self).__init__(None, (), ())
+        self._opcodes = opcodes
+
+    def get_opcodes(self) -> list[_Opcode]:
+        return list(self._opcodes)
+
+
+class ItemStat(NamedTuple):
+    """Summary of the change to a single package item, for a `diff --stat` listing.
+
+    *status* is one of "A" (added), "D" (deleted), or "M" (modified). *sizes* is an (old, new)
+    2-tuple of byte counts for a binary item and |None| for a text item.
+    """
+
+    status: str
+    uri: str
+    insertions: int
+    deletions: int
+    sizes: tuple[int, int] | None
 
-    lines = xml.splitlines()
-    rootline = lines[1]
-    head, attributes, tail = parse_attrs(rootline)
-    attributes = sequence_attrs(attributes)
-    lines[1] = pretty_rootline(head, attributes, tail)
-    return "\n".join(lines)
+
+class PackageDiff(NamedTuple):
+    """The meaningful differences between two packages, as the parts of a `diff` listing.
+
+    *item_changes* holds a (status, uri) 2-tuple for each item whose bytes differ, as produced by
+    :meth:`DiffPresenter.item_changes`, whether or not that difference survives normalization.
+    The remaining fields are the notices and diffs :meth:`OpcView.package_diff` writes.
+    """
+
+    item_changes: list[tuple[str, str]]
+    added_removed: list[str]
+    content_types_diff: str
+    rels_diffs: list[str]
+    xml_part_diffs: list[str]
+    binary_diffs: list[str]
+
+    @property
+    def differs(self) -> bool:
+        """True if the two packages differ meaningfully."""
+        return bool(
+            self.added_removed
+            or self.content_types_diff
+            or self.rels_diffs
+            or self.xml_part_diffs
+            or self.binary_diffs
+        )
 
 
 class DiffPresenter:
     """Forms diffs between packages and their elements."""
 
     @staticmethod
-    def named_item_diff(package_1: Package, package_2: Package, uri_tail: str):
+    def added_removed(manifest_1: Manifest, manifest_2: Manifest) -> list[str]:
+        """Return a notice for each item present in only one of two manifests.
+
+        The notices come from a set difference of the URIs in each manifest, so no item is
+        loaded, and are sorted by pack URI. Each names the package the item appears in.
+        """
+        return [
+            "Only in %s: %s"
+            % ((manifest_1 if status == "D" else manifest_2).root_uri.replace("\\", "/"), uri)
+            for status, uri in DiffPresenter.item_changes(manifest_1, manifest_2)
+            if status != "M"
+        ]
+
+    @staticmethod
+    def binary_diffs(manifest_1: Manifest, manifest_2: Manifest) -> list[str]:
+        """Return a list of notices, one for each binary item that differs between two manifests.
+
+        Only items present in both manifests are compared, in alphabetical order by pack URI, and
+        by the size and CRC-32 recorded for each. No item is decompressed or held in memory. Each
+        notice names the item in both packages and gives its old and new size.
+        """
+        diffs: list[str] = []
+        for uri in sorted(manifest_1.keys() & manifest_2.keys()):
+            info_1, info_2 = manifest_1[uri], manifest_2[uri]
+            if info_1 == info_2 or not is_binary_uri(uri):
+                continue
+            diffs.append(
+                "Binary files %s and %s differ (%d -> %d bytes)"
+                % (
+                    manifest_1.path(uri).replace("\\", "/"),
+                    manifest_2.path(uri).replace("\\", "/"),
+                    info_1.size,
+                    info_2.size,
+                )
+            )
+        return diffs
+
+    @staticmethod
+    def diff_stats(
+        package_1: Package, package_2: Package, item_changes: list[tuple[str, str]]
+    ) -> list[ItemStat]:
+        """Return an |ItemStat| for each of *item_changes* that is a meaningful difference.
+
+        *item_changes* is a sequence of (status, uri) 2-tuples like that produced by
+        :meth:`item_changes`. A modified text item whose differences all disappear when it is
+        normalized is not included.
+        """
+        item_stats: list[ItemStat] = []
+        for status, uri in item_changes:
+            pkg_item_1 = None if status == "A" else package_1.find_item_by_uri_tail(uri)
+            pkg_item_2 = None if status == "D" else package_2.find_item_by_uri_tail(uri)
+            item_stat = DiffPresenter._item_stat(status, uri, pkg_item_1, pkg_item_2)
+            if item_stat is not None:
+                item_stats.append(item_stat)
+        return item_stats
+
+    @staticmethod
+    def items_differ(package_1: Package, package_2: Package, uris: list[str]) -> bool:
+        """True if any item in *uris* differs meaningfully between *package_1* and *package_2*.
+
+        A changed binary item is detected without normalizing anything. Otherwise the normalized
+        text of each item pair is compared, stopping at the first pair that differs.
+        """
+        pkg_item_pairs = [
+            (package_1.find_item_by_uri_tail(uri), package_2.find_item_by_uri_tail(uri))
+            for uri in uris
+        ]
+        for pkg_item_1, pkg_item_2 in pkg_item_pairs:
+            if not _is_text_item(pkg_item_1) and pkg_item_1.blob != pkg_item_2.blob:
+                return True
+        return any(
+            ItemPresenter(pkg_item_1).lines != ItemPresenter(pkg_item_2).lines
+            for pkg_item_1, pkg_item_2 in pkg_item_pairs
+            if _is_text_item(pkg_item_1)
+        )
+
+    @staticmethod
+    def item_changes(manifest_1: Manifest, manifest_2: Manifest) -> list[tuple[str, str]]:
+        """Return a (status, uri) 2-tuple for each item that differs between two manifests.
+
+        Status is "D" for an item only in *manifest_1*, "A" for an item only in *manifest_2*, and
+        "M" for an item whose size or CRC differs between them. Items are sorted by URI. No item
+        content is consulted, so byte-level differences that normalize away are reported as well.
+        """
+        uris_1, uris_2 = manifest_1.keys(), manifest_2.keys()
+        changes = [("D", uri) for uri in uris_1 - uris_2]
+        changes.extend(("A", uri) for uri in uris_2 - uris_1)
+        changes.extend(("M", uri) for uri in uris_1 & uris_2 if manifest_1[uri] != manifest_2[uri])
+        return sorted(changes, key=lambda change: change[1])
+
+    @staticmethod
+    def named_item_diff(
+        package_1: Package, package_2: Package, uri_tail: str, cache: DiffCache | None = None
+    ):
         """Return a diff between the corresponding text of two packages.
 
         The text item is identified by *uri_tail*, and the version in *package_1* is compared with
-        its counterpart in *package_2*.
+        its counterpart in *package_2*. When *cache* is provided, a diff of the same two versions
+        found there is used rather than formed again; see :meth:`_cached_diff`.
         """
         pkg_item_1 = package_1.find_item_by_uri_tail(uri_tail)
         pkg_item_2 = package_2.find_item_by_uri_tail(uri_tail)
-        return DiffPresenter._pkg_item_diff(pkg_item_1, pkg_item_2)
+        return DiffPresenter._pkg_item_diff(pkg_item_1, pkg_item_2, cache)
 
     @staticmethod
-    def rels_diffs(package_1: Package, package_2: Package):
+    def rels_diffs(package_1: Package, package_2: Package, cache: DiffCache | None = None):
         """Return a list of diffs between the rels items in *package_1* and *package_2*.
 
-        Rels items are compared in alphabetical order by pack URI.
+        Rels items are compared in alphabetical order by pack URI. *cache* is as for
+        :meth:`named_item_diff`.
         """
         package_1_rels_items = package_1.rels_items
-        return DiffPresenter._pkg_item_diffs(package_1_rels_items, package_2)
+        return DiffPresenter._pkg_item_diffs(package_1_rels_items, package_2, cache)
 
     @staticmethod
-    def xml_part_diffs(package_1: Package, package_2: Package):
+    def xml_part_diffs(package_1: Package, package_2: Package, cache: DiffCache | None = None):
         """
         Return a list of diffs between the XML parts in *package_1* and their
         counterpart in *package_2*. Parts are compared in alphabetical order
-        by partname (pack URI).
+        by partname (pack URI). *cache* is as for :meth:`named_item_diff`.
         """
         package_1_xml_parts = package_1.xml_parts
-        return DiffPresenter._pkg_item_diffs(package_1_xml_parts, package_2)
+        return DiffPresenter._pkg_item_diffs(package_1_xml_parts, package_2, cache)
+
+    @staticmethod
+    def _cached_diff(
+        item_presenter_1: ItemPresenter,
+        item_presenter_2: ItemPresenter,
+        blob_1: bytes,
+        blob_2: bytes,
+        cache: DiffCache,
+    ) -> str:
+        """Diff between the text of two item presenters, looked up in *cache* before it is formed.
+
+        The cache key comes from the two blobs and the presenter class, so a diff is found for
+        the same two versions of an item in any package; canonicalized XML is keyed by its
+        canonical form. A diff is stored without its filenames, which are added on the way out.
+        """
+        key = cache.key(
+            blob_1,
+            blob_2,
+            type(item_presenter_1).__name__,
+            "window_threshold=%d" % _DIFF_WINDOW_THRESHOLD,
+        )
+        untitled_diff = cache.get(key)
+        if untitled_diff is None:
+            untitled_diff = diff(item_presenter_1.lines, item_presenter_2.lines, "", "")
+            cache.put(key, untitled_diff)
+        if not untitled_diff:
+            return ""
+        return "--- %s\n\n+++ %s\n\n%s" % (
+            item_presenter_1.filename,
+            item_presenter_2.filename,
+            untitled_diff[len(_UNTITLED_HEADER) :],
+        )
 
     @staticmethod
-    def _pkg_item_diff(pkg_item_1: PkgItemT, pkg_item_2: PkgItemT):
+    def _item_stat(
+        status: str, uri: str, pkg_item_1: PkgItemT | None, pkg_item_2: PkgItemT | None
+    ) -> ItemStat | None:
+        """Return an |ItemStat| for the change from *pkg_item_1* to *pkg_item_2*.
+
+        Either item is |None| when it is missing from its package. Returns |None| when the
+        normalized text of the two items is the same.
+        """
+        pkg_item = cast("PkgItemT", pkg_item_1 or pkg_item_2)
+        if not _is_text_item(pkg_item):
+            size_1 = len(pkg_item_1.blob) if pkg_item_1 else 0
+            size_2 = len(pkg_item_2.blob) if pkg_item_2 else 0
+            return ItemStat(status, uri, 0, 0, (size_1, size_2))
+        if pkg_item_1 is None:
+            return ItemStat(status, uri, len(ItemPresenter(pkg_item).lines), 0, None)
+        if pkg_item_2 is None:
+            return ItemStat(status, uri, 0, len(ItemPresenter(pkg_item).lines), None)
+        insertions, deletions = diff_stat(
+            ItemPresenter(pkg_item_1).lines, ItemPresenter(pkg_item_2).lines
+        )
+        if not (insertions or deletions):
+            return None
+        return ItemStat(status, uri, insertions, deletions, None)
+
+    @staticmethod
+    def _pkg_item_diff(pkg_item_1: PkgItemT, pkg_item_2: PkgItemT, cache: DiffCache | None = None):
         """Return a diff between the text of *pkg_item_1* and that of *pkg_item_2*."""
         item_presenter_1 = ItemPresenter(pkg_item_1)
         item_presenter_2 = ItemPresenter(pkg_item_2)
-        text_1 = item_presenter_1.text
-        text_2 = item_presenter_2.text
+        if cache is not None:
+            return DiffPresenter._cached_diff(
+                item_presenter_1, item_presenter_2, pkg_item_1.blob, pkg_item_2.blob, cache
+            )
+        lines_1 = item_presenter_1.lines
+        lines_2 = item_presenter_2.lines
         filename_1 = item_presenter_1.filename
         filename_2 = item_presenter_2.filename
-        return diff(text_1, text_2, filename_1, filename_2)
+        return diff(lines_1, lines_2, filename_1, filename_2)
 
     @staticmethod
-    def _pkg_item_diffs(pkg_items: list[PkgItemT], package_2: Package):
+    def _pkg_item_diffs(
+        pkg_items: list[PkgItemT], package_2: Package, cache: DiffCache | None = None
+    ):
         """Return a list of diffs.
 
         There is one diff for each item in *pkg_items* that differs from its counterpart in
-        *package_2*.
+        *package_2*. An item with no counterpart is skipped; see :meth:`added_removed`.
         """
         diffs: list[str] = []
         for pkg_item in pkg_items:
             uri = pkg_item.uri
-            pkg_item_2 = package_2.find_item_by_uri_tail(uri)
-            diff = DiffPresenter._pkg_item_diff(pkg_item, pkg_item_2)
+            try:
+                pkg_item_2 = package_2.find_item_by_uri_tail(uri)
+            except KeyError:
+                continue
+            diff = DiffPresenter._pkg_item_diff(pkg_item, pkg_item_2, cache)
             if diff:
                 diffs.append(diff)
         return diffs
@@ -184,76 +624,99 @@ class ItemPresenter:
         return self._pkg_item.path.replace("\\", "/")
 
     @property
-    def text(self) -> str:
+    def lines(self) -> list[str]:
         """
-        Raise |NotImplementedError|; all subclasses must implement a ``text``
-        property, returning a text representation of the package item,
-        generally a formatted version of the item contents.
+        Raise |NotImplementedError|; all subclasses must implement a ``lines``
+        property, returning the lines of a text representation of the package
+        item, generally a formatted version of the item contents.
         """
-        msg = "'.text' property must be implemented by all subclasses of It" "emPresenter"
+        msg = "'.lines' property must be implemented by all subclasses of ItemPresenter"
         raise NotImplementedError(msg)
 
     @property
-    def xml(self):
+    def text(self) -> str:
+        """The text representation of this package item, its :attr:`lines` joined by newlines.
+
+        The lines are what is diffed, so the joined text is formed only for display.
         """
-        Return pretty-printed XML (as unicode text) from this package item's
-        blob.
+        return "\n".join(self.lines)
+
+    @property
+    def text_chunks(self) -> Iterator[str]:
+        """The text of this item followed by a newline, generated in successive pieces.
+
+        Joined, the pieces are :attr:`text` followed by a newline. A subclass that can produce its
+        text incrementally overrides this so the start of a large item is available early.
         """
-        xml_bytes = etree.tostring(
-            self._pkg_item.element, encoding="UTF-8", pretty_print=True, standalone=True
-        ).strip()
-        xml_text = xml_bytes.decode("utf-8")
-        return xml_text
+        return ("%s\n" % line for line in self.lines)
 
 
 class ContentTypesPresenter(ItemPresenter):
     """Presenter for the `[Content_Types].xml` part."""
 
     @property
-    def text(self):
-        """Return the <Types ...> XML for this content types item formatted for minimal diffs.
+    def lines(self):
+        """Return the <Types ...> XML lines for this content types item formatted for minimal diffs.
 
         The <Default> and <Override> child elements are sorted to remove arbitrary ordering
         between package saves.
         """
-        lines = self.xml.split("\n")
-        defaults = sorted([ln for ln in lines if ln.startswith("  <D")])
-        overrides = sorted([ln for ln in lines if ln.startswith("  <O")])
-        out_lines = lines[:2] + defaults + overrides + lines[-1:]
-        out = "\n".join(out_lines)
-        return out
+        root = self._pkg_item.element
+        body = _body_lines(root)
+        defaults = sorted(_leaf_lines(root, body, "Default"))
+        overrides = sorted(_leaf_lines(root, body, "Override"))
+        return _root_lines(root, defaults + overrides)
 
 
 class RelsItemPresenter(ItemPresenter):
     """Presenter for a `*.rels` part, one that holds relationships between XML and binary parts."""
 
     @property
-    def text(self):
-        """Return the <Relationships ...> XML for this rels item formatted for minimal diffs.
+    def lines(self):
+        """Return the <Relationships ...> XML lines for this rels item formatted for minimal diffs.
 
         The <Relationship> child elements are sorted to remove arbitrary ordering between package
         saves. rId values are all set to 'x' so internal renumbering between saves doesn't affect
         the ordering.
         """
-
-        def anon(rel: str):
-            return re.sub(r' Id="[^"]+" ', r' Id="x" ', rel)
-
-        lines = self.xml.split("\n")
-        relationships = [ln for ln in lines if ln.startswith("  <R")]
-        anon_rels = sorted([anon(r) for r in relationships])
-        out_lines = lines[:2] + anon_rels + lines[-1:]
-        out = "\n".join(out_lines)
-        return out
+        root = self._pkg_item.element
+        rels = _leaf_lines(root, _body_lines(root), "Relationship")
+        anon_rels = sorted(_REL_ID.sub(' Id="x"', rel, 1) for rel in rels)
+        return _root_lines(root, anon_rels)
 
 
 class XmlPartPresenter(ItemPresenter):
     """Presenter for an XML part, generally ones with a "filename" ending in `.xml`."""
 
     @property
-    def text(self):
+    def lines(self):
         """
-        Return pretty-printed XML of this part with the namespace declarations
-        aligned and sorted to produce clear and minimal diffs.
+        Return the lines of pretty-printed XML of this part with the namespace
+        declarations aligned and sorted to produce clear and minimal diffs.
+
+        The XML is decoded and split into lines once; only the XML declaration
+        and root start-tag lines are reformed to align the declarations.
+        """
+        lines = self._pkg_item.pretty_xml.decode("utf-8").split("\n")
+        # -- pretty-printed XML ends with a newline, leaving an empty last line --
+        lines.pop()
+        head = prettify_nsdecls("\n".join(lines[:2]), self._pkg_item.root_element)
+        lines[:2] = head.split("\n")
+        return lines
+
+    @property
+    def text_chunks(self) -> Iterator[str]:
+        """The same text as :attr:`text`, plus a newline, generated as the XML is pretty-printed.
+
+        Only the leading text holding the root start-tag is accumulated, to align its namespace
+        declarations; the rest of the pretty-printed XML is passed along as it is produced.
         """
-        return prettify_nsdecls(self.xml)
+        chunks = self._pkg_item.iter_pretty_xml()
+        head = ""
+        for chunk in chunks:
+            head += chunk
+            start = head.find("<", len(_XML_DECL))
+            if start >= 0 and head.find(">", start) >= 0:
+                break
+        yield prettify_nsdecls(head, self._pkg_item.root_element)
+        yield from chunks
@@ -2,11 +2,22 @@
 
 from __future__ import annotations
 
+import json
 import sys
-from typing import TYPE_CHECKING, Iterable
+from typing import TYPE_CHECKING, Iterable, Sequence
+
+from opcdiag.presenter import bytes_in_range, lines_in_range
 
 if TYPE_CHECKING:
-    from opcdiag.presenter import ItemPresenter
+    from opcdiag.phys_pkg import ItemEntry
+    from opcdiag.presenter import ItemPresenter, ItemStat
+
+_METHOD_NAMES = {0: "Stored", 8: "Deflate", 9: "Defl:64", 12: "BZip2", 14: "LZMA"}
+
+
+def _method_name(method: int) -> str:
+    """Display name of zip compression *method*, or its number when it has no common name."""
+    return _METHOD_NAMES.get(method, str(method))
 
 
 def _write(text: str):
@@ -14,9 +25,115 @@ def _write(text: str):
     sys.stdout.write(text)
 
 
+def _write_chunks(
+    chunks: Iterable[str],
+    line_range: tuple[int, int | None] | None = None,
+    byte_range: tuple[int, int | None] | None = None,
+):
+    """Write the text in *chunks* to stdout as it is produced, limited to any range given.
+
+    A *byte_range* selects bytes of the UTF-8 encoded text, so it is written to the binary buffer
+    beneath stdout; a multi-byte character can be split at either end, as with `cut -b`.
+    """
+    if byte_range is not None:
+        sys.stdout.flush()
+        for data in bytes_in_range(chunks, *byte_range):
+            sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+        return
+    if line_range is not None:
+        chunks = lines_in_range(chunks, *line_range)
+    for chunk in chunks:
+        _write(chunk)
+
+
 class OpcView:
     """Interfaces to the console by formatting command results for proper display."""
 
+    @staticmethod
+    def bisect_failed(reason: str):
+        """Write why `bisect` could not search the packages it was given to stdout."""
+        _write("bisect: %s; nothing to search\n" % reason)
+
+    @staticmethod
+    def culprits(uris: Iterable[str], item_count: int, check_count: int):
+        """Write the URI of each item found by `bisect`, followed by a summary line, to stdout."""
+        uris = list(uris)
+        lines = ["%s\n" % uri for uri in uris]
+        lines.append(
+            "%d of %d differing %s isolated in %d checks\n"
+            % (len(uris), item_count, "item" if item_count == 1 else "items", check_count)
+        )
+        _write("".join(lines))
+
+    @staticmethod
+    def diff_stat(item_stats: Sequence[ItemStat]):
+        """Write a `git diff --stat` style summary of *item_stats* to stdout.
+
+        Each changed item appears on its own line with its status and inserted and deleted line
+        counts, or its old and new size when it is a binary item, followed by a totals line.
+        """
+        if not item_stats:
+            _write("")
+            return
+        width = max(len(item_stat.uri) for item_stat in item_stats)
+        lines: list[str] = []
+        for item_stat in item_stats:
+            if item_stat.sizes is None:
+                counts = "+%d -%d" % (item_stat.insertions, item_stat.deletions)
+            else:
+                counts = "Bin %d -> %d bytes" % item_stat.sizes
+            lines.append(" %s %-*s | %s\n" % (item_stat.status, width, item_stat.uri, counts))
+        lines.append(
+            " %d %s changed, %d insertions(+), %d deletions(-)\n"
+            % (
+                len(item_stats),
+                "item" if len(item_stats) == 1 else "items",
+                sum(item_stat.insertions for item_stat in item_stats),
+                sum(item_stat.deletions for item_stat in item_stats),
+            )
+        )
+        _write("".join(lines))
+
+    @staticmethod
+    def item_entries(entries: Iterable[ItemEntry]):
+        """Write an `unzip -v` style listing of *entries* to stdout, one line per item."""
+        lines = ["    Length Compressed Method   CRC-32   Date       Time     URI\n"]
+        for entry in entries:
+            lines.append(
+                "%10d %10d %-8s %08x %04d-%02d-%02d %02d:%02d:%02d %s\n"
+                % (
+                    entry.size,
+                    entry.compressed_size,
+                    _method_name(entry.method),
+                    entry.crc,
+                    *entry.date_time,
+                    entry.uri,
+                )
+            )
+        _write("".join(lines))
+
+    @staticmethod
+    def item_entries_json(entries: Iterable[ItemEntry]):
+        """Write *entries* to stdout as a JSON array with one object per item."""
+        items = [
+            {
+                "uri": entry.uri,
+                "size": entry.size,
+                "compressed_size": entry.compressed_size,
+                "method": _method_name(entry.method),
+                "crc": "%08x" % entry.crc,
+                "date_time": "%04d-%02d-%02dT%02d:%02d:%02d" % entry.date_time,
+            }
+            for entry in entries
+        ]
+        _write("%s\n" % json.dumps(items, indent=2))
+
+    @staticmethod
+    def item_changes(item_changes: Iterable[tuple[str, str]]):
+        """Write a line like `M\tppt/presentation.xml` to stdout for each changed item."""
+        _write("".join("%s\t%s\n" % (status, uri) for status, uri in item_changes))
+
     @staticmethod
     def item_diff(diff: str):
         """Display *diff*, a standard unified_diff string, on stdout."""
@@ -27,23 +144,53 @@ class OpcView:
 
     @staticmethod
     def package_diff(
-        content_types_diff: str, rels_diffs: Iterable[str], xml_part_diffs: Iterable[str]
+        content_types_diff: str,
+        rels_diffs: Iterable[str],
+        xml_part_diffs: Iterable[str],
+        binary_diffs: Iterable[str] = (),
+        added_removed: Iterable[str] = (),
     ):
         """Write a consolidated diff between two packages to stdout.
 
-        Includes its *content_types_diff*, any *rels_diffs*, and any *xml_part_diffs*.
+        Any *added_removed* notices come first, as a single block, followed by the
+        *content_types_diff*, any *rels_diffs*, any *xml_part_diffs*, and any *binary_diffs*.
         """
-        diff_blocks = [content_types_diff] if content_types_diff else []
+        added_removed = list(added_removed)
+        diff_blocks = ["\n".join(added_removed)] if added_removed else []
+        if content_types_diff:
+            diff_blocks.append(content_types_diff)
         diff_blocks.extend(rels_diffs)
         diff_blocks.extend(xml_part_diffs)
+        diff_blocks.extend(binary_diffs)
         text = "%s\n" % "\n\n".join(diff_blocks) if diff_blocks else ""
         _write(text)
 
     @staticmethod
-    def pkg_item(presenter: ItemPresenter):
-        """Display the text value of pkg_item, adding a linefeed at end to make terminal happy."""
-        text = "%s\n" % presenter.text
-        _write(text)
+    def nodes(
+        texts: Iterable[str],
+        line_range: tuple[int, int | None] | None = None,
+        byte_range: tuple[int, int | None] | None = None,
+    ):
+        """Write each of *texts*, the XML or text of a selected node, to stdout as produced.
+
+        Output is limited to *line_range* or *byte_range* when one is given, as for
+        :meth:`pkg_item`.
+        """
+        _write_chunks(("%s\n" % text for text in texts), line_range, byte_range)
+
+    @staticmethod
+    def pkg_item(
+        presenter: ItemPresenter,
+        line_range: tuple[int, int | None] | None = None,
+        byte_range: tuple[int, int | None] | None = None,
+    ):
+        """Display the text value of pkg_item, adding a linefeed at end to make terminal happy.
+
+        The text is written as it is produced. *line_range* or *byte_range*, a 1-based
+        `(first, last)` pair where a *last* of |None| means through the end, limits output to
+        that part of the text, and no more of the text is produced than needed.
+        """
+        _write_chunks(presenter.text_chunks, line_range, byte_range)
 
     @staticmethod
     def substitute(uri: str, src_pkg_path: str, tgt_pkg_path: str, new_pkg_path: str):
@@ -59,3 +206,21 @@ class OpcView:
         )
         msg = msg.replace("\\", "/")  # normalize directory separator
         _write(msg)
+
+    @staticmethod
+    def updated(path: str, item_count: int):
+        """Write that the package or directory at *path* was brought up to date, now.
+
+        Written while watching, so stdout is flushed for the line to appear even when piped.
+        """
+        _write(
+            "updated '%s' (%d changed %s)\n"
+            % (path.replace("\\", "/"), item_count, "item" if item_count == 1 else "items")
+        )
+        sys.stdout.flush()
+
+    @staticmethod
+    def watching(path: str):
+        """Write that the package at *path* is being watched for changes, now."""
+        _write("watching '%s' for changes; press Ctrl-C to stop\n" % path.replace("\\", "/"))
+        sys.stdout.flush()
@@ -0,0 +1,69 @@
+"""Watch a package on disk for changes by polling the size and modification time of its files."""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import shutil
+import tempfile
+import time
+from typing import Generator, Iterator
+
+from opcdiag.phys_pkg import FileStat, PhysPkg
+
+
+def poll_changes(path: str, interval: float = 1.0) -> Iterator[set[str]]:
+    """Generate the set of changed files each time the package at *path* changes.
+
+    The files are stat'ed every *interval* seconds and nothing is read, so polling costs the same
+    whatever the size of the package. Each set holds the item URIs of the files of a directory
+    package that were added, removed or modified, or the filename of a zip package. A change is
+    only reported once two polls in a row agree, so a package is not picked up half-written, and
+    a package that is missing altogether, as while an editor replaces it, is waited out.
+    """
+    file_stats = PhysPkg.stat_files(path)
+    while True:
+        time.sleep(interval)
+        new_file_stats = PhysPkg.stat_files(path)
+        if new_file_stats == file_stats:
+            continue
+        new_file_stats = _settled_file_stats(path, new_file_stats, interval)
+        if not new_file_stats:
+            continue
+        changed = {
+            key
+            for key in file_stats.keys() | new_file_stats.keys()
+            if file_stats.get(key) != new_file_stats.get(key)
+        }
+        file_stats = new_file_stats
+        if changed:
+            yield changed
+
+
+@contextlib.contextmanager
+def snapshot(path: str) -> Generator[str, None, None]:
+    """Path of a copy of the zip package at *path*, deleted on exit, or *path* for a directory.
+
+    A zip package is read through a memory map of it, and an editor that rewrites a watched
+    package in place while it is mapped would crash the process with `SIGBUS`. A copy is never
+    written to, and its items and manifest all come from the same version of the package.
+    """
+    if os.path.isdir(path):
+        yield path
+        return
+    with tempfile.TemporaryDirectory() as tmp_dirpath:
+        snapshot_path = os.path.join(tmp_dirpath, os.path.basename(path))
+        shutil.copyfile(path, snapshot_path)
+        yield snapshot_path
+
+
+def _settled_file_stats(
+    path: str, file_stats: dict[str, FileStat], interval: float
+) -> dict[str, FileStat]:
+    """The file stats of the package at *path* once two polls in a row return the same ones."""
+    while True:
+        time.sleep(interval)
+        new_file_stats = PhysPkg.stat_files(path)
+        if new_file_stats == file_stats:
+            return file_stats
+        file_stats = new_file_stats
@@ -0,0 +1,198 @@
+"""Unit tests for `opcdiag.aio` module."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from opcdiag.aio import diff_item, diff_packages, read_package
+from opcdiag.model import C14nOptions, Package
+from opcdiag.phys_pkg import Manifest
+from opcdiag.presenter import PackageDiff
+
+from .unitutil import FixtureRequest, Mock, class_mock, instance_mock
+
+PKG_PATH = "pkg_path"
+PKG_2_PATH = "pkg_2_path"
+URI_CONTENT_TYPES = "[Content_Types].xml"
+URI_TAIL = "uri_tail"
+
+
+class DescribeReadPackage:
+    def it_reads_the_package_on_the_executor_it_is_given(
+        self, Package_: Mock, package_: Mock, capsys: pytest.CaptureFixture[str]
+    ):
+        main_thread = threading.current_thread()
+        read_threads: list[threading.Thread] = []
+
+        def read(path: str, uri_filter: object):
+            read_threads.append(threading.current_thread())
+            return package_
+
+        Package_.read.side_effect = read
+
+        with ThreadPoolExecutor(1) as executor:
+            package = asyncio.run(read_package(PKG_PATH, executor=executor))
+
+        Package_.read.assert_called_once_with(PKG_PATH, None)
+        assert package is package_
+        assert read_threads != [main_thread]
+        package_.canonicalize_xml.assert_not_called()
+        assert capsys.readouterr().out == ""
+
+    def it_can_canonicalize_the_xml_of_the_package_it_reads(self, Package_: Mock, package_: Mock):
+        options = C14nOptions(rewrite_prefixes=True)
+
+        package = asyncio.run(read_package(PKG_PATH, c14n=options))
+
+        assert package is package_
+        package_.canonicalize_xml.assert_called_once_with(options)
+
+
+class DescribeDiffItem:
+    def it_diffs_the_named_item_of_two_packages(
+        self, Package_: Mock, DiffPresenter_: Mock, package_: Mock, package_2_: Mock
+    ):
+        DiffPresenter_.named_item_diff.return_value = "diff"
+
+        diff = asyncio.run(diff_item(PKG_PATH, PKG_2_PATH, URI_TAIL))
+
+        assert {c.args[0] for c in Package_.read.call_args_list} == {PKG_PATH, PKG_2_PATH}
+        for call in Package_.read.call_args_list:
+            uri_filter = call.args[1]
+            assert [uri_filter(uri) for uri in ("a/uri_tail", "uri_tail.rels", "b.xml")] == [
+                True,
+                False,
+                False,
+            ]
+        DiffPresenter_.named_item_diff.assert_called_once_with(package_, package_2_, URI_TAIL)
+        assert diff == "diff"
+
+
+class DescribeDiffPackages:
+    def it_returns_the_differences_between_two_packages(
+        self,
+        Package_: Mock,
+        DiffPresenter_: Mock,
+        package_: Mock,
+        package_2_: Mock,
+        manifest_: Mock,
+        manifest_2_: Mock,
+        capsys: pytest.CaptureFixture[str],
+    ):
+        item_changes = [("M", URI_CONTENT_TYPES), ("M", "a.xml"), ("A", "b.xml"), ("M", "c.png")]
+        DiffPresenter_.item_changes.return_value = item_changes
+
+        package_diff = asyncio.run(diff_packages(PKG_PATH, PKG_2_PATH))
+
+        assert {c.args for c in Package_.read_manifest.call_args_list} == {
+            (PKG_PATH, None),
+            (PKG_2_PATH, None),
+        }
+        DiffPresenter_.item_changes.assert_called_once_with(manifest_, manifest_2_)
+        uri_filter = Package_.read.call_args.args[1]
+        assert [
+            uri_filter(uri) for uri in (URI_CONTENT_TYPES, "a.xml", "b.xml", "c.png", "d.xml")
+        ] == [True, True, False, False, False]
+        DiffPresenter_.named_item_diff.assert_called_once_with(
+            package_, package_2_, URI_CONTENT_TYPES
+        )
+        assert package_diff == PackageDiff(
+            item_changes, ["added"], "ct diff", ["rels diff"], ["xml diff"], ["binary diff"]
+        )
+        assert capsys.readouterr().out == ""
+
+    def but_it_skips_the_content_types_diff_when_it_is_unchanged(
+        self, Package_: Mock, DiffPresenter_: Mock, package_: Mock, package_2_: Mock
+    ):
+        DiffPresenter_.item_changes.return_value = [("M", "a.xml")]
+        options = C14nOptions()
+
+        package_diff = asyncio.run(diff_packages(PKG_PATH, PKG_2_PATH, c14n=options))
+
+        package_.canonicalize_xml.assert_called_once_with(options)
+        package_2_.canonicalize_xml.assert_called_once_with(options)
+        DiffPresenter_.named_item_diff.assert_not_called()
+        assert package_diff.content_types_diff == ""
+
+    # fixtures -------------------------------------------------------------
+
+    @pytest.fixture
+    def DiffPresenter_(self, request: FixtureRequest, DiffPresenter_: Mock):
+        DiffPresenter_.added_removed.return_value = ["added"]
+        DiffPresenter_.binary_diffs.return_value = ["binary diff"]
+        DiffPresenter_.named_item_diff.return_value = "ct diff"
+        DiffPresenter_.rels_diffs.return_value = ["rels diff"]
+        DiffPresenter_.xml_part_diffs.return_value = ["xml diff"]
+        return DiffPresenter_
+
+
+class DescribePackageDiff:
+    @pytest.mark.parametrize(
+        ("added_removed", "content_types_diff", "rels_diffs", "expected_value"),
+        [([], "", [], False), (["Only in a: b"], "", [], True), ([], "", ["diff"], True)],
+    )
+    def it_knows_whether_the_packages_differ(
+        self,
+        added_removed: list[str],
+        content_types_diff: str,
+        rels_diffs: list[str],
+        expected_value: bool,
+    ):
+        package_diff = PackageDiff(
+            [("M", "a.xml")], added_removed, content_types_diff, rels_diffs, [], []
+        )
+        assert package_diff.differs is expected_value
+
+
+# fixtures -------------------------------------------------------------
+
+
+@pytest.fixture
+def DiffPresenter_(request: FixtureRequest):
+    return class_mock("opcdiag.aio.DiffPresenter", request)
+
+
+@pytest.fixture
+def manifest_(request: FixtureRequest):
+    return instance_mock(Manifest, request)
+
+
+@pytest.fixture
+def manifest_2_(request: FixtureRequest):
+    return instance_mock(Manifest, request)
+
+
+@pytest.fixture
+def Package_(
+    request: FixtureRequest,
+    package_: Mock,
+    package_2_: Mock,
+    manifest_: Mock,
+    manifest_2_: Mock,
+):
+    # -- the two packages are read concurrently, so results are keyed by path, not call order --
+    Package_ = class_mock("opcdiag.aio.Package", request)
+
+    def read(path: str, uri_filter: object):
+        return package_ if path == PKG_PATH else package_2_
+
+    def read_manifest(path: str, uri_filter: object):
+        return manifest_ if path == PKG_PATH else manifest_2_
+
+    Package_.read.side_effect = read
+    Package_.read_manifest.side_effect = read_manifest
+    return Package_
+
+
+@pytest.fixture
+def package_(request: FixtureRequest):
+    return instance_mock(Package, request)
+
+
+@pytest.fixture
+def package_2_(request: FixtureRequest):
+    return instance_mock(Package, request)
@@ -0,0 +1,48 @@
+"""Unit tests for `opcdiag.bisection` module."""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from opcdiag.bisection import find_culprits
+
+URIS = ["a.xml", "b.xml", "c.xml", "d.xml", "e.xml", "f.xml", "g.xml", "h.xml"]
+
+
+class DescribeFindCulprits:
+    @pytest.mark.parametrize(
+        ("culprits", "expected_check_count"),
+        [
+            (["a.xml"], 6),
+            (["h.xml"], 6),
+            (["c.xml", "f.xml"], 10),
+            (["b.xml", "d.xml", "g.xml"], 12),
+            (URIS, 14),
+        ],
+    )
+    def it_finds_the_smallest_set_of_items_that_passes(
+        self, culprits: list[str], expected_check_count: int
+    ):
+        checked: list[list[str]] = []
+
+        def passes(uris: list[str]) -> bool:
+            checked.append(uris)
+            return set(culprits) <= set(uris)
+
+        with ThreadPoolExecutor(2) as executor:
+            assert find_culprits(list(reversed(URIS)), passes, executor) == culprits
+        assert len(checked) == expected_check_count
+
+    def it_checks_the_two_halves_of_each_round_at_the_same_time(self):
+        # -- each check waits for the other half's check, so checking one at a time times out --
+        barrier = threading.Barrier(2, timeout=5)
+
+        def passes(uris: list[str]) -> bool:
+            barrier.wait()
+            return "d.xml" in uris
+
+        with ThreadPoolExecutor(2) as executor:
+            assert find_culprits(URIS, passes, executor) == ["d.xml"]
@@ -5,21 +5,27 @@
 from __future__ import annotations
 
 import argparse
+import pathlib
+import sys
 
 import pytest
+from lxml import etree
 
 from opcdiag.cli import (
+    BisectCommand,
     BrowseCommand,
     Command,
     CommandController,
     DiffCommand,
     DiffItemCommand,
     ExtractCommand,
+    LsCommand,
     RepackageCommand,
     SubstituteCommand,
     main,
 )
 from opcdiag.controller import OpcController
+from opcdiag.model import C14nOptions, UriFilter
 
 from .unitutil import ANY, FixtureRequest, Mock, class_mock, instance_mock, loose_mock, relpath
 
@@ -31,10 +37,12 @@ ARG_NEW_PACKAGE = "NEW_PACKAGE"
 ARG_SRC_PKG_PATH = "SRC_PKG_PATH"
 ARG_TGT_PKG_PATH = "TGT_PKG_PATH"
 ARG_RESULT_PKG_PATH = "RESULT_PKG_PATH"
+CMD_WORD_BISECT = "bisect"
 CMD_WORD_BROWSE = "browse"
 CMD_WORD_DIFF = "diff"
 CMD_WORD_DIFF_ITEM = "diff-item"
 CMD_WORD_EXTRACT = "extract"
+CMD_WORD_LS = "ls"
 CMD_WORD_REPACKAGE = "repackage"
 CMD_WORD_SUBSTITUTE = "substitute"
 MINI_DIR_PKG_PATH = relpath("test-files/mini_pkg")
@@ -50,6 +58,12 @@ def app_controller_(request: FixtureRequest):
 def args_(request: FixtureRequest, command_: Mock):
     args_ = loose_mock(request)
     args_.command = command_
+    args_.include, args_.exclude = [], []
+    args_.xpath = None
+    args_.head = args_.lines = args_.bytes = None
+    args_.c14n = args_.rewrite_prefixes = args_.strip_text = False
+    args_.item, args_.items_from = [], None
+    args_.diff_cache = None
     return args_
 
 
@@ -200,6 +214,93 @@ class DescribeCommandController:
         command_.execute.assert_called_once_with(args_, app_controller_)
 
 
+class DescribeBisectCommand:
+    def it_should_add_a_bisect_command_parser(
+        self,
+        subparsers: argparse._SubParsersAction[argparse.ArgumentParser],
+        parser: argparse.ArgumentParser,
+    ):
+        BisectCommand.add_command_parser_to(subparsers)
+
+        args = parser.parse_args(
+            [CMD_WORD_BISECT, ARG_PKG_PATH, ARG_PKG_2_PATH, "--check", "validate -v", "-j", "1"]
+        )
+
+        assert args.good_pkg_path == ARG_PKG_PATH
+        assert args.bad_pkg_path == ARG_PKG_2_PATH
+        assert args.check == "validate -v"
+        assert args.jobs == 1
+
+    def but_it_checks_at_most_two_candidates_at_a_time(
+        self,
+        subparsers: argparse._SubParsersAction[argparse.ArgumentParser],
+        parser: argparse.ArgumentParser,
+        capsys: pytest.CaptureFixture[str],
+    ):
+        BisectCommand.add_command_parser_to(subparsers)
+        argv = [CMD_WORD_BISECT, ARG_PKG_PATH, ARG_PKG_2_PATH, "--check", "validate"]
+
+        assert parser.parse_args(argv).jobs == 2
+        with pytest.raises(SystemExit):
+            parser.parse_args(argv + ["-j", "4"])
+        assert "invalid choice: 4" in capsys.readouterr().err
+
+    @pytest.mark.parametrize(
+        ("good_pkg_path", "bad_pkg_path", "check", "err_frag"),
+        [
+            ("foobar", MINI_ZIP_PKG_PATH, "validate", "GOOD 'foobar' is not a zip package"),
+            (MINI_ZIP_PKG_PATH, MINI_DIR_PKG_PATH, "validate", "BAD"),
+            (MINI_ZIP_PKG_PATH, MINI_ZIP_PKG_PATH, "validate 'x", "invalid check command"),
+            (MINI_ZIP_PKG_PATH, MINI_ZIP_PKG_PATH, " ", "check command is empty"),
+            (MINI_ZIP_PKG_PATH, MINI_ZIP_PKG_PATH, "no-such-validator -v", "not found"),
+        ],
+    )
+    def it_should_trigger_parser_error_if_an_argument_is_invalid(
+        self,
+        good_pkg_path: str,
+        bad_pkg_path: str,
+        check: str,
+        err_frag: str,
+        args_: Mock,
+        parser_: Mock,
+    ):
+        args_.good_pkg_path, args_.bad_pkg_path, args_.check = good_pkg_path, bad_pkg_path, check
+        bisect_command = BisectCommand(parser_)
+
+        bisect_command.validate(args_)
+
+        parser_.error.assert_called_once_with(ANY)
+        assert err_frag in parser_.error.call_args[0][0]
+
+    def it_accepts_a_check_command_found_on_the_path(self, args_: Mock, parser_: Mock):
+        args_.good_pkg_path = args_.bad_pkg_path = MINI_ZIP_PKG_PATH
+        args_.check = "'%s' validate.py" % sys.executable
+        bisect_command = BisectCommand(parser_)
+
+        bisect_command.validate(args_)
+
+        parser_.error.assert_not_called()
+
+    @pytest.mark.parametrize("succeeded", [True, False])
+    def it_can_dispatch_a_bisect_command_to_the_app(
+        self, succeeded: bool, args_: Mock, app_controller_: Mock, parser_: Mock
+    ):
+        args_.check, args_.jobs = "validate --strict 'a b'", None
+        app_controller_.bisect.return_value = succeeded
+        bisect_command = BisectCommand(parser_)
+
+        if succeeded:
+            bisect_command.execute(args_, app_controller_)
+        else:
+            with pytest.raises(SystemExit) as exc_info:
+                bisect_command.execute(args_, app_controller_)
+            assert exc_info.value.code == 1
+
+        app_controller_.bisect.assert_called_once_with(
+            args_.good_pkg_path, args_.bad_pkg_path, ["validate", "--strict", "a b"], None
+        )
+
+
 class DescribeBrowseCommand:
     def it_should_add_a_browse_command_parser(
         self,
@@ -232,7 +333,77 @@ class DescribeBrowseCommand:
         # exercise ---------------------
         browse_command.execute(args_, app_controller_)
         # verify -----------------------
-        app_controller_.browse.assert_called_once_with(args_.pkg_path, args_.filename)
+        app_controller_.browse.assert_called_once_with(
+            args_.pkg_path, args_.filename, None, None, None
+        )
+
+    @pytest.mark.parametrize(
+        ("range_args", "line_range", "byte_range"),
+        [
+            (["--head", "20"], (1, 20), None),
+            (["--lines", "100:120"], (100, 120), None),
+            (["--lines", "100:"], (100, None), None),
+            (["--lines", ":5"], (1, 5), None),
+            (["--lines", "7"], (7, 7), None),
+            (["--bytes", "1:4096"], None, (1, 4096)),
+        ],
+    )
+    def it_can_dispatch_a_ranged_browse_command(
+        self,
+        range_args: list[str],
+        line_range: tuple[int, int | None] | None,
+        byte_range: tuple[int, int | None] | None,
+        app_controller_: Mock,
+    ):
+        parser = Command.parser()
+        args = parser.parse_args([CMD_WORD_BROWSE, ARG_PKG_PATH, ARG_FILENAME] + range_args)
+        args.command.execute(args, app_controller_)
+        app_controller_.browse.assert_called_once_with(
+            ARG_PKG_PATH, ARG_FILENAME, None, line_range, byte_range
+        )
+
+    @pytest.mark.parametrize(
+        "range_args",
+        [
+            ["--head", "0"],
+            ["--lines", "5:3"],
+            ["--lines", "a:b"],
+            ["--bytes", ""],
+            ["--head", "5", "--lines", "1:2"],
+        ],
+    )
+    def it_rejects_an_invalid_range(self, range_args: list[str]):
+        parser = Command.parser()
+        with pytest.raises(SystemExit):
+            parser.parse_args([CMD_WORD_BROWSE, ARG_PKG_PATH, ARG_FILENAME] + range_args)
+
+    def it_accepts_an_xpath_option(
+        self,
+        parser: argparse.ArgumentParser,
+        subparsers: argparse._SubParsersAction[argparse.ArgumentParser],
+    ):
+        BrowseCommand.add_command_parser_to(subparsers)
+        argv = [CMD_WORD_BROWSE, ARG_PKG_PATH, ARG_FILENAME, "--xpath", "//_:row"]
+        args = parser.parse_args(argv)
+        assert args.xpath == "//_:row"
+
+    def it_should_trigger_parser_error_if_xpath_is_invalid(self, args_: Mock, parser_: Mock):
+        args_.pkg_path = MINI_ZIP_PKG_PATH
+        args_.xpath = "//w:p["
+        BrowseCommand(parser_).validate(args_)
+        parser_.error.assert_called_once_with(ANY)
+
+    def and_if_xpath_uses_a_prefix_the_item_does_not_declare(
+        self, args_: Mock, app_controller_: Mock, parser_: Mock
+    ):
+        args_.xpath = "//zz:row"
+        app_controller_.browse.side_effect = etree.XPathEvalError("Undefined namespace prefix")
+
+        BrowseCommand(parser_).execute(args_, app_controller_)
+
+        parser_.error.assert_called_once_with(
+            "invalid XPath expression '//zz:row': Undefined namespace prefix"
+        )
 
 
 class DescribeDiffCommand:
@@ -248,8 +419,36 @@ class DescribeDiffCommand:
         # verify -----------------------
         assert args.pkg_1_path == ARG_PKG_PATH
         assert args.pkg_2_path == ARG_PKG_2_PATH
+        assert args.name_only is False
+        assert args.stat is False
+        assert args.quiet is False
         assert isinstance(subparser, argparse.ArgumentParser)
 
+    @pytest.mark.parametrize(
+        ("option", "name_only", "stat", "quiet"),
+        [
+            ("--name-only", True, False, False),
+            ("--stat", False, True, False),
+            ("--quiet", False, False, True),
+            ("-q", False, False, True),
+        ],
+    )
+    def it_should_accept_a_summary_option(
+        self,
+        option: str,
+        name_only: bool,
+        stat: bool,
+        quiet: bool,
+        parser: argparse.ArgumentParser,
+        subparsers: argparse._SubParsersAction[argparse.ArgumentParser],
+        diff_argv_: list[str],
+    ):
+        DiffCommand.add_command_parser_to(subparsers)
+        args = parser.parse_args(diff_argv_ + [option])
+        assert args.name_only is name_only
+        assert args.stat is stat
+        assert args.quiet is quiet
+
     @pytest.mark.parametrize(
         ("pkg_1_path", "pkg_2_path", "err_frag"),
         [
@@ -274,11 +473,156 @@ class DescribeDiffCommand:
         self, args_: Mock, app_controller_: Mock, parser_: Mock
     ):
         # fixture ----------------------
+        args_.name_only, args_.stat, args_.quiet = False, False, False
         diff_command = DiffCommand(parser_)
         # exercise ---------------------
         diff_command.execute(args_, app_controller_)
         # verify -----------------------
-        app_controller_.diff_pkg.assert_called_once_with(args_.pkg_1_path, args_.pkg_2_path)
+        app_controller_.diff_pkg.assert_called_once_with(
+            args_.pkg_1_path, args_.pkg_2_path, None, None, None
+        )
+
+    @pytest.mark.parametrize(
+        ("name_only", "stat", "method_name", "trailing_args"),
+        [
+            (True, False, "diff_pkg_names", (None,)),
+            (False, True, "diff_pkg_stat", (None, None)),
+        ],
+    )
+    def it_can_dispatch_a_diff_summary_command_to_the_app(
+        self,
+        name_only: bool,
+        stat: bool,
+        method_name: str,
+        trailing_args: tuple[None, ...],
+        args_: Mock,
+        app_controller_: Mock,
+        parser_: Mock,
+    ):
+        args_.name_only, args_.stat, args_.quiet = name_only, stat, False
+        diff_command = DiffCommand(parser_)
+
+        diff_command.execute(args_, app_controller_)
+
+        getattr(app_controller_, method_name).assert_called_once_with(
+            args_.pkg_1_path, args_.pkg_2_path, *trailing_args
+        )
+        app_controller_.diff_pkg.assert_not_called()
+
+    def it_exits_with_status_1_when_a_quiet_diff_finds_a_difference(
+        self, args_: Mock, app_controller_: Mock, parser_: Mock
+    ):
+        args_.quiet = True
+        app_controller_.diff_pkg_quiet.return_value = True
+        diff_command = DiffCommand(parser_)
+
+        with pytest.raises(SystemExit) as exc_info:
+            diff_command.execute(args_, app_controller_)
+
+        app_controller_.diff_pkg_quiet.assert_called_once_with(
+            args_.pkg_1_path, args_.pkg_2_path, None, None
+        )
+        assert exc_info.value.code == 1
+
+    def it_returns_normally_when_a_quiet_diff_finds_no_difference(
+        self, args_: Mock, app_controller_: Mock, parser_: Mock
+    ):
+        args_.quiet = True
+        app_controller_.diff_pkg_quiet.return_value = False
+        diff_command = DiffCommand(parser_)
+
+        diff_command.execute(args_, app_controller_)
+
+        app_controller_.diff_pkg.assert_not_called()
+
+    def it_passes_a_uri_filter_built_from_include_and_exclude_options(
+        self, args_: Mock, app_controller_: Mock, parser_: Mock
+    ):
+        args_.name_only, args_.stat, args_.quiet = False, False, False
+        args_.include, args_.exclude = ["ppt/**"], ["**/media/*"]
+        diff_command = DiffCommand(parser_)
+
+        diff_command.execute(args_, app_controller_)
+
+        uri_filter = app_controller_.diff_pkg.call_args.args[2]
+        assert isinstance(uri_filter, UriFilter)
+        assert uri_filter("ppt/slides/slide1.xml") is True
+        assert uri_filter("ppt/media/image1.png") is False
+        assert uri_filter("word/document.xml") is False
+
+    @pytest.mark.parametrize(
+        ("c14n", "rewrite_prefixes", "strip_text", "expected_value"),
+        [
+            (True, False, False, C14nOptions(False, False)),
+            (False, True, False, C14nOptions(True, False)),
+            (False, False, True, C14nOptions(False, True)),
+            (True, True, True, C14nOptions(True, True)),
+        ],
+    )
+    def it_passes_c14n_options_when_canonicalization_is_asked_for(
+        self,
+        c14n: bool,
+        rewrite_prefixes: bool,
+        strip_text: bool,
+        expected_value: C14nOptions,
+        args_: Mock,
+        app_controller_: Mock,
+        parser_: Mock,
+    ):
+        args_.name_only, args_.stat, args_.quiet = False, False, False
+        args_.c14n, args_.rewrite_prefixes, args_.strip_text = c14n, rewrite_prefixes, strip_text
+        diff_command = DiffCommand(parser_)
+
+        diff_command.execute(args_, app_controller_)
+
+        app_controller_.diff_pkg.assert_called_once_with(
+            args_.pkg_1_path, args_.pkg_2_path, None, expected_value, None
+        )
+
+    def it_accepts_diff_cache_options(
+        self,
+        subparsers: argparse._SubParsersAction[argparse.ArgumentParser],
+        parser: argparse.ArgumentParser,
+        diff_argv_: list[str],
+    ):
+        DiffCommand.add_command_parser_to(subparsers)
+
+        default_args = parser.parse_args(diff_argv_)
+        args = parser.parse_args(
+            diff_argv_ + ["--diff-cache", "diffs.db", "--diff-cache-size", "8"]
+        )
+
+        assert (default_args.diff_cache, default_args.diff_cache_size) == (None, 64)
+        assert (args.diff_cache, args.diff_cache_size) == ("diffs.db", 8)
+
+    def it_passes_a_diff_cache_when_a_cache_file_is_given(
+        self, request: FixtureRequest, args_: Mock, app_controller_: Mock, parser_: Mock
+    ):
+        DiffCache_ = class_mock("opcdiag.cli.DiffCache", request)
+        args_.name_only, args_.stat, args_.quiet = False, False, False
+        args_.diff_cache, args_.diff_cache_size = "diffs.db", 8
+        diff_command = DiffCommand(parser_)
+
+        diff_command.execute(args_, app_controller_)
+
+        DiffCache_.assert_called_once_with("diffs.db", 8 * 1024 * 1024)
+        app_controller_.diff_pkg.assert_called_once_with(
+            args_.pkg_1_path, args_.pkg_2_path, None, None, DiffCache_.return_value
+        )
+        DiffCache_.return_value.close.assert_called_once_with()
+
+    @pytest.mark.parametrize("summary", ["name_only", "stat", "quiet"])
+    def but_it_rejects_a_diff_cache_for_a_summary(self, summary: str, args_: Mock, parser_: Mock):
+        args_.pkg_1_path = args_.pkg_2_path = MINI_ZIP_PKG_PATH
+        args_.name_only, args_.stat, args_.quiet = False, False, False
+        setattr(args_, summary, True)
+        args_.diff_cache = "diffs.db"
+        diff_command = DiffCommand(parser_)
+
+        diff_command.validate(args_)
+
+        parser_.error.assert_called_once_with(ANY)
+        assert "--diff-cache cannot be used with" in parser_.error.call_args[0][0]
 
 
 class DescribeDiffItemCommand:
@@ -326,7 +670,7 @@ class DescribeDiffItemCommand:
         diff_item_command.execute(args_, app_controller_)
         # verify -----------------------
         app_controller_.diff_item.assert_called_once_with(
-            args_.pkg_1_path, args_.pkg_2_path, args_.filename
+            args_.pkg_1_path, args_.pkg_2_path, args_.filename, None, None
         )
 
 
@@ -343,8 +687,43 @@ class DescribeExtractCommand:
         # verify -----------------------
         assert args.pkg_path == ARG_PKG_PATH
         assert args.dirpath == ARG_DIRPATH
+        assert args.include == []
+        assert args.exclude == []
+        assert args.raw is False
+        assert args.watch is False
+        assert args.interval == 1.0
         assert isinstance(subparser, argparse.ArgumentParser)
 
+    def it_accepts_repeated_include_and_exclude_options(
+        self,
+        extract_argv_: list[str],
+        parser: argparse.ArgumentParser,
+        subparsers: argparse._SubParsersAction[argparse.ArgumentParser],
+    ):
+        ExtractCommand.add_command_parser_to(subparsers)
+        args = parser.parse_args(
+            extract_argv_ + ["--include", "a/*", "--include", "!b/*", "--exclude", "c/*"]
+        )
+        assert args.include == ["a/*", "!b/*"]
+        assert args.exclude == ["c/*"]
+
+    def it_accepts_watch_options(
+        self,
+        extract_argv_: list[str],
+        parser: argparse.ArgumentParser,
+        subparsers: argparse._SubParsersAction[argparse.ArgumentParser],
+    ):
+        ExtractCommand.add_command_parser_to(subparsers)
+        args = parser.parse_args(extract_argv_ + ["--watch", "--interval", "0.25"])
+        assert args.watch is True
+        assert args.interval == 0.25
+
+    @pytest.mark.parametrize("interval", ["0", "-1", "abc", "nan"])
+    def it_rejects_an_interval_that_is_not_a_positive_number(self, interval: str):
+        parser = Command.parser()
+        with pytest.raises(SystemExit):
+            parser.parse_args(["extract", ARG_PKG_PATH, ARG_DIRPATH, "--interval", interval])
+
     def it_should_trigger_parser_error_if_pkg_path_does_not_exist(self, args_: Mock, parser_: Mock):
         # fixture ----------------------
         args_.pkg_path = "foobar"
@@ -363,7 +742,55 @@ class DescribeExtractCommand:
         # exercise ---------------------
         extract_command.execute(args_, app_controller_)
         # verify -----------------------
-        app_controller_.extract_package.assert_called_once_with(args_.pkg_path, args_.dirpath)
+        app_controller_.extract_package.assert_called_once_with(
+            args_.pkg_path, args_.dirpath, None, args_.raw, args_.watch, args_.interval
+        )
+
+
+class DescribeLsCommand:
+    def it_should_add_an_ls_command_parser(
+        self,
+        parser: argparse.ArgumentParser,
+        subparsers: argparse._SubParsersAction[argparse.ArgumentParser],
+    ):
+        subparser = LsCommand.add_command_parser_to(subparsers)
+        args = parser.parse_args([CMD_WORD_LS, ARG_PKG_PATH])
+        assert args.pkg_path == ARG_PKG_PATH
+        assert args.sort == "uri"
+        assert args.reverse is False
+        assert args.json is False
+        assert isinstance(subparser, argparse.ArgumentParser)
+
+    def it_accepts_sort_and_json_options(
+        self,
+        parser: argparse.ArgumentParser,
+        subparsers: argparse._SubParsersAction[argparse.ArgumentParser],
+    ):
+        LsCommand.add_command_parser_to(subparsers)
+        args = parser.parse_args([CMD_WORD_LS, ARG_PKG_PATH, "--sort", "size", "-r", "--json"])
+        assert args.sort == "size"
+        assert args.reverse is True
+        assert args.json is True
+
+    def it_should_trigger_parser_error_if_pkg_path_does_not_exist(self, args_: Mock, parser_: Mock):
+        args_.pkg_path = "foobar"
+        ls_command = LsCommand(parser_)
+
+        ls_command.validate(args_)
+
+        parser_.error.assert_called_once_with(ANY)
+        assert "PKG_PATH" in parser_.error.call_args[0][0]
+
+    def it_can_dispatch_an_ls_command_to_the_app(
+        self, args_: Mock, app_controller_: Mock, parser_: Mock
+    ):
+        ls_command = LsCommand(parser_)
+
+        ls_command.execute(args_, app_controller_)
+
+        app_controller_.list_items.assert_called_once_with(
+            args_.pkg_path, args_.sort, args_.reverse, args_.json, None
+        )
 
 
 class DescribeRepackageCommand:
@@ -379,6 +806,8 @@ class DescribeRepackageCommand:
         # verify -----------------------
         assert args.dirpath == ARG_DIRPATH
         assert args.new_package == ARG_NEW_PACKAGE
+        assert args.watch is False
+        assert args.interval == 1.0
         assert isinstance(subparser, argparse.ArgumentParser)
 
     def it_should_trigger_parser_error_if_dirpath_not_a_directory(self, args_: Mock, parser_: Mock):
@@ -400,7 +829,9 @@ class DescribeRepackageCommand:
         # exercise ---------------------
         repackage_command.execute(args_, app_controller_)
         # verify -----------------------
-        app_controller_.repackage.assert_called_once_with(args_.dirpath, args_.new_package)
+        app_controller_.repackage.assert_called_once_with(
+            args_.dirpath, args_.new_package, None, args_.watch, args_.interval
+        )
 
 
 class DescribeSubstituteCommand:
@@ -418,8 +849,25 @@ class DescribeSubstituteCommand:
         assert args.src_pkg_path == ARG_SRC_PKG_PATH
         assert args.tgt_pkg_path == ARG_TGT_PKG_PATH
         assert args.result_pkg_path == ARG_RESULT_PKG_PATH
+        assert args.item == []
+        assert args.items_from is None
         assert isinstance(subparser, argparse.ArgumentParser)
 
+    def it_accepts_items_named_by_option_in_place_of_filename(
+        self,
+        parser: argparse.ArgumentParser,
+        subparsers: argparse._SubParsersAction[argparse.ArgumentParser],
+    ):
+        SubstituteCommand.add_command_parser_to(subparsers)
+        args = parser.parse_args(
+            [CMD_WORD_SUBSTITUTE, "--item", "a/*", "--item", "b.xml"]
+            + [ARG_SRC_PKG_PATH, ARG_TGT_PKG_PATH, ARG_RESULT_PKG_PATH]
+        )
+        assert args.filename is None
+        assert args.item == ["a/*", "b.xml"]
+        assert args.src_pkg_path == ARG_SRC_PKG_PATH
+        assert args.result_pkg_path == ARG_RESULT_PKG_PATH
+
     @pytest.mark.parametrize(
         ("src_pkg_path", "tgt_pkg_path", "err_frag"),
         [
@@ -440,16 +888,35 @@ class DescribeSubstituteCommand:
         parser_.error.assert_called_once_with(ANY)
         assert err_frag in parser_.error.call_args[0][0]
 
+    @pytest.mark.parametrize(
+        ("items_from", "err_frag"), [("foobar", "--items-from FILE"), (None, "name a part")]
+    )
+    def it_should_trigger_parser_error_if_no_item_is_named(
+        self, items_from: str | None, err_frag: str, args_: Mock, parser_: Mock
+    ):
+        args_.src_pkg_path = args_.tgt_pkg_path = MINI_ZIP_PKG_PATH
+        args_.filename, args_.items_from = None, items_from
+        substitute_command = SubstituteCommand(parser_)
+
+        substitute_command.validate(args_)
+
+        parser_.error.assert_called_once_with(ANY)
+        assert err_frag in parser_.error.call_args[0][0]
+
     def it_can_dispatch_a_substitute_command_to_the_app(
-        self, args_: Mock, app_controller_: Mock, parser_: Mock
+        self, args_: Mock, app_controller_: Mock, parser_: Mock, tmp_path: pathlib.Path
     ):
         # fixture ----------------------
+        items_from = tmp_path / "items.txt"
+        items_from.write_text("# layouts\nppt/slideLayouts/*\n\n  theme1.xml\n")
+        args_.filename, args_.item = "core.xml", ["app.xml"]
+        args_.items_from = str(items_from)
         substitute_command = SubstituteCommand(parser_)
         # exercise ---------------------
         substitute_command.execute(args_, app_controller_)
         # verify -----------------------
         app_controller_.substitute.assert_called_once_with(
-            args_.filename,
+            ["core.xml", "app.xml", "ppt/slideLayouts/*", "theme1.xml"],
             args_.src_pkg_path,
             args_.tgt_pkg_path,
             args_.result_pkg_path,
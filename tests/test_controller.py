@@ -1,25 +1,98 @@
 """Unit tests for `opcdiag.controller` module."""
 
+import contextlib
+import os
+import threading
 from unittest.mock import call
 
 import pytest
 
 from opcdiag.controller import OpcController
-from opcdiag.model import Package, PkgItem
+from opcdiag.diff_cache import DiffCache
+from opcdiag.model import C14nOptions, Package, PkgItem, UriFilter
+from opcdiag.phys_pkg import ItemEntry, Manifest
 from opcdiag.presenter import ItemPresenter
 
-from .unitutil import FixtureRequest, Mock, class_mock, instance_mock
+from .unitutil import ANY, FixtureRequest, Mock, class_mock, function_mock, instance_mock
 
 DIRPATH = "dirpath"
 NEW_PKG_PATH = "new_pkg_path"
 PKG_PATH = "pkg_path"
 PKG_2_PATH = "pkg_2_path"
 PKG_3_PATH = "pkg_3_path"
+SNAPSHOT_PATH = "snapshot_path"
 URI_CONTENT_TYPES = "[Content_Types].xml"
 URI_TAIL = "uri_tail"
 
 
 class DescribeOpcController:
+    def it_can_execute_a_bisect_command(
+        self,
+        Package_: Mock,
+        DiffPresenter_: Mock,
+        manifest_: Mock,
+        manifest_2_: Mock,
+        _check_passes_: Mock,
+        OpcView_: Mock,
+    ):
+        DiffPresenter_.item_changes.return_value = [("M", "a.xml"), ("A", "b.xml"), ("D", "c.xml")]
+        candidates: dict[str, list[str]] = {}
+
+        def splice(base_path: str, donor_path: str, uris: list[str], new_path: str):
+            candidates[new_path] = uris
+            open(new_path, "wb").close()
+
+        def check_passes(check_cmd: list[str], pkg_path: str) -> bool:
+            return "b.xml" in candidates[pkg_path]
+
+        Package_.splice.side_effect = splice
+        _check_passes_.side_effect = check_passes
+
+        succeeded = OpcController().bisect(PKG_PATH, PKG_2_PATH, ["check"], jobs=2)
+
+        DiffPresenter_.item_changes.assert_called_once_with(manifest_2_, manifest_)
+        assert {c.args[:2] for c in Package_.splice.call_args_list} == {(PKG_2_PATH, PKG_PATH)}
+        assert all(c.args[0] == ["check"] for c in _check_passes_.call_args_list)
+        assert not any(os.path.exists(path) for path in candidates)
+        OpcView_.culprits.assert_called_once_with(["b.xml"], 3, 6)
+        assert succeeded is True
+
+    @pytest.mark.parametrize(
+        ("item_changes", "check_results", "reason"),
+        [
+            ([], [], "the packages do not differ"),
+            ([("M", "a.xml")], [True, True], "the bad package passes the check"),
+            (
+                [("M", "a.xml")],
+                [False, False],
+                "the check fails with every differing item substituted",
+            ),
+        ],
+    )
+    def but_it_stops_when_there_is_nothing_to_search(
+        self,
+        item_changes: list[tuple[str, str]],
+        check_results: list[bool],
+        reason: str,
+        Package_: Mock,
+        DiffPresenter_: Mock,
+        _check_passes_: Mock,
+        OpcView_: Mock,
+    ):
+        DiffPresenter_.item_changes.return_value = item_changes
+
+        def splice(base_path: str, donor_path: str, uris: list[str], new_path: str):
+            open(new_path, "wb").close()
+
+        Package_.splice.side_effect = splice
+        _check_passes_.side_effect = check_results
+
+        succeeded = OpcController().bisect(PKG_PATH, PKG_2_PATH, ["check"], jobs=1)
+
+        OpcView_.bisect_failed.assert_called_once_with(reason)
+        OpcView_.culprits.assert_not_called()
+        assert succeeded is False
+
     def it_can_execute_a_browse_command(
         self,
         Package_: Mock,
@@ -30,12 +103,25 @@ class DescribeOpcController:
         OpcView_: Mock,
     ):
         # exercise ---------------------
-        OpcController().browse(PKG_PATH, URI_TAIL)
+        OpcController().browse(PKG_PATH, URI_TAIL, line_range=(1, 20))
         # verify -----------------------
-        Package_.read.assert_called_once_with(PKG_PATH)
+        Package_.open.assert_called_once_with(PKG_PATH, ANY)
+        uri_filter = Package_.open.call_args.args[1]
+        assert uri_filter("foo/%s" % URI_TAIL)
+        assert not uri_filter("foo/bar")
         package_.find_item_by_uri_tail.assert_called_once_with(URI_TAIL)
         ItemPresenter_.assert_called_once_with(pkg_item_)
-        OpcView_.pkg_item.assert_called_once_with(item_presenter_)
+        OpcView_.pkg_item.assert_called_once_with(item_presenter_, (1, 20), None)
+        package_.__exit__.assert_called_once_with(None, None, None)
+
+    def it_can_execute_a_browse_command_selecting_nodes_by_xpath(
+        self, Package_: Mock, package_: Mock, pkg_item_: Mock, OpcView_: Mock
+    ):
+        OpcController().browse(PKG_PATH, URI_TAIL, "//_:row")
+        package_.find_item_by_uri_tail.assert_called_once_with(URI_TAIL)
+        pkg_item_.select.assert_called_once_with("//_:row")
+        OpcView_.nodes.assert_called_once_with(pkg_item_.select.return_value, None, None)
+        OpcView_.pkg_item.assert_not_called()
 
     def it_can_execute_a_diff_pkg_command(
         self,
@@ -43,22 +129,156 @@ class DescribeOpcController:
         DiffPresenter_: Mock,
         package_: Mock,
         package_2_: Mock,
+        manifest_: Mock,
+        manifest_2_: Mock,
+        added_removed_: Mock,
         item_diff_: Mock,
         rels_diffs_: Mock,
         xml_part_diffs_: Mock,
+        binary_diffs_: Mock,
         OpcView_: Mock,
+        diff_cache_: Mock,
     ):
+        # fixture ----------------------
+        DiffPresenter_.item_changes.return_value = [
+            ("M", URI_CONTENT_TYPES),
+            ("M", "a.xml"),
+            ("A", "b.xml"),
+            ("M", "c.png"),
+        ]
         # exercise ---------------------
-        OpcController().diff_pkg(PKG_PATH, PKG_2_PATH)
-        # expected values --------------
-        expected_Package_read_calls = [call(PKG_PATH), call(PKG_2_PATH)]
-        Package_.read.assert_has_calls(expected_Package_read_calls)
+        OpcController().diff_pkg(PKG_PATH, PKG_2_PATH, cache=diff_cache_)
+        # verify -----------------------
+        assert Package_.read_manifest.call_args_list == [
+            call(PKG_PATH, None),
+            call(PKG_2_PATH, None),
+        ]
+        DiffPresenter_.added_removed.assert_called_once_with(manifest_, manifest_2_)
+        DiffPresenter_.item_changes.assert_called_once_with(manifest_, manifest_2_)
+        Package_.read.assert_has_calls([call(PKG_PATH, ANY), call(PKG_2_PATH, ANY)], any_order=True)
+        uri_filter = Package_.read.call_args.args[1]
+        assert [
+            uri_filter(uri) for uri in (URI_CONTENT_TYPES, "a.xml", "b.xml", "c.png", "d.xml")
+        ] == [True, True, False, False, False]
         DiffPresenter_.named_item_diff.assert_called_once_with(
-            package_, package_2_, URI_CONTENT_TYPES
+            package_, package_2_, URI_CONTENT_TYPES, diff_cache_
+        )
+        DiffPresenter_.rels_diffs.assert_called_once_with(package_, package_2_, diff_cache_)
+        DiffPresenter_.xml_part_diffs.assert_called_once_with(package_, package_2_, diff_cache_)
+        DiffPresenter_.binary_diffs.assert_called_once_with(manifest_, manifest_2_)
+        OpcView_.package_diff.assert_called_once_with(
+            item_diff_, rels_diffs_, xml_part_diffs_, binary_diffs_, added_removed_
+        )
+
+    def it_can_execute_a_diff_pkg_names_command(
+        self,
+        Package_: Mock,
+        DiffPresenter_: Mock,
+        manifest_: Mock,
+        manifest_2_: Mock,
+        item_changes_: Mock,
+        OpcView_: Mock,
+    ):
+        # exercise ---------------------
+        OpcController().diff_pkg_names(PKG_PATH, PKG_2_PATH)
+        # verify -----------------------
+        assert Package_.read_manifest.call_args_list == [
+            call(PKG_PATH, None),
+            call(PKG_2_PATH, None),
+        ]
+        Package_.read.assert_not_called()
+        DiffPresenter_.item_changes.assert_called_once_with(manifest_, manifest_2_)
+        OpcView_.item_changes.assert_called_once_with(item_changes_)
+
+    @pytest.mark.parametrize(
+        ("item_changes", "expected_value"),
+        [
+            ([], False),
+            ([("M", "a.xml"), ("A", "b.xml")], True),
+            ([("M", "a.xml"), ("M", "media/image1.png")], True),
+        ],
+    )
+    def it_can_execute_a_diff_pkg_quiet_command_from_the_manifests_alone(
+        self,
+        item_changes: list[tuple[str, str]],
+        expected_value: bool,
+        Package_: Mock,
+        DiffPresenter_: Mock,
+        manifest_: Mock,
+        manifest_2_: Mock,
+        OpcView_: Mock,
+    ):
+        DiffPresenter_.item_changes.return_value = item_changes
+
+        differ = OpcController().diff_pkg_quiet(PKG_PATH, PKG_2_PATH)
+
+        DiffPresenter_.item_changes.assert_called_once_with(manifest_, manifest_2_)
+        Package_.read.assert_not_called()
+        assert differ is expected_value
+        assert OpcView_.mock_calls == []
+
+    def it_loads_only_changed_items_for_a_diff_pkg_quiet_command(
+        self, Package_: Mock, package_: Mock, package_2_: Mock, DiffPresenter_: Mock
+    ):
+        DiffPresenter_.item_changes.return_value = [("M", "a.xml"), ("M", "b.xml")]
+        DiffPresenter_.items_differ.return_value = True
+
+        differ = OpcController().diff_pkg_quiet(PKG_PATH, PKG_2_PATH)
+
+        Package_.read.assert_has_calls([call(PKG_PATH, ANY), call(PKG_2_PATH, ANY)], any_order=True)
+        uri_filter = Package_.read.call_args.args[1]
+        assert [uri_filter(uri) for uri in ("a.xml", "b.xml", "c.xml")] == [True, True, False]
+        DiffPresenter_.items_differ.assert_called_once_with(
+            package_, package_2_, ["a.xml", "b.xml"]
+        )
+        assert differ is True
+
+    def it_can_execute_a_diff_pkg_stat_command(
+        self,
+        Package_: Mock,
+        package_: Mock,
+        package_2_: Mock,
+        DiffPresenter_: Mock,
+        manifest_: Mock,
+        manifest_2_: Mock,
+        item_changes_: Mock,
+        diff_stats_: Mock,
+        OpcView_: Mock,
+    ):
+        # exercise ---------------------
+        OpcController().diff_pkg_stat(PKG_PATH, PKG_2_PATH)
+        # verify -----------------------
+        assert Package_.read_manifest.call_args_list == [
+            call(PKG_PATH, None),
+            call(PKG_2_PATH, None),
+        ]
+        DiffPresenter_.item_changes.assert_called_once_with(manifest_, manifest_2_)
+        DiffPresenter_.diff_stats.assert_called_once_with(package_, package_2_, item_changes_)
+        OpcView_.diff_stat.assert_called_once_with(diff_stats_)
+
+    def it_skips_the_content_types_diff_when_it_is_unchanged(
+        self,
+        Package_: Mock,
+        DiffPresenter_: Mock,
+        OpcView_: Mock,
+        added_removed_: Mock,
+        rels_diffs_: Mock,
+        xml_part_diffs_: Mock,
+        binary_diffs_: Mock,
+    ):
+        DiffPresenter_.item_changes.return_value = [("M", "ppt/slides/slide1.xml")]
+        uri_filter = UriFilter(["ppt/**"])
+
+        OpcController().diff_pkg(PKG_PATH, PKG_2_PATH, uri_filter)
+
+        assert [c.args[1] for c in Package_.read_manifest.call_args_list] == [
+            uri_filter,
+            uri_filter,
+        ]
+        DiffPresenter_.named_item_diff.assert_not_called()
+        OpcView_.package_diff.assert_called_once_with(
+            "", rels_diffs_, xml_part_diffs_, binary_diffs_, added_removed_
         )
-        DiffPresenter_.rels_diffs.assert_called_once_with(package_, package_2_)
-        DiffPresenter_.xml_part_diffs.assert_called_once_with(package_, package_2_)
-        OpcView_.package_diff.assert_called_once_with(item_diff_, rels_diffs_, xml_part_diffs_)
 
     def it_can_execute_a_diff_item_command(
         self,
@@ -68,56 +288,234 @@ class DescribeOpcController:
         DiffPresenter_: Mock,
         item_diff_: Mock,
         OpcView_: Mock,
+        diff_cache_: Mock,
     ):
         # exercise ---------------------
-        OpcController().diff_item(PKG_PATH, PKG_2_PATH, URI_TAIL)
+        OpcController().diff_item(PKG_PATH, PKG_2_PATH, URI_TAIL, cache=diff_cache_)
         # expected values --------------
-        expected_Package_read_calls = [call(PKG_PATH), call(PKG_2_PATH)]
+        expected_Package_open_calls = [call(PKG_PATH, ANY), call(PKG_2_PATH, ANY)]
         # verify -----------------------
-        Package_.read.assert_has_calls(expected_Package_read_calls)
-        DiffPresenter_.named_item_diff.assert_called_once_with(package_, package_2_, URI_TAIL)
+        Package_.open.assert_has_calls(expected_Package_open_calls, any_order=True)
+        Package_.read.assert_not_called()
+        uri_filter = Package_.open.call_args.args[1]
+        assert uri_filter("foo/%s" % URI_TAIL)
+        assert not uri_filter("foo/bar")
+        package_.canonicalize_xml.assert_not_called()
+        package_.__exit__.assert_called_once_with(None, None, None)
+        package_2_.__exit__.assert_called_once_with(None, None, None)
+        DiffPresenter_.named_item_diff.assert_called_once_with(
+            package_, package_2_, URI_TAIL, diff_cache_
+        )
         OpcView_.item_diff.assert_called_once_with(item_diff_)
 
-    def it_can_execute_an_extract_package_command(self, Package_: Mock, package_: Mock):
+    def it_reads_the_two_packages_at_the_same_time(
+        self, Package_: Mock, package_: Mock, package_2_: Mock, DiffPresenter_: Mock
+    ):
+        # -- each read waits for the other, so reading one at a time times out --
+        barrier = threading.Barrier(2, timeout=5)
+        packages = {PKG_PATH: package_, PKG_2_PATH: package_2_}
+
+        def read(path: str, *args: object) -> Mock:
+            barrier.wait()
+            return packages[path]
+
+        Package_.open.side_effect = read
+
+        OpcController().diff_item(PKG_PATH, PKG_2_PATH, URI_TAIL, C14nOptions())
+
+        package_.canonicalize_xml.assert_called_once_with(C14nOptions())
+        package_2_.canonicalize_xml.assert_called_once_with(C14nOptions())
+        DiffPresenter_.named_item_diff.assert_called_once_with(package_, package_2_, URI_TAIL, None)
+
+    @pytest.mark.parametrize("failing_path", [PKG_PATH, PKG_2_PATH])
+    def it_closes_one_package_when_the_other_cannot_be_opened(
+        self, failing_path: str, Package_: Mock, package_: Mock, DiffPresenter_: Mock
+    ):
+        def open_(path: str, *args: object) -> Mock:
+            if path == failing_path:
+                raise FileNotFoundError(path)
+            return package_
+
+        Package_.open.side_effect = open_
+
+        with pytest.raises(FileNotFoundError):
+            OpcController().diff_item(PKG_PATH, PKG_2_PATH, URI_TAIL)
+
+        package_.close.assert_called_once_with()
+        DiffPresenter_.named_item_diff.assert_not_called()
+
+    def it_can_canonicalize_the_xml_of_the_packages_it_diffs(
+        self,
+        Package_: Mock,
+        package_: Mock,
+        package_2_: Mock,
+        DiffPresenter_: Mock,
+        OpcView_: Mock,
+    ):
+        c14n = C14nOptions(rewrite_prefixes=True)
+        OpcController().diff_item(PKG_PATH, PKG_2_PATH, URI_TAIL, c14n)
+        package_.canonicalize_xml.assert_called_once_with(c14n)
+        package_2_.canonicalize_xml.assert_called_once_with(c14n)
+        DiffPresenter_.named_item_diff.assert_called_once_with(package_, package_2_, URI_TAIL, None)
+
+    @pytest.mark.parametrize("raw", [False, True])
+    def it_can_execute_an_extract_package_command(self, raw: bool, Package_: Mock):
         # exercise ---------------------
-        OpcController().extract_package(PKG_PATH, DIRPATH)
+        OpcController().extract_package(PKG_PATH, DIRPATH, raw=raw)
         # verify -----------------------
-        Package_.read.assert_called_once_with(PKG_PATH)
-        package_.prettify_xml.assert_called_once_with()
-        package_.save_to_dir.assert_called_once_with(DIRPATH)
+        Package_.extract.assert_called_once_with(PKG_PATH, DIRPATH, None, raw)
 
-    def it_can_execute_a_repackage_command(self, Package_: Mock, package_: Mock):
+    def it_can_keep_an_extract_up_to_date(
+        self,
+        Package_: Mock,
+        DiffPresenter_: Mock,
+        manifest_: Mock,
+        manifest_2_: Mock,
+        poll_changes_: Mock,
+        snapshot_: Mock,
+        OpcView_: Mock,
+    ):
+        Package_.read_manifest.side_effect = (manifest_, manifest_2_, manifest_2_)
+        DiffPresenter_.item_changes.side_effect = ([("M", "a.xml"), ("D", "b.xml")], [])
+        poll_changes_.return_value = iter([{"pkg_path"}, {"pkg_path"}])
+
+        OpcController().extract_package(PKG_PATH, DIRPATH, watch=True, interval=0.5)
+
+        poll_changes_.assert_called_once_with(PKG_PATH, 0.5)
+        assert snapshot_.call_args_list == [call(PKG_PATH)] * 3
+        assert Package_.read_manifest.call_args_list == [call(SNAPSHOT_PATH, None)] * 3
+        assert DiffPresenter_.item_changes.call_args_list == [
+            call(manifest_, manifest_2_),
+            call(manifest_2_, manifest_2_),
+        ]
+        assert Package_.extract.call_args_list == [
+            call(SNAPSHOT_PATH, DIRPATH, None, False),
+            call(SNAPSHOT_PATH, DIRPATH, None, False, [("M", "a.xml"), ("D", "b.xml")]),
+        ]
+        OpcView_.watching.assert_called_once_with(PKG_PATH)
+        OpcView_.updated.assert_called_once_with(DIRPATH, 2)
+
+    @pytest.mark.parametrize("as_json", [False, True])
+    def it_can_execute_a_list_items_command(self, as_json: bool, Package_: Mock, OpcView_: Mock):
+        entry_1 = ItemEntry("b.xml", 1, 1, 8, 1, (1980, 1, 1, 0, 0, 0))
+        entry_2 = ItemEntry("a.xml", 2, 2, 8, 2, (1980, 1, 1, 0, 0, 0))
+        Package_.read_entries.return_value = [entry_1, entry_2]
+
+        OpcController().list_items(PKG_PATH, "size", True, as_json)
+
+        Package_.read_entries.assert_called_once_with(PKG_PATH, None)
+        view_method = OpcView_.item_entries_json if as_json else OpcView_.item_entries
+        view_method.assert_called_once_with([entry_2, entry_1])
+
+    def it_can_execute_a_repackage_command(self, Package_: Mock):
         # exercise ---------------------
         OpcController().repackage(PKG_PATH, NEW_PKG_PATH)
         # verify -----------------------
-        Package_.read.assert_called_once_with(PKG_PATH)
-        package_.save.assert_called_once_with(NEW_PKG_PATH)
+        Package_.repackage.assert_called_once_with(PKG_PATH, NEW_PKG_PATH, None)
+        Package_.read.assert_not_called()
+
+    def it_can_keep_a_repackage_up_to_date(
+        self, Package_: Mock, poll_changes_: Mock, OpcView_: Mock
+    ):
+        poll_changes_.return_value = iter([{"a.xml", "b.bin"}, {"c.bin"}])
+        uri_filter = UriFilter(exclude=["*.bin"])
+
+        OpcController().repackage(PKG_PATH, NEW_PKG_PATH, uri_filter, watch=True)
+
+        poll_changes_.assert_called_once_with(PKG_PATH, 1.0)
+        assert Package_.repackage.call_args_list == [
+            call(PKG_PATH, NEW_PKG_PATH, uri_filter),
+            call(PKG_PATH, NEW_PKG_PATH, uri_filter, {"a.xml"}),
+        ]
+        OpcView_.watching.assert_called_once_with(PKG_PATH)
+        OpcView_.updated.assert_called_once_with(NEW_PKG_PATH, 1)
+
+    def it_stops_watching_quietly_when_interrupted(
+        self, Package_: Mock, poll_changes_: Mock, OpcView_: Mock
+    ):
+        poll_changes_.side_effect = KeyboardInterrupt
+
+        OpcController().repackage(PKG_PATH, NEW_PKG_PATH, watch=True)
+
+        Package_.repackage.assert_called_once_with(PKG_PATH, NEW_PKG_PATH, None)
+        OpcView_.updated.assert_not_called()
 
     def it_can_execute_a_substitute_command(
-        self, Package_: Mock, package_: Mock, package_2_: Mock, pkg_item_: Mock, OpcView_: Mock
+        self,
+        Package_: Mock,
+        package_: Mock,
+        package_2_: Mock,
+        pkg_item_: Mock,
+        pkg_item_2_: Mock,
+        OpcView_: Mock,
     ):
+        # fixture ----------------------
+        pkg_item_.uri, pkg_item_2_.uri = "ppt/slideLayouts/a.xml", "ppt/slideLayouts/b.xml"
+        package_.find_items.side_effect = ([pkg_item_, pkg_item_2_], [pkg_item_2_])
         # exercise ---------------------
-        OpcController().substitute(URI_TAIL, PKG_PATH, PKG_2_PATH, PKG_3_PATH)
-        # expected values --------------
-        expected_Package_read_calls = [call(PKG_PATH), call(PKG_2_PATH)]
-        Package_.read.assert_has_calls(expected_Package_read_calls)
-        package_.find_item_by_uri_tail.assert_called_once_with(URI_TAIL)
-        package_2_.substitute_item.assert_called_once_with(pkg_item_)
+        OpcController().substitute(
+            ["ppt/slideLayouts/*", "b.xml"], PKG_PATH, PKG_2_PATH, PKG_3_PATH
+        )
+        # verify -----------------------
+        Package_.read.assert_has_calls([call(PKG_PATH, ANY), call(PKG_2_PATH)], any_order=True)
+        src_filter = next(c.args[1] for c in Package_.read.call_args_list if c.args[0] == PKG_PATH)
+        assert [src_filter(uri) for uri in ("ppt/slideLayouts/c.xml", "x/b.xml", "c.xml")] == [
+            True,
+            True,
+            False,
+        ]
+        assert package_.find_items.call_args_list == [call("ppt/slideLayouts/*"), call("b.xml")]
+        assert package_2_.substitute_item.call_args_list == [call(pkg_item_), call(pkg_item_2_)]
         package_2_.save.assert_called_once_with(PKG_3_PATH)
-        OpcView_.substitute.assert_called_once_with(pkg_item_.uri, PKG_PATH, PKG_2_PATH, PKG_3_PATH)
+        assert OpcView_.substitute.call_args_list == [
+            call(pkg_item_.uri, PKG_PATH, PKG_2_PATH, PKG_3_PATH),
+            call(pkg_item_2_.uri, PKG_PATH, PKG_2_PATH, PKG_3_PATH),
+        ]
 
     # fixtures -------------------------------------------------------------
 
+    @pytest.fixture
+    def _check_passes_(self, request: FixtureRequest):
+        return function_mock("opcdiag.controller._check_passes", request)
+
     @pytest.fixture
     def DiffPresenter_(
-        self, request: FixtureRequest, item_diff_: Mock, rels_diffs_: Mock, xml_part_diffs_: Mock
+        self,
+        request: FixtureRequest,
+        added_removed_: Mock,
+        binary_diffs_: Mock,
+        item_diff_: Mock,
+        rels_diffs_: Mock,
+        xml_part_diffs_: Mock,
+        item_changes_: Mock,
+        diff_stats_: Mock,
     ):
         DiffPresenter_ = class_mock("opcdiag.controller.DiffPresenter", request)
+        DiffPresenter_.added_removed.return_value = added_removed_
+        DiffPresenter_.binary_diffs.return_value = binary_diffs_
+        DiffPresenter_.diff_stats.return_value = diff_stats_
+        DiffPresenter_.item_changes.return_value = item_changes_
         DiffPresenter_.named_item_diff.return_value = item_diff_
         DiffPresenter_.rels_diffs.return_value = rels_diffs_
         DiffPresenter_.xml_part_diffs.return_value = xml_part_diffs_
         return DiffPresenter_
 
+    @pytest.fixture
+    def added_removed_(self, request: FixtureRequest):
+        return instance_mock(list, request)
+
+    @pytest.fixture
+    def binary_diffs_(self, request: FixtureRequest):
+        return instance_mock(list, request)
+
+    @pytest.fixture
+    def diff_cache_(self, request: FixtureRequest):
+        return instance_mock(DiffCache, request)
+
+    @pytest.fixture
+    def diff_stats_(self, request: FixtureRequest):
+        return instance_mock(list, request)
+
     @pytest.fixture
     def ItemPresenter_(self, request: FixtureRequest, item_presenter_: Mock):
         ItemPresenter_ = class_mock("opcdiag.controller.ItemPresenter", request)
@@ -129,20 +527,47 @@ class DescribeOpcController:
         item_diff_ = instance_mock(str, request)
         return item_diff_
 
+    @pytest.fixture
+    def item_changes_(self, request: FixtureRequest):
+        return instance_mock(list, request)
+
     @pytest.fixture
     def item_presenter_(self, request: FixtureRequest):
         item_presenter_ = instance_mock(ItemPresenter, request)
         return item_presenter_
 
+    @pytest.fixture
+    def manifest_(self, request: FixtureRequest):
+        return instance_mock(Manifest, request)
+
+    @pytest.fixture
+    def manifest_2_(self, request: FixtureRequest):
+        return instance_mock(Manifest, request)
+
     @pytest.fixture
     def OpcView_(self, request: FixtureRequest):
         OpcView_ = class_mock("opcdiag.controller.OpcView", request)
         return OpcView_
 
     @pytest.fixture
-    def Package_(self, request: FixtureRequest, package_: Mock, package_2_: Mock):
+    def Package_(
+        self,
+        request: FixtureRequest,
+        package_: Mock,
+        package_2_: Mock,
+        manifest_: Mock,
+        manifest_2_: Mock,
+    ):
         Package_ = class_mock("opcdiag.controller.Package", request)
-        Package_.read.side_effect = (package_, package_2_)
+        # -- keyed by path, as the two packages of a diff are read at the same time --
+        packages = {PKG_PATH: package_, PKG_2_PATH: package_2_}
+
+        def read(path: str, *args: object) -> Mock:
+            return packages[path]
+
+        Package_.read.side_effect = read
+        Package_.open.side_effect = read
+        Package_.read_manifest.side_effect = (manifest_, manifest_2_)
         return Package_
 
     @pytest.fixture
@@ -167,11 +592,21 @@ class DescribeOpcController:
         pkg_item_2_ = instance_mock(PkgItem, request)
         return pkg_item_2_
 
+    @pytest.fixture
+    def poll_changes_(self, request: FixtureRequest):
+        return function_mock("opcdiag.controller.poll_changes", request)
+
     @pytest.fixture
     def rels_diffs_(self, request: FixtureRequest):
         rels_diffs_ = instance_mock(list, request)
         return rels_diffs_
 
+    @pytest.fixture
+    def snapshot_(self, request: FixtureRequest):
+        snapshot_ = function_mock("opcdiag.controller.snapshot", request)
+        snapshot_.return_value = contextlib.nullcontext(SNAPSHOT_PATH)
+        return snapshot_
+
     @pytest.fixture
     def xml_part_diffs_(self, request: FixtureRequest):
         xml_part_diffs_ = instance_mock(list, request)
@@ -0,0 +1,65 @@
+"""Unit tests for `opcdiag.diff_cache` module."""
+
+from __future__ import annotations
+
+import pathlib
+
+import pytest
+
+from opcdiag.diff_cache import DiffCache
+
+
+class DescribeDiffCache:
+    def it_stores_a_diff_under_its_key(self, cache_path: str):
+        with DiffCache(cache_path) as cache:
+            cache.put("key", "diff é")
+
+            assert cache.get("key") == "diff é"
+            assert cache.get("other key") is None
+
+    def it_keeps_what_it_stores_when_reopened(self, cache_path: str):
+        with DiffCache(cache_path) as cache:
+            cache.put("key", "diff")
+
+        with DiffCache(cache_path) as cache:
+            assert cache.get("key") == "diff"
+
+    def it_evicts_the_least_recently_used_diffs_when_it_is_full(self, cache_path: str):
+        with DiffCache(cache_path, max_bytes=10) as cache:
+            cache.put("a", "aaaa")
+            cache.put("b", "bbbb")
+            cache.get("a")
+
+            cache.put("c", "cccc")
+
+            assert [cache.get(key) for key in ("a", "b", "c")] == ["aaaa", None, "cccc"]
+
+    def but_it_does_not_keep_a_diff_larger_than_it_can_hold(self, cache_path: str):
+        with DiffCache(cache_path, max_bytes=10) as cache:
+            cache.put("a", "aaaa")
+
+            cache.put("b", "b" * 11)
+
+            assert [cache.get(key) for key in ("a", "b")] == ["aaaa", None]
+
+    @pytest.mark.parametrize(
+        ("args", "differs"),
+        [
+            ((b"x", b"y", "XmlPartPresenter", ""), False),
+            ((b"y", b"x", "XmlPartPresenter", ""), True),
+            ((b"x", b"y", "RelsItemPresenter", ""), True),
+            ((b"x", b"y", "XmlPartPresenter", "window_threshold=1"), True),
+            ((b"xy", b"", "XmlPartPresenter", ""), True),
+        ],
+    )
+    def it_forms_a_key_from_both_blobs_and_how_they_are_diffed(
+        self, args: tuple[bytes, bytes, str, str], differs: bool
+    ):
+        key = DiffCache.key(b"x", b"y", "XmlPartPresenter")
+        assert (DiffCache.key(*args) != key) is differs
+
+    # fixtures -------------------------------------------------------------
+
+    @pytest.fixture
+    def cache_path(self, tmp_path: pathlib.Path) -> str:
+        return str(tmp_path / "diffs.db")
@@ -2,23 +2,82 @@
 
 # pyright: reportPrivateUsage=false
 
-from __future__ import unicode_literals
+from __future__ import annotations, unicode_literals
 
+import io
+import os
+import pathlib
 import sys
+import zipfile
 from unittest.mock import call
 
 import pytest
 from lxml import etree
 
-from opcdiag.model import Package, PkgItem
-from opcdiag.phys_pkg import PhysPkg
+from opcdiag.model import (
+    C14nOptions,
+    Package,
+    PkgItem,
+    UriFilter,
+    is_binary_uri,
+    item_spec_filter,
+    iter_pretty_xml,
+    write_pretty_xml,
+)
+from opcdiag.phys_pkg import PhysPkg, PkgReader, ReadStats
 
-from .unitutil import FixtureRequest, Mock, class_mock, instance_mock
+from .unitutil import FixtureRequest, Mock, class_mock, function_mock, instance_mock, method_mock
 
 DIRPATH = "dirpath"
 PACKAGE_PATH = "package_path"
 
 
+@pytest.mark.parametrize(
+    ("uri", "expected_value"),
+    [
+        ("[Content_Types].xml", False),
+        ("_rels/.rels", False),
+        ("ppt/slides/slide1.xml", False),
+        ("ppt/media/image1.png", True),
+        ("ppt/embeddings/oleObject1.bin", True),
+    ],
+)
+def it_knows_whether_a_uri_names_a_binary_item(uri: str, expected_value: bool):
+    assert is_binary_uri(uri) is expected_value
+
+
+@pytest.mark.parametrize(
+    "xml",
+    [
+        b"<a/>",
+        b"<a>   </a>",
+        b'<a xmlns="urn:a" xmlns:p="urn:p" p:q="&quot;\n" r="&lt;"><p:b><c>t\r&amp;</c></p:b></a>',
+        b"<a>mixed <b>bold <x><y>deep</y> t<!--k--></x></b> tail<i/>end</a>",
+        b'<a><b>x<c/>y</b>  <!--c--><?pi x?>\n<d xml:space="preserve"> </d></a>',
+        b"<a><b>\n</b><c>  <d/>  </c><c><d>  <e/> </d><d/></c></a>",
+        b'<r xmlns:a="urn:a"><a:b><a:c xmlns:a="urn:z"><a:d/></a:c><a:c>x</a:c></a:b></r>',
+        b"<!--prolog--><a><b><c><d/></c></b></a><!--epilog-->",
+    ],
+)
+def it_streams_the_same_pretty_xml_as_a_parsed_tree_produces(xml: bytes):
+    dest = io.BytesIO()
+    write_pretty_xml(io.BytesIO(xml), dest)
+    assert dest.getvalue() == PkgItem("", "foo.xml", xml).pretty_xml
+
+
+def it_produces_streamed_pretty_xml_before_the_document_is_read():
+    class Source(io.BytesIO):
+        def read(self, size: int | None = -1) -> bytes:
+            data = super().read(size)
+            assert data, "document read to its end"
+            return data
+
+    rows = b"".join(b"<row><c>%d</c></row>" % n for n in range(10000))
+    chunks = iter_pretty_xml(Source(b"<sheet><rows>%s</rows></sheet>" % rows))
+
+    assert next(chunks).startswith("<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n")
+
+
 class DescribePackage:
     def it_can_construct_from_a_filesystem_package(
         self,
@@ -43,7 +102,7 @@ class DescribePackage:
         ]
         expected_items = {uri_: pkg_item_, uri_2_: pkg_item_2_}
         # verify -----------------------
-        PhysPkg_.read.assert_called_once_with(path_)
+        PhysPkg_.read.assert_called_once_with(path_, None)
         assert PkgItem_.call_count == 2
         PkgItem_.assert_has_calls(expected_PkgItem_calls, any_order=True)
         Package_.assert_called_once_with(expected_items)
@@ -60,6 +119,37 @@ class DescribePackage:
         with pytest.raises(KeyError):
             package.find_item_by_uri_tail("head")
 
+    def it_can_canonicalize_its_xml_pkg_items(self, pkg_item_: Mock, pkg_item_2_: Mock):
+        options = C14nOptions(rewrite_prefixes=True)
+        package = Package({"1": pkg_item_, "2": pkg_item_2_})
+        package.canonicalize_xml(options)
+        pkg_item_.canonicalize_xml.assert_called_once_with(options)
+        pkg_item_2_.canonicalize_xml.assert_called_once_with(options)
+
+    @pytest.mark.parametrize(
+        ("item_spec", "expected_uris"),
+        [
+            ("b.xml", ["a/b.xml"]),
+            ("a/*.xml", ["a/b.xml", "a/c.xml"]),
+            ("a/**", ["a/b.xml", "a/c.xml", "a/d/b.xml"]),
+            ("?/c.xml", ["a/c.xml"]),
+        ],
+    )
+    def it_can_find_the_items_an_item_spec_names(self, item_spec: str, expected_uris: list[str]):
+        uris = ["a/d/b.xml", "a/c.xml", "a/b.xml"]
+        package = Package({uri: PkgItem("", uri, b"") for uri in uris})
+
+        pkg_items = package.find_items(item_spec)
+
+        assert [pkg_item.uri for pkg_item in pkg_items] == expected_uris
+        assert all(item_spec_filter([item_spec])(uri) for uri in expected_uris)
+
+    @pytest.mark.parametrize("item_spec", ["e.xml", "b/*"])
+    def but_it_raises_when_an_item_spec_names_no_item(self, item_spec: str):
+        package = Package({"a/b.xml": PkgItem("", "a/b.xml", b"")})
+        with pytest.raises(KeyError):
+            package.find_items(item_spec)
+
     def it_can_pretty_format_its_xml_pkg_items(self, pkg_item_: Mock, pkg_item_2_: Mock):
         pkg_items = {"1": pkg_item_, "2": pkg_item_2_}
         package = Package(pkg_items)
@@ -97,6 +187,30 @@ class DescribePackage:
         # verify -----------------------
         assert xml_parts == [pkg_item_3_, pkg_item_]
 
+    def it_can_repackage_a_package_without_loading_it(self, PhysPkg_: Mock, path_: Mock):
+        uri_filter = UriFilter(["ppt/**"])
+        Package.repackage(path_, PACKAGE_PATH, uri_filter)
+        PhysPkg_.copy_to_zip.assert_called_once_with(path_, PACKAGE_PATH, uri_filter)
+        PhysPkg_.read.assert_not_called()
+
+    def it_can_update_a_repackaged_zip_with_the_changed_items(
+        self, PhysPkg_: Mock, path_: Mock, tmp_path: pathlib.Path
+    ):
+        new_path = str(tmp_path / "new.pptx")
+        Package.repackage(path_, new_path, None, {"a.xml"})
+        (tmp_path / "new.pptx").touch()
+
+        Package.repackage(path_, new_path, None, {"a.xml"})
+
+        PhysPkg_.copy_to_zip.assert_called_once_with(path_, new_path, None)
+        PhysPkg_.update_zip.assert_called_once_with(path_, new_path, {"a.xml"}, None)
+
+    def it_can_splice_items_from_one_package_into_another(self, PhysPkg_: Mock):
+        Package.splice(PACKAGE_PATH, "donor.pptx", ["a.xml"], "new.pptx")
+        PhysPkg_.splice_zips.assert_called_once_with(
+            PACKAGE_PATH, "donor.pptx", ["a.xml"], "new.pptx"
+        )
+
     def it_can_save_itself_to_a_zip(
         self, pkg_item_dict_: Mock, PhysPkg_: Mock, blob_collection_: Mock
     ):
@@ -117,6 +231,70 @@ class DescribePackage:
         # verify -----------------------
         PhysPkg_.write_to_dir.assert_called_once_with(blob_collection_, DIRPATH)
 
+    @pytest.mark.parametrize(
+        ("raw", "expected_xml"),
+        [
+            (
+                False,
+                b"<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n<a>\n  <b/>\n</a>\n",
+            ),
+            (True, b"<a><b/></a>"),
+        ],
+    )
+    def it_can_extract_a_package_to_a_directory(
+        self, raw: bool, expected_xml: bytes, tmp_path: pathlib.Path
+    ):
+        pkg_path, dirpath = str(tmp_path / "pkg.zip"), tmp_path / "extracted"
+        with zipfile.ZipFile(pkg_path, "w") as zipf:
+            zipf.writestr("ppt/a.xml", b"<a><b/></a>")
+            zipf.writestr("ppt/media/image1.png", b"\x89PNG")
+            zipf.writestr("docProps/core.xml", b"<c/>")
+
+        Package.extract(pkg_path, str(dirpath), UriFilter(["ppt/**"]), raw)
+
+        assert sorted(str(p.relative_to(dirpath)) for p in dirpath.rglob("*.*")) == [
+            os.path.join("ppt", "a.xml"),
+            os.path.join("ppt", "media", "image1.png"),
+        ]
+        assert (dirpath / "ppt" / "a.xml").read_bytes() == expected_xml
+        assert (dirpath / "ppt" / "media" / "image1.png").read_bytes() == b"\x89PNG"
+
+    def it_streams_each_xml_item_into_its_file_when_extracting(
+        self, tmp_path: pathlib.Path, request: FixtureRequest
+    ):
+        pkg_path, dirpath = str(tmp_path / "pkg.zip"), tmp_path / "extracted"
+        with zipfile.ZipFile(pkg_path, "w") as zipf:
+            zipf.writestr("a.xml", b"<a><b/></a>")
+            zipf.writestr("c.png", b"c")
+        read_ = method_mock(Package, "read", request)
+        write_pretty_xml_ = function_mock("opcdiag.model.write_pretty_xml", request)
+        write_pretty_xml_.side_effect = write_pretty_xml
+
+        Package.extract(pkg_path, str(dirpath))
+
+        read_.assert_not_called()
+        write_pretty_xml_.assert_called_once()
+        assert (dirpath / "a.xml").read_bytes().endswith(b"<a>\n  <b/>\n</a>\n")
+        assert (dirpath / "c.png").read_bytes() == b"c"
+
+    def it_can_update_an_extract_with_the_changed_items(self, tmp_path: pathlib.Path):
+        pkg_path, dirpath = str(tmp_path / "pkg.zip"), tmp_path / "extracted"
+        with zipfile.ZipFile(pkg_path, "w") as zipf:
+            zipf.writestr("a.xml", b"<a/>")
+            zipf.writestr("b.xml", b"<b/>")
+            zipf.writestr("c/d.png", b"d")
+        Package.extract(pkg_path, str(dirpath), raw=True)
+        with zipfile.ZipFile(pkg_path, "w") as zipf:
+            zipf.writestr("a.xml", b"<a><new/></a>")
+            zipf.writestr("b.xml", b"<b><new/></b>")
+            zipf.writestr("e.png", b"e")
+
+        Package.extract(pkg_path, str(dirpath), item_changes=[("M", "a.xml"), ("D", "c/d.png")])
+
+        assert sorted(os.listdir(dirpath)) == ["a.xml", "b.xml"]
+        assert (dirpath / "a.xml").read_bytes().endswith(b"<a>\n  <new/>\n</a>\n")
+        assert (dirpath / "b.xml").read_bytes() == b"<b/>"
+
     def it_can_change_one_of_its_items_to_another(self, pkg_item_: Mock, pkg_item_2_: Mock):
         # fixture ----------------------
         pkg_items = {"uri": pkg_item_}
@@ -128,8 +306,43 @@ class DescribePackage:
         # verify -----------------------
         assert pkg_item_.blob == "new blob"
 
+    def it_can_open_a_package_that_loads_its_items_on_demand(
+        self, request: FixtureRequest, reader_: Mock
+    ):
+        PkgReader_ = class_mock("opcdiag.model.PkgReader", request)
+        PkgReader_.open.return_value = reader_
+
+        def uri_filter(uri: str) -> bool:
+            return uri != "b.xml"
+
+        with Package.open("foo.pptx", uri_filter) as package:
+            assert [item.uri for item in package.rels_items] == ["_rels/.rels"]
+            assert [item.uri for item in package.xml_parts] == ["a.xml"]
+            reader_.read.assert_not_called()
+
+            assert package.find_item_by_uri_tail("a.xml").blob == b"<a/>"
+            assert package.find_item_by_uri_tail("a.xml").element.tag == "a"
+            assert package.stats == reader_.stats
+
+        PkgReader_.open.assert_called_once_with("foo.pptx", uri_filter)
+        reader_.read.assert_called_once_with("a.xml")
+        reader_.close.assert_called_once_with()
+
+    def but_a_package_it_reads_holds_nothing_open(self, pkg_item_: Mock):
+        with Package({"uri": pkg_item_}) as package:
+            assert package.stats == ReadStats(0, 0)
+
     # fixtures -------------------------------------------------------------
 
+    @pytest.fixture
+    def reader_(self, request: FixtureRequest):
+        reader_ = instance_mock(PkgReader, request)
+        reader_.root_uri = "foo"
+        reader_.uris = ["_rels/.rels", "a.xml"]
+        reader_.read.return_value = b"<a/>"
+        reader_.stats = ReadStats(1, 4)
+        return reader_
+
     @pytest.fixture
     def blob_(self, request: FixtureRequest):
         return instance_mock(str, request)
@@ -238,6 +451,9 @@ class DescribePkgItem:
         assert pkg_item.is_rels_item is is_rels
         assert pkg_item.is_xml_part is is_xml_part
 
+    def it_carries_no_instance_dict(self):
+        assert not hasattr(PkgItem("", "foo.xml", b""), "__dict__")
+
     def it_can_produce_an_etree_element_from_its_blob(self):
         blob = b"<root><child>foobar</child></root>"
         pkg_item = PkgItem("", "", blob)
@@ -248,6 +464,100 @@ class DescribePkgItem:
         expected_path = "root_uri\\uri" if sys.platform.startswith("win") else "root_uri/uri"
         assert pkg_item.path == expected_path
 
+    def it_streams_its_pretty_xml_when_it_is_large(
+        self, request: FixtureRequest, monkeypatch: pytest.MonkeyPatch
+    ):
+        blob = b"<foo><bar><baz>x</baz></bar></foo>"
+        expected_value = PkgItem("", "foo.xml", blob).pretty_xml
+        monkeypatch.setattr("opcdiag.model._STREAMING_THRESHOLD", 8)
+        write_pretty_xml_ = function_mock("opcdiag.model.write_pretty_xml", request)
+        write_pretty_xml_.side_effect = write_pretty_xml
+
+        pretty_xml = PkgItem("", "foo.xml", blob).pretty_xml
+
+        write_pretty_xml_.assert_called_once()
+        assert pretty_xml == expected_value
+
+    def it_generates_its_pretty_xml_in_pieces_when_it_is_large(
+        self, monkeypatch: pytest.MonkeyPatch
+    ):
+        blob = b"<foo><bar><baz>x</baz></bar></foo>"
+        expected_value = PkgItem("", "foo.xml", blob).pretty_xml.decode("utf-8")
+        assert list(PkgItem("", "foo.xml", blob).iter_pretty_xml()) == [expected_value]
+        monkeypatch.setattr("opcdiag.model._STREAMING_THRESHOLD", 8)
+
+        assert "".join(PkgItem("", "foo.xml", blob).iter_pretty_xml()) == expected_value
+
+    def it_can_provide_its_root_element(self):
+        root = PkgItem("", "foo.xml", b'<f:foo xmlns:f="foo" b="a"><f:bar/></f:foo>').root_element
+        assert root.tag == "{foo}foo"
+        assert root.attrib == {"b": "a"}
+
+    @pytest.mark.parametrize(
+        ("xpath", "expected_value"),
+        [
+            ("//_:p", ['<p>\n  <p q="1"/>\n</p>', '<p q="1"/>', "<p>t</p>"]),
+            ("/_:a/_:p", ["<p>t</p>"]),
+            ("/_:a//_:p", ['<p>\n  <p q="1"/>\n</p>', '<p q="1"/>', "<p>t</p>"]),
+            ("//_:c", ['<c xmlns:d="urn:d">\n  <d:e/>\n</c>']),
+            ("//_:c/*", ["<d:e/>"]),
+            ("//b:x/_:p/_:p/@q", ["1"]),
+            ("count(//_:p)", ["3"]),
+            ("/b:x", []),
+        ],
+    )
+    def it_can_select_nodes_by_xpath(self, xpath: str, expected_value: list[str]):
+        blob = (
+            b'<a xmlns="urn:a" xmlns:b="urn:b"><b:x><p><p q="1"/></p></b:x><p>t</p>'
+            b'<c xmlns:d="urn:d"><d:e/></c></a>'
+        )
+        assert list(PkgItem("", "foo.xml", blob).select(xpath)) == expected_value
+
+    def it_matches_a_simple_path_without_building_a_tree(self, request: FixtureRequest):
+        fromstring_ = function_mock("opcdiag.model.etree.fromstring", request)
+        pkg_item = PkgItem("", "foo.xml", b"<foo><bar>1</bar><baz/><bar>2</bar></foo>")
+
+        assert list(pkg_item.select("/foo/bar")) == ["<bar>1</bar>", "<bar>2</bar>"]
+        fromstring_.assert_not_called()
+
+    @pytest.mark.parametrize("xpath", ["//w:p", "//w:p[1]"])
+    def it_raises_on_an_undeclared_prefix_before_generating(self, xpath: str):
+        with pytest.raises(etree.XPathEvalError, match="Undefined namespace prefix"):
+            PkgItem("", "foo.xml", b"<foo/>").select(xpath)
+
+    @pytest.mark.parametrize(
+        ("blob", "options", "expected_value"),
+        [
+            (b'<a y="2" x="1"><!-- c --><b></b></a>', C14nOptions(), b'<a x="1" y="2"><b></b></a>'),
+            (
+                b'<p:a xmlns:p="urn:1"><p:b/></p:a>',
+                C14nOptions(rewrite_prefixes=True),
+                b'<n0:a xmlns:n0="urn:1"><n0:b></n0:b></n0:a>',
+            ),
+            (
+                b'<a xmlns:p="urn:1"><p:b c="d"/><e/></a>',
+                C14nOptions(rewrite_prefixes=True),
+                b'<a><n1:b xmlns:n1="urn:1" c="d"></n1:b><e></e></a>',
+            ),
+            (
+                b'<a x="n0:y" xmlns:p="urn:1"><p:b>n0:t &lt;n0:e&gt; <e/></p:b></a>',
+                C14nOptions(rewrite_prefixes=True),
+                b'<a x="n0:y"><n1:b xmlns:n1="urn:1">n0:t &lt;n0:e&gt; <e></e></n1:b></a>',
+            ),
+            (b"<a>\n  <b> t </b>\n</a>", C14nOptions(strip_text=True), b"<a><b>t</b></a>"),
+        ],
+    )
+    def it_can_canonicalize_its_xml(self, blob: bytes, options: C14nOptions, expected_value: bytes):
+        pkg_item = PkgItem("", "foo.xml", blob)
+        pkg_item.canonicalize_xml(options)
+        assert pkg_item.blob == expected_value
+
+    def it_leaves_items_other_than_xml_parts_alone_when_canonicalizing(self):
+        blob = b'<Relationships b="2" a="1"/>'
+        pkg_item = PkgItem("", "foo.xml.rels", blob)
+        pkg_item.canonicalize_xml(C14nOptions())
+        assert pkg_item.blob == blob
+
     def it_can_prettify_its_xml(self):
         blob = b"<foo><bar/></foo>"
         pkg_item = PkgItem("", "foo.xml", blob)
@@ -258,3 +568,32 @@ class DescribePkgItem:
             b"  <bar/>\n"
             b"</foo>\n"
         )
+
+
+class DescribeUriFilter:
+    @pytest.mark.parametrize(
+        ("include", "exclude", "uri", "expected_value"),
+        [
+            ((), (), "word/document.xml", True),
+            (("word/*.xml",), (), "word/document.xml", True),
+            (("word/*.xml",), (), "word/_rels/document.xml.rels", False),
+            (("word/*.xml",), (), "word/theme/theme1.xml", False),
+            (("/word/*.xml",), (), "word/document.xml", True),
+            (("**/*.rels",), (), "_rels/.rels", True),
+            (("**/*.rels",), (), "word/_rels/document.xml.rels", True),
+            (("ppt/slides/*",), (), "ppt/slides/slide1.xml", True),
+            (("ppt/slides/*",), (), "ppt/slideLayouts/slideLayout1.xml", False),
+            (("slide?.xml",), (), "slide1.xml", True),
+            (("[Content_Types].xml",), (), "[Content_Types].xml", True),
+            (("[Content_Types].xml",), (), "C.xml", False),
+            (("!**/media/*",), (), "ppt/media/image1.png", False),
+            (("!**/media/*",), (), "ppt/slides/slide1.xml", True),
+            ((), ("**/media/*",), "ppt/media/image1.png", False),
+            (("ppt/**",), ("**/media/*",), "ppt/media/image1.png", False),
+            (("ppt/**",), ("**/media/*",), "ppt/slides/slide1.xml", True),
+        ],
+    )
+    def it_selects_uris_by_include_and_exclude_glob_patterns(
+        self, include: tuple[str, ...], exclude: tuple[str, ...], uri: str, expected_value: bool
+    ):
+        assert UriFilter(include, exclude)(uri) is expected_value
@@ -2,14 +2,29 @@
 
 # pyright: reportPrivateUsage=false
 
+import mmap
 import os
 import shutil
+from typing import IO
 from unittest.mock import call
-from zipfile import ZIP_DEFLATED, ZipFile
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
 
 import pytest
 
-from opcdiag.phys_pkg import BlobCollection, DirPhysPkg, PhysPkg, ZipPhysPkg
+from opcdiag.phys_pkg import (
+    BlobCollection,
+    DirPhysPkg,
+    FileStat,
+    ItemEntry,
+    ItemInfo,
+    Manifest,
+    PhysPkg,
+    PkgReader,
+    ReadStats,
+    ZipPhysPkg,
+    ZipPkgReader,
+    _MappedZipFile,
+)
 
 from .unitutil import FixtureRequest, Mock, class_mock, instance_mock, relpath
 
@@ -20,6 +35,7 @@ FOOBAR_FILEPATH = relpath("test-files/deleteme/foobar_dir/foobar_file")
 MINI_DIR_PKG_PATH = relpath("test-files/mini_pkg")
 MINI_ZIP_PKG_PATH = relpath("test-files/mini_pkg.zip")
 ROOT_URI = relpath("test-files/mini_pkg")
+MINI_PKG_MANIFEST = {"uri_1": ItemInfo(7, 894834086), "uri_2": ItemInfo(7, 511395429)}
 
 
 @pytest.fixture
@@ -32,6 +48,13 @@ def blob_2_(request: FixtureRequest):
     return instance_mock(str, request)
 
 
+@pytest.fixture
+def _MappedZipFile_(request: FixtureRequest, zip_file_: Mock):
+    _MappedZipFile_ = class_mock("opcdiag.phys_pkg._MappedZipFile", request)
+    _MappedZipFile_.return_value = zip_file_
+    return _MappedZipFile_
+
+
 @pytest.fixture
 def PhysPkg_(request: FixtureRequest):
     PhysPkg_ = class_mock("opcdiag.phys_pkg.PhysPkg", request)
@@ -61,6 +84,29 @@ def zip_file_(request: FixtureRequest):
     return zip_file_
 
 
+class DescribeManifest:
+    def it_maps_each_uri_to_its_item_info_in_uri_order(self):
+        manifest = Manifest(
+            [
+                ("b.xml", ItemInfo(2, 2)),
+                ("a.xml", ItemInfo(1, 1)),
+                ("b.xml", ItemInfo(3, 0xFFFFFFFF)),
+            ],
+            root_uri="foo",
+        )
+
+        assert list(manifest) == ["a.xml", "b.xml"]
+        assert len(manifest) == 2
+        assert manifest["b.xml"] == ItemInfo(3, 0xFFFFFFFF)
+        assert "a.xml" in manifest
+        assert "c.xml" not in manifest
+        with pytest.raises(KeyError):
+            manifest["aa.xml"]
+        assert manifest == {"a.xml": ItemInfo(1, 1), "b.xml": ItemInfo(3, 0xFFFFFFFF)}
+        assert manifest.keys() - {"a.xml"} == {"b.xml"}
+        assert manifest.root_uri == "foo"
+
+
 class DescribePhysPkg:
     def it_should_construct_the_appropriate_subclass(self):
         pkg = PhysPkg.read(MINI_ZIP_PKG_PATH)
@@ -92,6 +138,131 @@ class DescribePhysPkg:
         zipf.close()
         assert blobs_out == blobs_in
 
+    @pytest.mark.parametrize("path", [MINI_ZIP_PKG_PATH, MINI_DIR_PKG_PATH])
+    def it_can_copy_a_package_to_a_zip(self, path: str, tmpdir: str):
+        zip_path = str(tmpdir.join("copy.zip"))
+
+        PhysPkg.copy_to_zip(path, zip_path, lambda uri: uri != "uri_1")
+
+        with ZipFile(zip_path, "r") as zipf:
+            assert {name: zipf.read(name) for name in zipf.namelist()} == {"uri_2": b"blob_2\n"}
+            info = zipf.getinfo("uri_2")
+        assert (info.compress_type, info.external_attr) == (ZIP_DEFLATED, 0o600 << 16)
+
+    @pytest.mark.parametrize("path", [MINI_ZIP_PKG_PATH, MINI_DIR_PKG_PATH])
+    def it_can_copy_a_package_to_a_directory(self, path: str, tmpdir: str):
+        dirpath = str(tmpdir.join("copy"))
+        os.makedirs(os.path.join(dirpath, "stale"))
+
+        PhysPkg.copy_to_dir(path, dirpath, lambda uri: uri != "uri_1")
+
+        assert os.listdir(dirpath) == ["uri_2"]
+        with open(os.path.join(dirpath, "uri_2"), "rb") as f:
+            assert f.read() == b"blob_2\n"
+
+    def and_it_can_write_each_item_with_a_function(self, tmpdir: str):
+        dirpath = str(tmpdir.join("copy"))
+
+        def write_item(src: IO[bytes], dest: IO[bytes]):
+            dest.write(src.read().upper())
+
+        PhysPkg.copy_to_dir(MINI_ZIP_PKG_PATH, dirpath, write_item=write_item)
+
+        with open(os.path.join(dirpath, "uri_2"), "rb") as f:
+            assert f.read() == b"BLOB_2\n"
+
+    def but_it_can_copy_into_a_directory_without_clearing_it(self, tmpdir: str):
+        dirpath = str(tmpdir.join("copy"))
+        os.makedirs(os.path.join(dirpath, "kept"))
+
+        PhysPkg.copy_to_dir(MINI_ZIP_PKG_PATH, dirpath, clear=False)
+
+        assert sorted(os.listdir(dirpath)) == ["kept", "uri_1", "uri_2"]
+
+    def it_can_remove_the_files_of_items_from_a_directory(self, tmpdir: str):
+        dirpath = str(tmpdir)
+        PhysPkg._write_blob_to_dir(dirpath, "a/b/c.xml", b"c")
+        PhysPkg._write_blob_to_dir(dirpath, "d.xml", b"d")
+
+        PhysPkg.remove_from_dir(dirpath, ["a/b/c.xml", "missing.xml"])
+
+        assert os.listdir(dirpath) == ["d.xml"]
+
+    def it_gives_a_copied_item_too_large_for_a_zip_entry_a_zip64_one(
+        self, tmpdir: str, monkeypatch: pytest.MonkeyPatch
+    ):
+        zip_path = str(tmpdir.join("copy.zip"))
+        monkeypatch.setattr("zipfile.ZIP64_LIMIT", 4)
+
+        PhysPkg.copy_to_zip(MINI_DIR_PKG_PATH, zip_path)
+
+        monkeypatch.undo()
+        with ZipFile(zip_path, "r") as zipf:
+            assert zipf.read("uri_1") == b"blob_1\n"
+            # -- the Zip64 extended information extra field has header ID 0x0001 --
+            assert zipf.getinfo("uri_1").extra[:2] == b"\x01\x00"
+
+    def it_can_splice_items_from_one_zip_package_into_another(self, tmpdir: str):
+        base_path, donor_path = str(tmpdir.join("base.zip")), str(tmpdir.join("donor.zip"))
+        zip_path = str(tmpdir.join("spliced.zip"))
+        with ZipFile(base_path, "w", ZIP_DEFLATED) as zipf:
+            zipf.writestr("a.xml", b"base a")
+            zipf.writestr("b.xml", b"base b")
+            zipf.writestr("c.xml", b"base c")
+        with ZipFile(donor_path, "w") as zipf:
+            zipf.writestr("b.xml", b"donor b", ZIP_STORED)
+            zipf.writestr("d.xml", b"donor d" * 100, ZIP_DEFLATED)
+
+        PhysPkg.splice_zips(base_path, donor_path, ["b.xml", "c.xml", "d.xml"], zip_path)
+
+        with ZipFile(zip_path, "r") as zipf, ZipFile(donor_path, "r") as donor:
+            assert zipf.testzip() is None
+            assert {name: zipf.read(name) for name in zipf.namelist()} == {
+                "a.xml": b"base a",
+                "b.xml": b"donor b",
+                "d.xml": b"donor d" * 100,
+            }
+            assert zipf.namelist() == ["a.xml", "b.xml", "d.xml"]
+            # -- members are copied as compressed, not inflated and deflated again --
+            for name in ("b.xml", "d.xml"):
+                info, donor_info = zipf.getinfo(name), donor.getinfo(name)
+                assert (info.compress_type, info.compress_size, info.CRC) == (
+                    donor_info.compress_type,
+                    donor_info.compress_size,
+                    donor_info.CRC,
+                )
+
+    def it_can_update_a_zip_recompressing_only_the_changed_items(self, tmpdir: str):
+        dirpath, zip_path = str(tmpdir.join("pkg")), str(tmpdir.join("pkg.zip"))
+        for uri, blob in (("a.xml", b"a"), ("b.xml", b"b"), ("d.xml", b"d")):
+            PhysPkg._write_blob_to_dir(dirpath, uri, blob)
+        # -- stored rather than deflated, so a member compressed again would show it --
+        with ZipFile(zip_path, "w", ZIP_STORED) as zipf:
+            for uri, blob in (("a.xml", b"a"), ("b.xml", b"old b"), ("c.xml", b"c")):
+                zipf.writestr(uri, blob)
+
+        PhysPkg.update_zip(dirpath, zip_path, {"b.xml"})
+
+        assert sorted(os.listdir(str(tmpdir))) == ["pkg", "pkg.zip"]
+        with ZipFile(zip_path, "r") as zipf:
+            assert zipf.testzip() is None
+            assert {name: zipf.read(name) for name in zipf.namelist()} == {
+                "a.xml": b"a",
+                "b.xml": b"b",
+                "d.xml": b"d",
+            }
+            compress_types = {info.filename: info.compress_type for info in zipf.infolist()}
+        assert compress_types == {"a.xml": ZIP_STORED, "b.xml": ZIP_DEFLATED, "d.xml": ZIP_DEFLATED}
+
+    def it_can_stat_the_files_of_a_package(self, tmpdir: str):
+        dirpath = str(tmpdir)
+        PhysPkg._write_blob_to_dir(dirpath, "a/b.xml", b"blob")
+        mtime_ns = os.stat(os.path.join(dirpath, "a", "b.xml")).st_mtime_ns
+
+        assert PhysPkg.stat_files(dirpath) == {"a/b.xml": FileStat(4, mtime_ns)}
+        assert list(PhysPkg.stat_files(MINI_ZIP_PKG_PATH)) == ["mini_pkg.zip"]
+        assert PhysPkg.stat_files(os.path.join(dirpath, "missing.zip")) == {}
+
     def it_should_close_zip_file_after_use(self, ZipFile_: Mock, zip_file_: Mock):
         # exercise ---------------------
         PhysPkg.write_to_zip(BlobCollection(()), "foobar")
@@ -170,6 +341,22 @@ class DescribeDirPhysPkg:
         assert dir_phys_pkg._root_uri == ROOT_URI
         assert isinstance(dir_phys_pkg, DirPhysPkg)
 
+    def it_can_skip_the_items_its_uri_filter_excludes(self):
+        dir_phys_pkg = DirPhysPkg.read(MINI_DIR_PKG_PATH, lambda uri: uri == "uri_2")
+        assert dir_phys_pkg._blobs == {"uri_2": b"blob_2\n"}
+
+    def it_can_read_a_manifest_of_a_filesystem_package(self):
+        manifest = PhysPkg.read_manifest(MINI_DIR_PKG_PATH)
+        assert manifest == MINI_PKG_MANIFEST
+        assert manifest.root_uri == ROOT_URI
+
+    def it_can_list_the_entries_of_a_filesystem_package(self):
+        entries = PhysPkg.read_entries(MINI_DIR_PKG_PATH, lambda uri: uri == "uri_2")
+        assert len(entries) == 1
+        entry = entries[0]
+        assert entry[:5] == ("uri_2", 7, 7, ZIP_STORED, 511395429)
+        assert len(entry.date_time) == 6
+
 
 class DescribeZipPhysPkg:
     def it_can_construct_from_a_filesystem_package(self):
@@ -185,9 +372,94 @@ class DescribeZipPhysPkg:
         assert zip_phys_pkg._root_uri == ROOT_URI
         assert isinstance(zip_phys_pkg, ZipPhysPkg)
 
-    def it_should_close_zip_file_after_use(self, ZipFile_: Mock, zip_file_: Mock):
+    def it_can_skip_the_items_its_uri_filter_excludes(self):
+        zip_phys_pkg = ZipPhysPkg.read(MINI_ZIP_PKG_PATH, lambda uri: uri == "uri_1")
+        assert zip_phys_pkg._blobs == {"uri_1": b"blob_1\n"}
+
+    def it_can_read_a_manifest_from_the_zip_central_directory(self):
+        manifest = PhysPkg.read_manifest(MINI_ZIP_PKG_PATH)
+        assert manifest == MINI_PKG_MANIFEST
+        assert manifest.root_uri == ROOT_URI
+
+    def it_can_list_the_entries_in_the_zip_central_directory(self):
+        entries = PhysPkg.read_entries(MINI_ZIP_PKG_PATH)
+        with ZipFile(MINI_ZIP_PKG_PATH) as zipf:
+            expected_entries = [
+                ItemEntry(
+                    info.filename,
+                    info.file_size,
+                    info.compress_size,
+                    info.compress_type,
+                    info.CRC,
+                    info.date_time,
+                )
+                for info in zipf.infolist()
+            ]
+        assert entries == expected_entries
+        assert [entry.uri for entry in entries] == ["uri_1", "uri_2"]
+
+    @pytest.mark.parametrize("path", [MINI_ZIP_PKG_PATH, MINI_DIR_PKG_PATH])
+    def it_can_read_a_filtered_manifest(self, path: str):
+        manifest = PhysPkg.read_manifest(path, lambda uri: uri == "uri_2")
+        assert manifest == {"uri_2": MINI_PKG_MANIFEST["uri_2"]}
+
+    def it_should_close_zip_file_after_use(self, _MappedZipFile_: Mock, zip_file_: Mock):
         # exercise ---------------------
         PhysPkg.read(MINI_ZIP_PKG_PATH)
         # verify -----------------------
-        ZipFile_.assert_called_once_with(MINI_ZIP_PKG_PATH, "r")
+        _MappedZipFile_.assert_called_once_with(MINI_ZIP_PKG_PATH)
         zip_file_.close.assert_called_with()
+
+
+class Describe_MappedZipFile:
+    def it_reads_the_zip_from_a_memory_map_of_it(self):
+        with _MappedZipFile(MINI_ZIP_PKG_PATH) as zipf:
+            assert isinstance(zipf.fp, mmap.mmap)
+            assert zipf.filename == MINI_ZIP_PKG_PATH
+            assert zipf.read("uri_2") == b"blob_2\n"
+            mapped_file = zipf.fp
+        assert mapped_file.closed
+
+    def but_it_reads_the_file_as_usual_when_it_cannot_be_mapped(
+        self, monkeypatch: pytest.MonkeyPatch
+    ):
+        monkeypatch.setattr("opcdiag.phys_pkg._MappedFile", Mock(side_effect=OSError))
+        with _MappedZipFile(MINI_ZIP_PKG_PATH) as zipf:
+            assert not isinstance(zipf.fp, mmap.mmap)
+            assert zipf.read("uri_2") == b"blob_2\n"
+
+
+class DescribePkgReader:
+    @pytest.mark.parametrize("path", [MINI_ZIP_PKG_PATH, MINI_DIR_PKG_PATH])
+    def it_reads_items_on_demand_and_counts_them(self, path: str):
+        with PkgReader.open(path) as reader:
+            assert reader.uris == ["uri_1", "uri_2"]
+            assert reader.root_uri == ROOT_URI
+            assert reader.stats == ReadStats(0, 0)
+
+            assert reader.read("uri_2") == b"blob_2\n"
+            assert reader.read("uri_2") == b"blob_2\n"
+
+            items_read, bytes_read = reader.stats
+            assert items_read == 2
+            assert bytes_read > 0
+
+    @pytest.mark.parametrize("path", [MINI_ZIP_PKG_PATH, MINI_DIR_PKG_PATH])
+    def it_holds_only_the_items_a_filter_selects(self, path: str):
+        with PkgReader.open(path, lambda uri: uri == "uri_2") as reader:
+            assert reader.uris == ["uri_2"]
+            assert reader.read("uri_2") == b"blob_2\n"
+            with pytest.raises(KeyError):
+                reader.read("uri_1")
+
+    @pytest.mark.parametrize("path", [MINI_ZIP_PKG_PATH, MINI_DIR_PKG_PATH])
+    def it_raises_on_an_item_that_is_not_in_the_package(self, path: str):
+        with PkgReader.open(path) as reader, pytest.raises(KeyError):
+            reader.read("uri_3")
+
+    def it_holds_the_zip_file_open_until_it_is_closed(self, _MappedZipFile_: Mock, zip_file_: Mock):
+        with PkgReader.open(MINI_ZIP_PKG_PATH) as reader:
+            assert isinstance(reader, ZipPkgReader)
+            _MappedZipFile_.assert_called_once_with(MINI_ZIP_PKG_PATH)
+            zip_file_.close.assert_not_called()
+        zip_file_.close.assert_called_once_with()
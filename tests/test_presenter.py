@@ -2,15 +2,26 @@
 
 # pyright: reportPrivateUsage=false
 
-from __future__ import unicode_literals
+from __future__ import annotations, unicode_literals
 
+import pathlib
 from unittest.mock import PropertyMock, call
 
 import pytest
 from lxml import etree
 
+from opcdiag.diff_cache import DiffCache
 from opcdiag.model import Package, PkgItem
-from opcdiag.presenter import DiffPresenter, ItemPresenter, diff
+from opcdiag.phys_pkg import ItemInfo, Manifest
+from opcdiag.presenter import (
+    DiffPresenter,
+    ItemPresenter,
+    ItemStat,
+    bytes_in_range,
+    diff,
+    diff_stat,
+    lines_in_range,
+)
 
 from .unitutil import (
     FixtureRequest,
@@ -19,12 +30,35 @@ from .unitutil import (
     function_mock,
     instance_mock,
     loose_mock,
-    property_mock,
 )
 
 URI_TAIL = "uri_tail"
 
 
+class Describe_bytes_in_range:
+    """Unit-test suite for `opcdiag.presenter.bytes_in_range()` function."""
+
+    @pytest.mark.parametrize(
+        ("first", "last", "expected_value"),
+        [
+            (1, 3, b"ab\n"),
+            (3, 6, b"\nc\xc3\xa9"),
+            (6, 6, b"\xa9"),
+            (8, None, b"d\n"),
+            (20, None, b""),
+        ],
+    )
+    def it_selects_a_range_of_the_encoded_text(
+        self, first: int, last: int | None, expected_value: bytes
+    ):
+        assert b"".join(bytes_in_range(["ab", "\ncé", "\nd\n"], first, last)) == expected_value
+
+    def it_stops_reading_once_the_range_is_complete(self):
+        chunks = iter(["ab", "cd", "ef"])
+        assert list(bytes_in_range(chunks, 2, 3)) == [b"b", b"c"]
+        assert list(chunks) == ["ef"]
+
+
 class Describe_diff:
     """Unit-test suite for `opcdiag.presenter.diff()` function."""
 
@@ -56,10 +90,193 @@ class Describe_diff:
             print("'%s'" % line)
         assert diff_text == expected_diff_text
 
+    @pytest.mark.parametrize("window_threshold", [0, 1024])
+    def it_can_diff_texts_given_as_lists_of_lines(self, window_threshold: int):
+        text = '<a>\n  <row r="1"/>\n  <row r="2"/>\n</a>'
+        text_2 = '<a>\n  <row r="1"/>\n  <row r="3"/>\n</a>'
+        lines, lines_2 = text.split("\n"), text_2.split("\n")
+
+        assert diff(lines, lines_2, "a", "b", window_threshold) == diff(
+            text, text_2, "a", "b", window_threshold
+        )
+        assert diff_stat(lines, lines_2, window_threshold) == (1, 1)
+
+    @pytest.mark.parametrize(
+        "changes",
+        [
+            {},
+            {"v3": "v3b"},
+            {"v0": "v0b", "v39": "v39b"},
+            {"v5": "v5b", "v6<": "v6b<", "v30": "v30b"},
+        ],
+    )
+    def it_can_diff_large_texts_chunk_by_chunk(self, changes: dict[str, str]):
+        rows = ['    <row r="%d">\n      <v>v%d</v>\n    </row>\n' % (i, i) for i in range(40)]
+        text = "<sheetData>\n%s</sheetData>" % "".join(rows)
+        text_2 = text
+        for old, new in changes.items():
+            text_2 = text_2.replace(old, new, 1)
+
+        diff_text = diff(text, text_2, "filename", "filename_2", window_threshold=0)
+
+        assert diff_text == diff(text, text_2, "filename", "filename_2")
+        assert diff_stat(text, text_2, window_threshold=0) == diff_stat(text, text_2)
+
+    def it_aligns_an_inserted_chunk_on_element_boundaries(self):
+        rows = ['  <row r="%d">\n    <v>v%d</v>\n  </row>\n' % (i, i) for i in range(4)]
+        text = "<sheetData>\n%s</sheetData>" % "".join(rows)
+        text_2 = text.replace(
+            '  <row r="2">', '  <row r="9">\n    <v>v9</v>\n  </row>\n  <row r="2">'
+        )
+
+        diff_text = diff(text, text_2, "filename", "filename_2", window_threshold=0)
+
+        assert diff_text == (
+            "--- filename\n"
+            "\n"
+            "+++ filename_2\n"
+            "\n"
+            "@@ -5,6 +5,9 @@\n"
+            "\n"
+            '   <row r="1">\n'
+            "     <v>v1</v>\n"
+            "   </row>\n"
+            '+  <row r="9">\n'
+            "+    <v>v9</v>\n"
+            "+  </row>\n"
+            '   <row r="2">\n'
+            "     <v>v2</v>\n"
+            "   </row>"
+        )
+        assert diff_stat(text, text_2, window_threshold=0) == (3, 0)
+
+
+class Describe_diff_stat:
+    """Unit-test suite for `opcdiag.presenter.diff_stat()` function."""
+
+    def it_counts_the_lines_inserted_and_deleted_between_two_texts(self):
+        text = "foobar\nnoobar\nzoobar"
+        text_2 = "foobar\ngoobar\nnoobar\nboobar"
+        assert diff_stat(text, text_2) == (2, 1)
+        assert diff_stat(text, text) == (0, 0)
+
 
 class DescribeDiffPresenter:
     """Unit-test suite for `opcdiag.presenter.DiffPresenter` objects."""
 
+    def it_can_list_the_items_present_in_only_one_of_two_manifests(self):
+        manifest_1 = Manifest(
+            {"a.xml": ItemInfo(1, 1), "b.xml": ItemInfo(2, 2), "d.png": ItemInfo(4, 4)},
+            root_uri="foo",
+        )
+        manifest_2 = Manifest(
+            {"a.xml": ItemInfo(1, 9), "c.xml": ItemInfo(3, 3), "d.png": ItemInfo(4, 4)},
+            root_uri="bar",
+        )
+
+        added_removed = DiffPresenter.added_removed(manifest_1, manifest_2)
+
+        assert added_removed == ["Only in foo: b.xml", "Only in bar: c.xml"]
+
+    def it_can_list_the_binary_items_that_differ_between_two_manifests(self):
+        manifest_1 = Manifest(
+            {
+                "a.png": ItemInfo(1, 1),
+                "b.bin": ItemInfo(2, 2),
+                "c.xml": ItemInfo(3, 3),
+                "d.jpg": ItemInfo(4, 4),
+                "m/f.wav": ItemInfo(7, 7),
+            },
+            root_uri="foo",
+        )
+        manifest_2 = Manifest(
+            {
+                "a.png": ItemInfo(1, 1),
+                "b.bin": ItemInfo(2, 9),
+                "c.xml": ItemInfo(3, 9),
+                "e.jpg": ItemInfo(5, 5),
+                "m/f.wav": ItemInfo(6, 6),
+            },
+            root_uri="bar",
+        )
+        binary_diffs = DiffPresenter.binary_diffs(manifest_1, manifest_2)
+
+        assert binary_diffs == [
+            "Binary files foo/b.bin and bar/b.bin differ (2 -> 2 bytes)",
+            "Binary files foo/m/f.wav and bar/m/f.wav differ (7 -> 6 bytes)",
+        ]
+
+    def it_can_list_the_item_changes_between_two_manifests(self):
+        manifest_1 = Manifest(
+            {"a.xml": ItemInfo(1, 1), "b.xml": ItemInfo(2, 2), "c.bin": ItemInfo(3, 3)}
+        )
+        manifest_2 = Manifest(
+            {"a.xml": ItemInfo(1, 1), "b.xml": ItemInfo(2, 9), "aa.bin": ItemInfo(4, 4)}
+        )
+        item_changes = DiffPresenter.item_changes(manifest_1, manifest_2)
+        assert item_changes == [("A", "aa.bin"), ("M", "b.xml"), ("D", "c.bin")]
+
+    @pytest.mark.parametrize(
+        ("blob_1", "blob_2", "expected_value"),
+        [
+            (b"<a><b/></a>", b"<a>\n  <b/>\n</a>", False),
+            (b"<a><b/></a>", b"<a><c/></a>", True),
+        ],
+    )
+    def it_can_tell_whether_text_items_differ_after_normalization(
+        self, blob_1: bytes, blob_2: bytes, expected_value: bool
+    ):
+        package_1 = Package({"a.xml": PkgItem("", "a.xml", blob_1)})
+        package_2 = Package({"a.xml": PkgItem("", "a.xml", blob_2)})
+        assert DiffPresenter.items_differ(package_1, package_2, ["a.xml"]) is expected_value
+
+    def it_detects_a_changed_binary_item_before_normalizing_any_text(self, ItemPresenter_: Mock):
+        package_1 = Package(
+            {"a.xml": PkgItem("", "a.xml", b"<a/>"), "b.bin": PkgItem("", "b.bin", b"1")}
+        )
+        package_2 = Package(
+            {"a.xml": PkgItem("", "a.xml", b"<b/>"), "b.bin": PkgItem("", "b.bin", b"2")}
+        )
+
+        items_differ = DiffPresenter.items_differ(package_1, package_2, ["a.xml", "b.bin"])
+
+        assert items_differ is True
+        ItemPresenter_.assert_not_called()
+
+    def it_can_summarize_the_item_changes_between_two_packages(self):
+        package_1 = Package(
+            {
+                "a.xml": PkgItem("", "a.xml", b"<a>\n  <b/>\n</a>"),
+                "b.xml": PkgItem("", "b.xml", b"<b/>"),
+                "c.xml": PkgItem("", "c.xml", b"<c><x/></c>"),
+                "d.bin": PkgItem("", "d.bin", b"foobar"),
+            }
+        )
+        package_2 = Package(
+            {
+                "a.xml": PkgItem("", "a.xml", b"<a><b/></a>"),
+                "b.xml": PkgItem("", "b.xml", b"<b><y/><z/></b>"),
+                "d.bin": PkgItem("", "d.bin", b"foo"),
+                "e.bin": PkgItem("", "e.bin", b"barfoo"),
+            }
+        )
+        item_changes = [
+            ("M", "a.xml"),
+            ("M", "b.xml"),
+            ("D", "c.xml"),
+            ("M", "d.bin"),
+            ("A", "e.bin"),
+        ]
+
+        diff_stats = DiffPresenter.diff_stats(package_1, package_2, item_changes)
+
+        assert diff_stats == [
+            ItemStat("M", "b.xml", 4, 1, None),
+            ItemStat("D", "c.xml", 0, 4, None),
+            ItemStat("M", "d.bin", 0, 0, (6, 3)),
+            ItemStat("A", "e.bin", 0, 0, (0, 6)),
+        ]
+
     def it_can_diff_a_named_item_between_two_packages(
         self,
         package_: Mock,
@@ -73,18 +290,18 @@ class DescribeDiffPresenter:
         # verify -----------------------
         package_.find_item_by_uri_tail.assert_called_once_with(URI_TAIL)
         package_2_.find_item_by_uri_tail.assert_called_once_with(URI_TAIL)
-        DiffPresenter_._pkg_item_diff.assert_called_once_with(pkg_item_, pkg_item_2_)
+        DiffPresenter_._pkg_item_diff.assert_called_once_with(pkg_item_, pkg_item_2_, None)
 
     def it_can_diff_two_package_items(
         self,
         pkg_item_: Mock,
         pkg_item_2_: Mock,
         ItemPresenter_: Mock,
-        item_presenter_text_: Mock,
-        item_presenter_2_text_: Mock,
+        item_presenter_lines_: Mock,
+        item_presenter_2_lines_: Mock,
         diff_: Mock,
-        text_: Mock,
-        text_2_: Mock,
+        lines_: list[str],
+        lines_2_: list[str],
         filename_: Mock,
         filename_2_: Mock,
         diff_text_: Mock,
@@ -95,11 +312,33 @@ class DescribeDiffPresenter:
         expected_ItemPresenter_calls = [call(pkg_item_), call(pkg_item_2_)]
         # verify -----------------------
         ItemPresenter_.assert_has_calls(expected_ItemPresenter_calls)
-        item_presenter_text_.assert_called_once_with()
-        item_presenter_2_text_.assert_called_once_with()
-        diff_.assert_called_once_with(text_, text_2_, filename_, filename_2_)
+        item_presenter_lines_.assert_called_once_with()
+        item_presenter_2_lines_.assert_called_once_with()
+        diff_.assert_called_once_with(lines_, lines_2_, filename_, filename_2_)
         assert item_diff is diff_text_
 
+    def it_can_reuse_a_cached_diff_of_the_same_two_item_versions(
+        self, request: FixtureRequest, tmp_path: pathlib.Path
+    ):
+        blob_1, blob_2 = b"<a><b/><c/></a>", b"<a><b/><d/></a>"
+        cache = DiffCache(str(tmp_path / "diffs.db"))
+        request.addfinalizer(cache.close)
+
+        diff_1 = DiffPresenter._pkg_item_diff(
+            PkgItem("pkg_1", "a.xml", blob_1), PkgItem("pkg_2", "a.xml", blob_2), cache
+        )
+        # -- the same two versions in other packages, so only the filenames differ --
+        pkg_item_3 = PkgItem("pkg_3", "a.xml", blob_1)
+        pkg_item_4 = PkgItem("pkg_4", "a.xml", blob_2)
+        diff_2 = DiffPresenter._pkg_item_diff(pkg_item_3, pkg_item_4, cache)
+        unchanged_diff = DiffPresenter._pkg_item_diff(pkg_item_3, pkg_item_3, cache)
+
+        assert diff_1.startswith("--- pkg_1/a.xml\n\n+++ pkg_2/a.xml\n\n@@")
+        assert diff_2 == DiffPresenter._pkg_item_diff(pkg_item_3, pkg_item_4)
+        assert unchanged_diff == ""
+        cache_key = DiffCache.key(blob_1, blob_2, "XmlPartPresenter", "window_threshold=4194304")
+        assert cache.get(cache_key) == "---\n\n+++\n\n%s" % diff_1.split("\n\n", 2)[2]
+
     def it_can_gather_rels_diffs_between_two_packages(
         self,
         package_: Mock,
@@ -111,7 +350,7 @@ class DescribeDiffPresenter:
         # exercise ---------------------
         rels_diffs = DiffPresenter.rels_diffs(package_, package_2_)
         # verify -----------------------
-        DiffPresenter_._pkg_item_diffs.assert_called_once_with(rels_items_, package_2_)
+        DiffPresenter_._pkg_item_diffs.assert_called_once_with(rels_items_, package_2_, None)
         assert rels_diffs is pkg_item_diffs_
 
     def it_can_gather_xml_part_diffs_between_two_packages(
@@ -125,7 +364,7 @@ class DescribeDiffPresenter:
         # exercise ---------------------
         xml_part_diffs = DiffPresenter.xml_part_diffs(package_, package_2_)
         # verify -----------------------
-        DiffPresenter_._pkg_item_diffs.assert_called_once_with(xml_parts_, package_2_)
+        DiffPresenter_._pkg_item_diffs.assert_called_once_with(xml_parts_, package_2_, None)
         assert xml_part_diffs is pkg_item_diffs_
 
     def it_can_diff_a_list_of_pkg_items_against_another_package(
@@ -148,27 +387,49 @@ class DescribeDiffPresenter:
             call(uri_2_),
         ]
         assert DiffPresenter_._pkg_item_diff.call_args_list == [
-            call(pkg_item_, pkg_item_2_),
-            call(pkg_item_2_, pkg_item_),
+            call(pkg_item_, pkg_item_2_, None),
+            call(pkg_item_2_, pkg_item_, None),
         ]
         assert diffs == [pkg_item_diff_, pkg_item_diff_2_]
 
+    def it_skips_a_pkg_item_with_no_counterpart_in_the_other_package(
+        self, pkg_items_: Mock, package_2_: Mock, DiffPresenter_: Mock, pkg_item_2_: Mock
+    ):
+        package_2_.find_item_by_uri_tail.side_effect = (KeyError, pkg_item_2_)
 
-class DescribeItemPresenter:
-    """Unit-test suite for `opcdiag.presenter.ItemPresenter` objects."""
+        diffs = DiffPresenter._pkg_item_diffs(pkg_items_, package_2_)
+
+        DiffPresenter_._pkg_item_diff.assert_called_once_with(pkg_item_2_, pkg_item_2_, None)
+        assert len(diffs) == 1
 
-    FOOBAR_XML = (
-        "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
-        "<foobar>\n"
-        '  <foo val="bar"/>\n'
-        '  <bar val="foo"/>\n'
-        "</foobar>"
+
+class Describe_lines_in_range:
+    """Unit-test suite for `opcdiag.presenter.lines_in_range()` function."""
+
+    @pytest.mark.parametrize(
+        ("first", "last", "expected_value"),
+        [
+            (1, 1, "l1\n"),
+            (2, 3, "l2\nl3\n"),
+            (3, None, "l3\nl4\nl5"),
+            (5, 9, "l5"),
+            (6, None, ""),
+        ],
     )
+    def it_selects_a_range_of_lines_of_the_text(
+        self, first: int, last: int | None, expected_value: str
+    ):
+        chunks = ["l1\nl", "2\n", "l3\nl4\nl5"]
+        assert "".join(lines_in_range(chunks, first, last)) == expected_value
+
+    def it_stops_reading_once_the_range_is_complete(self):
+        chunks = iter(["l1\nl2", "\nl3\n", "l4\n"])
+        assert list(lines_in_range(chunks, 2, 3)) == ["l2", "\nl3\n"]
+        assert list(chunks) == ["l4\n"]
 
-    @pytest.fixture
-    def foobar_elm_(self):
-        foobar_xml_bytes = self.FOOBAR_XML.encode("utf-8")
-        return etree.fromstring(foobar_xml_bytes)
+
+class DescribeItemPresenter:
+    """Unit-test suite for `opcdiag.presenter.ItemPresenter` objects."""
 
     def it_constructs_subclass_based_on_item_type(
         self, content_types_item_: Mock, rels_item_: Mock, xml_part_: Mock, binary_part_: Mock
@@ -193,37 +454,33 @@ class DescribeItemPresenter:
         with pytest.raises(NotImplementedError):
             item_presenter.text
 
-    def it_can_pretty_format_the_xml_of_its_item(
-        self, content_types_item_: Mock, foobar_elm_: Mock
-    ):
-        """Note: tests integration with lxml.etree"""
-        content_types_item_.element = foobar_elm_
-        item_presenter = ItemPresenter(content_types_item_)
-        assert item_presenter.xml == self.FOOBAR_XML
+    def it_provides_its_text_as_chunks_ending_with_a_newline(self):
+        blob = b'<Relationships xmlns="foo"><Relationship Id="rId1" Target="bar"/></Relationships>'
+        item_presenter = ItemPresenter(PkgItem("", "_rels/.rels", blob))
+        assert "".join(item_presenter.text_chunks) == "%s\n" % item_presenter.text
 
 
 class DescribeContentTypesPresenter:
     """Unit-test suite for `opcdiag.presenter.ContentTypesPresenter` objects."""
 
-    def it_can_format_cti_xml(self, ItemPresenter_xml_: Mock, content_types_item_: Mock):
+    def it_can_format_cti_xml(self, content_types_item_: Mock):
         # fixture ----------------------
-        ItemPresenter_xml_.return_value = (
-            "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
-            "<Types>\n"
-            '  <Default Extension="foo" ContentType="bar"/>\n'
-            '  <Override PartName="foobar" ContentType="barfoo"/>\n'
-            '  <Default Extension="bar" ContentType="foo"/>\n'
-            '  <Override PartName="barfoo" ContentType="foobar"/>\n'
+        content_types_item_.element = etree.fromstring(
+            '<Types xmlns="urn:ct">'
+            '<Default Extension="foo" ContentType="bar"/>'
+            '<Override PartName="foobar" ContentType="barfoo"/>'
+            '<Default Extension="bar" ContentType="foo"/>'
+            '<Override PartName="barfoo" ContentType="foo&amp;bar"/>'
             "</Types>"
         )
         content_types_presenter = ItemPresenter(content_types_item_)
         # verify -----------------------
         expected_text = (
             "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
-            "<Types>\n"
+            '<Types xmlns="urn:ct">\n'
             '  <Default Extension="bar" ContentType="foo"/>\n'
             '  <Default Extension="foo" ContentType="bar"/>\n'
-            '  <Override PartName="barfoo" ContentType="foobar"/>\n'
+            '  <Override PartName="barfoo" ContentType="foo&amp;bar"/>\n'
             '  <Override PartName="foobar" ContentType="barfoo"/>\n'
             "</Types>"
         )
@@ -233,61 +490,139 @@ class DescribeContentTypesPresenter:
 class DescribeRelsItemPresenter:
     """Unit-test suite for `opcdiag.presenter.RelsItemPresenter` objects."""
 
-    def it_can_format_rels_xml(self, ItemPresenter_xml_: Mock, rels_item_: Mock):
+    def it_can_format_rels_xml(self, rels_item_: Mock):
         # fixture ----------------------
-        ItemPresenter_xml_.return_value = (
-            "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
-            "<Relationships>\n"
-            '  <Relationship Id="rId1" Type="xyz" Target="foo"/>\n'
-            '  <Relationship Id="rId2" Type="abc" Target="bar"/>\n'
-            '  <Relationship Id="rId3" Type="mno" Target="baz"/>\n'
+        rels_item_.element = etree.fromstring(
+            '<Relationships xmlns="urn:rels" xmlns:x="urn:x">'
+            '<Relationship Id="rId1" Type="xyz" Target="foo"/>'
+            '<Relationship Id="rId2" Type="abc"\n    Target="bar"/>'
+            '<Relationship x:y="z" Id="rId3" Type="mno" Target="baz"/>'
             "</Relationships>"
         )
         rels_presenter = ItemPresenter(rels_item_)
         # verify -----------------------
         expected_text = (
             "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
-            "<Relationships>\n"
+            '<Relationships xmlns="urn:rels" xmlns:x="urn:x">\n'
             '  <Relationship Id="x" Type="abc" Target="bar"/>\n'
-            '  <Relationship Id="x" Type="mno" Target="baz"/>\n'
             '  <Relationship Id="x" Type="xyz" Target="foo"/>\n'
+            '  <Relationship x:y="z" Id="x" Type="mno" Target="baz"/>\n'
             "</Relationships>"
         )
         assert rels_presenter.text == expected_text
 
+    def it_drops_anything_but_the_relationship_start_tags(self, rels_item_: Mock):
+        rels_item_.element = etree.fromstring(
+            '<Relationships xmlns="urn:rels">stray<!-- c --><?pi x?>'
+            '<Relationship Id="rId2" Target="b">text<x/></Relationship>tail'
+            '<Relationship Id="rId1" Target="a"/><Other Id="rId3"/>'
+            "</Relationships>"
+        )
+        rels_presenter = ItemPresenter(rels_item_)
+        assert rels_presenter.text == (
+            "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+            '<Relationships xmlns="urn:rels">\n'
+            '  <Relationship Id="x" Target="a"/>\n'
+            '  <Relationship Id="x" Target="b"/>\n'
+            "</Relationships>"
+        )
+
+    def it_keeps_the_xml_prefix_on_root_attributes(self, rels_item_: Mock):
+        rels_item_.element = etree.fromstring('<Relationships xmlns="urn:rels" xml:lang="en-US"/>')
+        rels_presenter = ItemPresenter(rels_item_)
+        assert rels_presenter.text == (
+            "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+            '<Relationships xmlns="urn:rels" xml:lang="en-US"/>'
+        )
+
+    def it_formats_an_empty_rels_item_as_a_single_root_line(self, rels_item_: Mock):
+        rels_item_.element = etree.fromstring('<Relationships xmlns="urn:rels"/>')
+        rels_presenter = ItemPresenter(rels_item_)
+        assert rels_presenter.text == (
+            "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+            '<Relationships xmlns="urn:rels"/>'
+        )
+
 
 class DescribeXmlPartPresenter:
     """Unit-test suite for `opcdiag.presenter.XmlPartPresenter` objects."""
 
-    def it_can_format_part_xml(self, ItemPresenter_xml_: Mock, xml_part_: Mock):
-        # fixture ----------------------
-        cases = (
+    @pytest.mark.parametrize(
+        ("part_xml", "expected_text"),
+        [
             # root w/no attrs is unchanged -----------------
-            (("<?xml?>\n" "<foobar/>"), ("<?xml?>\n" "<foobar/>")),
+            ("<foobar/>", "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n<foobar/>"),
             # sort order: def_ns, nsdecls, attrs -----------
             (
-                (
-                    "<?xml?>\n"
-                    '<foobar foo="bar" xmlns:f="foo" xmlns:b="bar" xmlns="zoo" boo'
-                    '="far"/>'
-                ),
-                (
-                    "<?xml?>\n"
-                    "<foobar\n"
-                    '    xmlns="zoo"\n'
-                    '    xmlns:b="bar"\n'
-                    '    xmlns:f="foo"\n'
-                    '    boo="far"\n'
-                    '    foo="bar"\n'
-                    "    />"
-                ),
+                '<foobar foo="bar" xmlns:f="foo" xmlns:b="bar" xmlns="zoo" boo="f&gt;r"/>',
+                "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+                "<foobar\n"
+                '    xmlns="zoo"\n'
+                '    xmlns:b="bar"\n'
+                '    xmlns:f="foo"\n'
+                '    boo="f&gt;r"\n'
+                '    foo="bar"\n'
+                "    />",
+            ),
+            # body after root start-tag is unchanged --------
+            (
+                '<f:foo xmlns:f="foo" b="a"><f:bar x="y"/></f:foo>',
+                "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+                "<f:foo\n"
+                '    xmlns:f="foo"\n'
+                '    b="a"\n'
+                "    >\n"
+                '  <f:bar x="y"/>\n'
+                "</f:foo>",
             ),
+            # xml: prefix is kept on root attributes --------
+            (
+                '<w:doc xmlns:w="urn:w" xml:space="preserve" xml:lang="en-US"><w:body/></w:doc>',
+                "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+                "<w:doc\n"
+                '    xmlns:w="urn:w"\n'
+                '    xml:lang="en-US"\n'
+                '    xml:space="preserve"\n'
+                "    >\n"
+                "  <w:body/>\n"
+                "</w:doc>",
+            ),
+        ],
+    )
+    def it_can_format_part_xml(self, part_xml: str, expected_text: str):
+        """Note: tests integration with lxml.etree"""
+        part_presenter = ItemPresenter(PkgItem("", "foo.xml", part_xml.encode("utf-8")))
+        assert part_presenter.text == expected_text
+
+    def it_provides_the_lines_of_its_text(self):
+        blob = b'<f:foo xmlns:f="foo" b="a"><f:bar x="y"/></f:foo>'
+        part_presenter = ItemPresenter(PkgItem("", "foo.xml", blob))
+        assert part_presenter.lines == [
+            "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>",
+            "<f:foo",
+            '    xmlns:f="foo"',
+            '    b="a"',
+            "    >",
+            '  <f:bar x="y"/>',
+            "</f:foo>",
+        ]
+
+    def it_generates_its_text_as_the_xml_is_pretty_printed(self, xml_part_: Mock):
+        xml_part_.iter_pretty_xml.return_value = iter(
+            [
+                "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n<f:fo",
+                'o xmlns:f="foo" b="a">\n  <f:bar/>\n',
+                "</f:foo>\n",
+            ]
         )
-        # verify -----------------------
-        for part_xml, expected_xml in cases:
-            ItemPresenter_xml_.return_value = part_xml
-            part_presenter = ItemPresenter(xml_part_)
-            assert part_presenter.text == expected_xml
+        xml_part_.root_element = etree.fromstring('<f:foo xmlns:f="foo" b="a"/>')
+        part_presenter = ItemPresenter(xml_part_)
+
+        assert list(part_presenter.text_chunks) == [
+            "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n"
+            '<f:foo\n    xmlns:f="foo"\n    b="a"\n    >\n  <f:bar/>\n',
+            "</f:foo>\n",
+        ]
 
 
 # ================================================================================================
@@ -351,34 +686,29 @@ def ItemPresenter_(request: FixtureRequest, item_presenter_: Mock, item_presente
 
 
 @pytest.fixture
-def ItemPresenter_xml_(request: FixtureRequest):
-    return property_mock("opcdiag.presenter.ItemPresenter.xml", request)
-
-
-@pytest.fixture
-def item_presenter_(request: FixtureRequest, filename_: Mock, item_presenter_text_: Mock):
+def item_presenter_(request: FixtureRequest, filename_: Mock, item_presenter_lines_: Mock):
     item_presenter_ = instance_mock(ItemPresenter, request)
     item_presenter_.filename = filename_
-    type(item_presenter_).text = item_presenter_text_
+    type(item_presenter_).lines = item_presenter_lines_
     return item_presenter_
 
 
 @pytest.fixture
-def item_presenter_2_(request: FixtureRequest, filename_2_: Mock, item_presenter_2_text_: Mock):
+def item_presenter_2_(request: FixtureRequest, filename_2_: Mock, item_presenter_2_lines_: Mock):
     item_presenter_2_ = instance_mock(ItemPresenter, request)
     item_presenter_2_.filename = filename_2_
-    type(item_presenter_2_).text = item_presenter_2_text_
+    type(item_presenter_2_).lines = item_presenter_2_lines_
     return item_presenter_2_
 
 
 @pytest.fixture
-def item_presenter_text_(request: FixtureRequest, text_: Mock):
-    return PropertyMock(name=request.fixturename, return_value=text_)
+def item_presenter_lines_(request: FixtureRequest, lines_: Mock):
+    return PropertyMock(name=request.fixturename, return_value=lines_)
 
 
 @pytest.fixture
-def item_presenter_2_text_(request: FixtureRequest, text_2_: Mock):
-    return PropertyMock(name=request.fixturename, return_value=text_2_)
+def item_presenter_2_lines_(request: FixtureRequest, lines_2_: Mock):
+    return PropertyMock(name=request.fixturename, return_value=lines_2_)
 
 
 @pytest.fixture
@@ -447,13 +777,13 @@ def rels_items_(request: FixtureRequest):
 
 
 @pytest.fixture
-def text_(request: FixtureRequest):
-    return "text_"
+def lines_(request: FixtureRequest):
+    return ["lines_"]
 
 
 @pytest.fixture
-def text_2_(request: FixtureRequest):
-    return "text_2_"
+def lines_2_(request: FixtureRequest):
+    return ["lines_2_"]
 
 
 @pytest.fixture
@@ -0,0 +1,89 @@
+"""Unit tests for `opcdiag.watch` module."""
+
+from __future__ import annotations
+
+import os
+import pathlib
+import shutil
+from typing import Callable
+
+import pytest
+
+from opcdiag.watch import poll_changes, snapshot
+
+from .unitutil import FixtureRequest, Mock, function_mock
+
+
+class DescribePollChanges:
+    def it_reports_the_files_changed_once_they_settle(self, pkg_dir: pathlib.Path, sleep_: Mock):
+        self._on_each_sleep(
+            sleep_,
+            lambda: (pkg_dir / "a.xml").write_bytes(b"<a><b/></a>"),
+            lambda: None,
+            lambda: (pkg_dir / "c.xml").write_bytes(b"<c/>"),
+            # -- still being written at the next poll, so not reported until after it --
+            lambda: (pkg_dir / "sub" / "d.xml").write_bytes(b"<d/>"),
+            lambda: None,
+        )
+        changes = poll_changes(str(pkg_dir), 0.5)
+
+        assert next(changes) == {"a.xml"}
+        assert next(changes) == {"c.xml", "sub/d.xml"}
+        assert sleep_.call_count == 5
+        sleep_.assert_called_with(0.5)
+
+    def it_waits_out_a_package_that_is_missing_for_a_while(
+        self, pkg_dir: pathlib.Path, sleep_: Mock
+    ):
+        self._on_each_sleep(
+            sleep_,
+            lambda: shutil.rmtree(pkg_dir),
+            lambda: None,
+            lambda: (pkg_dir / "sub").mkdir(parents=True),
+            lambda: (pkg_dir / "sub" / "d.xml").write_bytes(b"<d/>"),
+            lambda: None,
+        )
+        changes = poll_changes(str(pkg_dir))
+
+        assert next(changes) == {"a.xml", "sub/d.xml"}
+
+    # fixtures -------------------------------------------------------------
+
+    @pytest.fixture
+    def pkg_dir(self, tmp_path: pathlib.Path) -> pathlib.Path:
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "a.xml").write_bytes(b"<a/>")
+        return tmp_path
+
+    @pytest.fixture
+    def sleep_(self, request: FixtureRequest):
+        return function_mock("opcdiag.watch.time.sleep", request)
+
+    # helpers --------------------------------------------------------------
+
+    @staticmethod
+    def _on_each_sleep(sleep_: Mock, *actions: Callable[[], object]):
+        """Make each call of *sleep_* perform the next of *actions* on the package."""
+        remaining = list(actions)
+
+        def sleep(interval: float):
+            remaining.pop(0)()
+
+        sleep_.side_effect = sleep
+
+
+class DescribeSnapshot:
+    def it_provides_a_copy_of_a_zip_package_while_in_use(self, tmp_path: pathlib.Path):
+        pkg_path = tmp_path / "pkg.zip"
+        pkg_path.write_bytes(b"PK")
+
+        with snapshot(str(pkg_path)) as snapshot_path:
+            pkg_path.write_bytes(b"")
+            assert snapshot_path != str(pkg_path)
+            assert pathlib.Path(snapshot_path).read_bytes() == b"PK"
+
+        assert not os.path.exists(snapshot_path)
+
+    def but_it_provides_the_directory_of_a_directory_package_itself(self, tmp_path: pathlib.Path):
+        with snapshot(str(tmp_path)) as snapshot_path:
+            assert snapshot_path == str(tmp_path)